@@ -174,6 +174,7 @@ def get_network_settings() -> Dict[str, bool]:
 
 REDIS_URL = _get("REDIS_URL", "redis://localhost:6379/0")
 REDIS_DISABLED = str(_get("REDIS_DISABLED", "false")).lower() in {"1", "true", "yes"}
+REDIS_ASYNC_MAX_CONNECTIONS = max(1, int(_get("REDIS_ASYNC_MAX_CONNECTIONS", "200")))
 CELERY_ALWAYS_EAGER = str(_get("CELERY_ALWAYS_EAGER", "false")).lower() in {"1", "true", "yes"}
 FEATURE_SAAS_ENTITLEMENTS = str(_get("FEATURE_SAAS_ENTITLEMENTS", "false")).lower() in {"1", "true", "yes"}
 FEATURE_SAAS_ADMIN_API = str(_get("FEATURE_SAAS_ADMIN_API", "false")).lower() in {"1", "true", "yes"}
@@ -239,6 +240,7 @@ AUTO_MANUAL = str(_get("AUTO_MANUAL", "false")).lower() in {"1", "true", "yes"}
 MANUAL_TREE_DEPTH = int(_get("MANUAL_TREE_DEPTH", "2"))
 MANUAL_MAX_README_CHARS = int(_get("MANUAL_MAX_README_CHARS", "1200"))
 MANUAL_GENERATOR_VERSION = str(_get("MANUAL_GENERATOR_VERSION", "v0.4"))
+MANUAL_CACHE_SIZE = max(0, int(_get("MANUAL_CACHE_SIZE", "64")))
 ANALYZE_ROOT = _get("ANALYZE_ROOT", os.path.join(ROOT_DIR, ".antihub", "analyze"))
 REPORT_ROOT = _get("REPORT_ROOT", os.path.join(ROOT_DIR, ".antihub", "reports"))
 ANALYZE_TREE_DEPTH = int(_get("ANALYZE_TREE_DEPTH", "3"))
@@ -292,10 +294,13 @@ DEEP_SEARCH_POINTS_COST = max(0, int(_get("DEEP_SEARCH_POINTS_COST", "50")))
 PORT_POOL_START = int(_get("PORT_POOL_START", "30000"))
 PORT_POOL_END = int(_get("PORT_POOL_END", "30100"))
 PORT_MODE = str(_get("PORT_MODE", "pool"))  # pool | dynamic
+PORT_RELEASE_COOLDOWN_SECONDS = max(0, int(_get("PORT_RELEASE_COOLDOWN_SECONDS", "5")))
 
 LOG_RETENTION_LINES = int(_get("LOG_RETENTION_LINES", "2000"))
 LOG_LIST_PREFIX = _get("LOG_LIST_PREFIX", "logs:")
 WS_LOG_CHANNEL_PREFIX = _get("WS_LOG_CHANNEL_PREFIX", "build_logs:")
+LOG_JSONL_CACHE_TTL_SECONDS = max(0, int(_get("LOG_JSONL_CACHE_TTL_SECONDS", "5")))
+LOG_JSONL_CHUNK_LINES = max(1, int(_get("LOG_JSONL_CHUNK_LINES", "200")))
 CASE_PREFIX = _get("CASE_PREFIX", "case:")
 MANUAL_PREFIX = _get("MANUAL_PREFIX", "manual:")
 MANUAL_META_PREFIX = _get("MANUAL_META_PREFIX", "manual_meta:")
@@ -402,8 +407,8 @@ _IS_PRODUCTION = str(APP_ENV or "").strip().lower() in {"prod", "production"}
 _NO_PROXY_OPENER = urllib.request.build_opener(urllib.request.ProxyHandler({}))
 
 
-def build_url_opener(url: str = "") -> urllib.request.OpenerDirector:
-    """Return a urllib opener with correct proxy behaviour.
+def should_bypass_proxy(url: str = "") -> bool:
+    """Return True when requests to ``url`` must not go through an env proxy.
 
     * Production (APP_ENV=prod/production): always bypass proxy — the US
       server has direct internet access.
@@ -412,9 +417,16 @@ def build_url_opener(url: str = "") -> urllib.request.OpenerDirector:
     * Localhost targets always bypass proxy regardless of environment.
     """
     if _IS_PRODUCTION:
-        return _NO_PROXY_OPENER
+        return True
     if url:
         host = (urlparse(url).hostname or "").lower()
         if host in {"localhost", "127.0.0.1", "0.0.0.0"} or host.startswith("127."):
-            return _NO_PROXY_OPENER
+            return True
+    return False
+
+
+def build_url_opener(url: str = "") -> urllib.request.OpenerDirector:
+    """Return a urllib opener with the proxy behaviour of :func:`should_bypass_proxy`."""
+    if should_bypass_proxy(url):
+        return _NO_PROXY_OPENER
     return urllib.request.build_opener()
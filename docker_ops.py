@@ -3,7 +3,7 @@ import re
 import subprocess
 import time
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import docker
 
@@ -140,14 +140,15 @@ def wait_for_container_running(
     client: docker.DockerClient,
     container_id: str,
     timeout_seconds: int,
-) -> None:
+) -> Dict[str, Any]:
+    """Poll until the container is running and return its inspected attrs."""
     deadline = time.time() + timeout_seconds
     while time.time() < deadline:
+        # containers.get() already performs a fresh inspect; no reload() needed.
         container = client.containers.get(container_id)
-        container.reload()
         status = container.status
         if status == "running":
-            return
+            return container.attrs
         if status in {"exited", "dead"}:
             raise RuntimeError("Container exited during startup")
         time.sleep(1)
@@ -1,18 +1,23 @@
+import contextlib
 import hashlib
 import json
 import os
-import shutil
 import subprocess
+import tempfile
 import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Dict, Optional
 
+import orjson
+
 from analyze.signals import sanitize_text
 from config import INGEST_GIT_DEPTH, INGEST_MAX_FILES
 from git_ops import normalize_ref
 from ingest.openclaw import OpenClawClient
 
+IGNORED_DIRS = frozenset({".git", "node_modules", "venv", ".venv"})
+
 
 @dataclass
 class IngestOutcome:
@@ -43,18 +48,19 @@ def _resolve_commit_sha(repo_path: Path) -> Optional[str]:
 def _compute_repo_fingerprint(repo_path: Path, limit: int = 2000) -> str:
     hasher = hashlib.sha1()
     count = 0
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in {".git", "node_modules", "venv", ".venv"}]
+    base = str(repo_path)
+    for root, dirs, files in os.walk(base):
+        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+        rel_root = os.path.relpath(root, base)
+        prefix = "" if rel_root == "." else rel_root + os.sep
         for name in sorted(files):
             if count >= limit:
                 break
-            path = Path(root) / name
-            rel = str(path.relative_to(repo_path))
             try:
-                stat = path.stat()
+                stat = os.stat(os.path.join(root, name))
             except Exception:
                 continue
-            hasher.update(rel.encode("utf-8", errors="ignore"))
+            hasher.update((prefix + name).encode("utf-8", errors="ignore"))
             hasher.update(str(stat.st_size).encode("utf-8"))
             hasher.update(str(int(stat.st_mtime)).encode("utf-8"))
             count += 1
@@ -66,12 +72,12 @@ def _compute_repo_fingerprint(repo_path: Path, limit: int = 2000) -> str:
 def _scan_repo_stats(repo_path: Path, max_files: int = 20000) -> Dict[str, Any]:
     total_files = 0
     total_bytes = 0
+    join = os.path.join
     for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in {".git", "node_modules", "venv", ".venv"}]
+        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
         for name in files:
-            path = Path(root) / name
             try:
-                total_bytes += path.stat().st_size
+                total_bytes += os.stat(join(root, name)).st_size
                 total_files += 1
             except Exception:
                 continue
@@ -89,6 +95,20 @@ def _sanitize_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         return {}
 
 
+def _replace_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` to a sibling temp file and rename it over ``path``."""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
 def run_ingest(
     case_id: str,
     repo_url: str,
@@ -173,13 +193,13 @@ def run_ingest(
             try:
                 source = Path(str(output.get("ingest_meta_path")))
                 if source.exists():
-                    shutil.copyfile(source, meta_path)
+                    _replace_atomic(meta_path, source.read_bytes())
                 else:
-                    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+                    _replace_atomic(meta_path, orjson.dumps(meta, option=orjson.OPT_INDENT_2))
             except Exception:
-                meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+                _replace_atomic(meta_path, orjson.dumps(meta, option=orjson.OPT_INDENT_2))
         else:
-            meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+            _replace_atomic(meta_path, orjson.dumps(meta, option=orjson.OPT_INDENT_2))
 
         return IngestOutcome(
             repo_path=repo_path,
@@ -10,14 +10,15 @@ import socket
 import subprocess  # nosec B404
 import time
 import uuid
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Iterator
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit
 
 import docker
+import orjson
 from fastapi import (
     Body,
     Depends,
@@ -35,7 +36,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import (
     FileResponse,
     JSONResponse,
-    PlainTextResponse,
+    ORJSONResponse,
     RedirectResponse,
     StreamingResponse,
 )
@@ -100,6 +101,7 @@ from config import (
     FEATURE_SAAS_ENTITLEMENTS,
     FEATURE_MULTI_TENANT_FOUNDATION,
     GIT_SHA,
+    LOG_JSONL_CHUNK_LINES,
     ONE_CLICK_DEPLOY_POINTS_COST,
     OPENCLAW_BASE_URL,
     PAYMENT_PROVIDER,
@@ -148,9 +150,12 @@ from storage import (
     acquire_analyze_lock,
     acquire_visualize_lock,
     append_log,
+    build_shared_async_redis_client,
+    cache_logs_jsonl,
     decode_log_entry,
-    get_async_redis_client,
+    get_cached_logs_jsonl,
     get_case,
+    get_case_fields,
     get_logs,
     get_logs_slice,
     get_manual,
@@ -162,6 +167,7 @@ from storage import (
     set_case,
     set_manual_status,
     update_case,
+    update_case_runtime,
 )
 from templates_store import get_template, load_templates
 from tenant_context import TENANT_CONTEXT_HEADER, TenantContext, TenantContextError, resolve_tenant_context
@@ -171,8 +177,8 @@ from worker import (
     analyze_case,
     build_and_run,
     generate_manual_task,
-    release_port,
     reserve_specific_port,
+    schedule_port_release,
     visualize_case,
 )
 
@@ -188,6 +194,7 @@ TENANT_AUDIT_PROVIDER = "tenant"
 TENANT_AUDIT_RAW_PAYLOAD_MAX_CHARS = 4000
 TENANT_AUDIT_DETAIL_MAX_CHARS = 600
 TENANT_AUDIT_VALUE_PREVIEW_MAX_CHARS = 600
+VISUAL_FILE_NAME_PATTERN = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.\-]{0,254}")
 MALICIOUS_XSS_PATTERN = re.compile(r"(?is)<\s*/?\s*script\b|javascript:|on\w+\s*=")
 MALICIOUS_SQLI_PATTERN = re.compile(
     r"(?is)\bunion\b\s+\bselect\b|\bdrop\b\s+\btable\b|\bdelete\b\s+\bfrom\b|\binsert\b\s+\binto\b|\bor\b\s+1\s*=\s*1\b|\band\b\s+1\s*=\s*1\b"
@@ -212,6 +219,8 @@ CONTENT_SECURITY_POLICY = (
 
 configure_json_logging(level=logging.INFO)
 APP_LOGGER = get_logger("antihub.api")
+_REPORT_STORE = ReportStore()
+_VISUAL_STORE = VisualStore()
 
 
 def _normalize_role_value(raw_role: str) -> str:
@@ -465,8 +474,16 @@ def _migrate_legacy_user_to_db(identity: AuthIdentity, password: str) -> None:
         log_event(APP_LOGGER, logging.WARNING, "auth.migrate_legacy_user_failed", username=identity.username, error=str(exc))
 
 
+def _shared_async_redis(application: FastAPI) -> Any:
+    client = getattr(application.state, "redis", None)
+    if client is None:
+        client = build_shared_async_redis_client()
+        application.state.redis = client
+    return client
+
+
 @asynccontextmanager
-async def lifespan(_: FastAPI):
+async def lifespan(application: FastAPI):
     if AUTH_ENABLED:
         if not AUTH_TOKEN_SECRET:
             raise RuntimeError("AUTH_TOKEN_SECRET is required when AUTH_ENABLED=true")
@@ -483,10 +500,24 @@ async def lifespan(_: FastAPI):
         _bootstrap_root_admin_user()
         _bootstrap_auth_users_from_config()
         seed_default_catalog()
-    yield
-
-
-app = FastAPI(title="Agent Platform", version=APP_VERSION, root_path=ROOT_PATH, lifespan=lifespan)
+    if not REDIS_DISABLED:
+        _shared_async_redis(application)
+    try:
+        yield
+    finally:
+        client = getattr(application.state, "redis", None)
+        application.state.redis = None
+        if client is not None:
+            await client.aclose()
+
+
+app = FastAPI(
+    title="Agent Platform",
+    version=APP_VERSION,
+    root_path=ROOT_PATH,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
@@ -2486,12 +2517,30 @@ def _get_case_for_identity(
     *,
     actor_tenant_id: str | None = None,
 ) -> Dict[str, Any]:
+    # The actor tenant is resolved lazily by the visibility check, which skips the
+    # DB lookup entirely for root identities and when auth is disabled.
     data = get_case_or_404(case_id)
     if _is_case_visible_to_identity(identity, data, actor_tenant_id=actor_tenant_id):
         return data
     raise HTTPException(status_code=404, detail="Case not found")
 
 
+_CASE_VISIBILITY_FIELDS = ("tenant_id", "owner_username")
+
+
+def _get_case_fields_for_identity(
+    case_id: str,
+    identity: AuthIdentity,
+    fields: Tuple[str, ...] = (),
+) -> Dict[str, Any]:
+    data = get_case_fields(case_id, (*fields, *_CASE_VISIBILITY_FIELDS))
+    if data is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    if _is_case_visible_to_identity(identity, data):
+        return data
+    raise HTTPException(status_code=404, detail="Case not found")
+
+
 def get_managed_container(case_id: str, container_id: str) -> docker.models.containers.Container:
     client = docker.from_env()
     container = client.containers.get(container_id)
@@ -2541,12 +2590,26 @@ def run_compose_down(
         raise HTTPException(status_code=500, detail=f"compose not available: {exc}") from exc
 
 
-def build_jsonl(entries: List[Dict[str, Any]]) -> str:
-    return "\n".join(json.dumps(entry, ensure_ascii=False) for entry in entries) + ("\n" if entries else "")
+def iter_jsonl_chunks(entries: List[Dict[str, Any]], chunk_lines: int = LOG_JSONL_CHUNK_LINES) -> Iterator[str]:
+    for start in range(0, len(entries), chunk_lines):
+        yield "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries[start : start + chunk_lines])
+
+
+def stream_logs_jsonl(case_id: str, offset: int, limit: int) -> Iterator[bytes]:
+    cached = get_cached_logs_jsonl(case_id, offset, limit)
+    if cached is not None:
+        yield cached.encode("utf-8")
+        return
+    entries = get_logs_slice(case_id, offset=offset, limit=limit)
+    chunks: List[str] = []
+    for chunk in iter_jsonl_chunks(entries):
+        chunks.append(chunk)
+        yield chunk.encode("utf-8")
+    cache_logs_jsonl(case_id, offset, limit, "".join(chunks))
 
 
-def resolve_host_port(container: docker.models.containers.Container, container_port: Optional[int]) -> Optional[int]:
-    ports = container.attrs.get("NetworkSettings", {}).get("Ports", {}) or {}
+def resolve_host_port(attrs: Dict[str, Any], container_port: Optional[int]) -> Optional[int]:
+    ports = attrs.get("NetworkSettings", {}).get("Ports", {}) or {}
     if container_port:
         binding = ports.get(f"{container_port}/tcp")
         if binding:
@@ -5150,13 +5213,11 @@ async def create_case(payload: CaseCreateRequest, request: Request | None = None
                 raise HTTPException(status_code=402, detail=f"积分扣减失败：{exc}") from exc
             deploy_points_cost = abs(int(point_flow.points or 0))
     now = time.time()
-    env_keys = sorted(list((payload.env or {}).keys()))
+    env_key_set = set(payload.env or {})
     if template_payload:
-        for key in template_payload.get("suggested_env_keys") or []:
-            if key not in env_keys:
-                env_keys.append(key)
-        env_keys = sorted(env_keys)
-    build_arg_keys = sorted(list((build_args or {}).keys()))
+        env_key_set.update(template_payload.get("suggested_env_keys") or [])
+    env_keys = sorted(env_key_set)
+    build_arg_keys = sorted(build_args or {})
     data: Dict[str, Any] = {
         "case_id": case_id,
         "tenant_id": target_tenant_id,
@@ -5248,17 +5309,32 @@ async def create_case_api(payload: CaseCreateRequest, request: Request) -> CaseR
 @app.get("/cases/{case_id}", response_model=CaseResponse)
 async def get_case_status(case_id: str, request: Request) -> CaseResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_for_identity(case_id, identity)
     data.pop("case_id", None)
     return build_case_response(case_id, data)
 
 
+def _url_port(url: str) -> int | None:
+    try:
+        return urlsplit(url).port
+    except ValueError:
+        return None
+
+
+_ERPNEXT_CASE_FIELDS = (
+    "status",
+    "access_url",
+    "host_port",
+    "runtime.access_url",
+    "runtime.host_port",
+    "runtime.ports",
+)
+
+
 @app.get("/cases/{case_id}/open/erpnext")
 async def open_case_erpnext(case_id: str, request: Request) -> RedirectResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_fields_for_identity(case_id, identity, _ERPNEXT_CASE_FIELDS)
     status = (data.get("status") or "").upper()
     if status != "RUNNING":
         raise HTTPException(status_code=409, detail="Case not running")
@@ -5271,7 +5347,7 @@ async def open_case_erpnext(case_id: str, request: Request) -> RedirectResponse:
     ports = runtime.get("ports") or []
 
     target_url = None
-    if access_url and ":8080" in str(access_url):
+    if access_url and _url_port(str(access_url)) == 8080:
         target_url = access_url
     elif host_port == 8080 or (isinstance(ports, list) and 8080 in ports):
         target_url = access_url or f"http://{PUBLIC_HOST}:8080"
@@ -5281,137 +5357,138 @@ async def open_case_erpnext(case_id: str, request: Request) -> RedirectResponse:
     return RedirectResponse(url=target_url, status_code=302)
 
 
-def handle_case_action(
+def _action_stop(
     case_id: str,
-    action: str,
-    identity: AuthIdentity,
-    env: Optional[Dict[str, str]] = None,
-    build_args: Optional[Dict[str, str]] = None,
+    data: Dict[str, Any],
+    env: Optional[Dict[str, str]],
+    build_args: Optional[Dict[str, str]],
 ) -> CaseActionResponse:
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
-    action_key = action.lower()
     runtime = data.get("runtime") or {}
     container_id = data.get("container_id") or runtime.get("container_id")
     host_port = data.get("host_port") or runtime.get("host_port")
     compose_project = data.get("compose_project_name")
-    compose_file = data.get("compose_file")
-    repo_dir = data.get("repo_dir")
-
-    if action_key == "stop":
-        if compose_project:
-            run_compose_down(case_id, repo_dir, compose_file, compose_project)
-            update_case(
-                case_id,
-                {
-                    "status": "STOPPED",
-                    "stage": "run",
-                    "error_code": "STOPPED_BY_USER",
-                    "error_message": "Stopped by user",
-                    "runtime": {
-                        **runtime,
-                        "exited_at": time.time(),
-                        "exit_code": 0,
-                    },
-                },
-            )
-            append_system_log(case_id, "Compose stack stopped by user")
-            return CaseActionResponse(case_id=case_id, action=action_key, status="STOPPED", message="Stopped")
-        if not container_id:
-            raise HTTPException(status_code=400, detail="No running container for case")
-        container = get_managed_container(case_id, container_id)
-        try:
-            container.stop(timeout=10)
-        except Exception:
-            container.kill()
-        container.reload()
-        exit_code = container.attrs.get("State", {}).get("ExitCode")
-        update_case(
+    if compose_project:
+        run_compose_down(case_id, data.get("repo_dir"), data.get("compose_file"), compose_project)
+        update_case_runtime(
             case_id,
+            {"exited_at": time.time(), "exit_code": 0},
             {
                 "status": "STOPPED",
                 "stage": "run",
                 "error_code": "STOPPED_BY_USER",
                 "error_message": "Stopped by user",
-                "runtime": {
-                    **runtime,
-                    "exited_at": time.time(),
-                    "exit_code": exit_code,
-                },
             },
         )
-        append_system_log(case_id, "Container stopped by user")
-        if PORT_MODE != "dynamic":
-            release_port(host_port)
-        return CaseActionResponse(case_id=case_id, action=action_key, status="STOPPED", message="Stopped")
-
-    if action_key == "restart":
-        if not container_id:
-            raise HTTPException(status_code=400, detail="No existing container to restart")
-        container = get_managed_container(case_id, container_id)
-        if PORT_MODE != "dynamic" and host_port:
-            try:
-                reserve_specific_port(case_id, int(host_port))
-            except BuildError as exc:
-                raise HTTPException(status_code=409, detail=f"{exc.code}: {exc}") from exc
-        container.start()
-        wait_for_container_running(docker.from_env(), container_id, STARTUP_TIMEOUT_SECONDS)
-        container.reload()
-        container_port = data.get("container_port")
-        host_port = host_port or resolve_host_port(container, container_port)
-        access_url = data.get("access_url") or runtime.get("access_url")
-        if host_port and not access_url:
-            access_url = f"http://{PUBLIC_HOST}:{host_port}"
-        update_case(
-            case_id,
-            {
-                "status": "RUNNING",
-                "stage": "run",
-                "error_code": None,
-                "error_message": None,
-                "container_id": container_id,
-                "host_port": host_port,
-                "access_url": access_url,
-                "runtime": {
-                    **runtime,
-                    "container_id": container_id,
-                    "host_port": host_port,
-                    "access_url": access_url,
-                    "started_at": time.time(),
-                    "exited_at": None,
-                    "exit_code": None,
-                },
-            },
-        )
-        append_system_log(case_id, "Container restarted")
-        return CaseActionResponse(case_id=case_id, action=action_key, status="RUNNING", message="Restarted")
-
-    if action_key == "retry":
-        repo_url = data.get("repo_url")
-        if not repo_url:
-            raise HTTPException(status_code=400, detail="Missing repo_url for retry")
-        ref = data.get("ref") or data.get("branch")
-        container_port = data.get("container_port")
-        retry_env = env or {}
-        retry_build_args = build_args or {}
-        env_keys = sorted(retry_env.keys()) if retry_env else sorted(data.get("env_keys") or [])
-        build_arg_keys = (
-            sorted(retry_build_args.keys()) if retry_build_args else sorted(data.get("build_arg_keys") or [])
-        )
-        attempt = int(data.get("attempt") or 1) + 1
-        retry_of = data.get("retry_of") or case_id
-        dockerfile_path = data.get("dockerfile_path")
-        compose_file = data.get("compose_file")
-        context_path = data.get("context_path")
-        docker_build_network = data.get("docker_build_network")
-        docker_no_cache = data.get("docker_no_cache")
-        docker_buildkit = data.get("docker_buildkit")
-        git_submodules = data.get("git_submodules")
-        git_lfs = data.get("git_lfs")
-        mode = data.get("run_mode") or data.get("mode")
-        auto_mode = bool(data.get("auto_mode"))
-        auto_manual = bool(data.get("auto_manual")) if data.get("auto_manual") is not None else True
-        update_case(
+        append_system_log(case_id, "Compose stack stopped by user")
+        return CaseActionResponse(case_id=case_id, action="stop", status="STOPPED", message="Stopped")
+    if not container_id:
+        raise HTTPException(status_code=400, detail="No running container for case")
+    container = get_managed_container(case_id, container_id)
+    try:
+        container.stop(timeout=10)
+    except Exception:
+        container.kill()
+    container.reload()
+    exit_code = container.attrs.get("State", {}).get("ExitCode")
+    update_case_runtime(
+        case_id,
+        {"exited_at": time.time(), "exit_code": exit_code},
+        {
+            "status": "STOPPED",
+            "stage": "run",
+            "error_code": "STOPPED_BY_USER",
+            "error_message": "Stopped by user",
+        },
+    )
+    append_system_log(case_id, "Container stopped by user")
+    if PORT_MODE != "dynamic":
+        schedule_port_release(host_port, case_id)
+    return CaseActionResponse(case_id=case_id, action="stop", status="STOPPED", message="Stopped")
+
+
+def _action_restart(
+    case_id: str,
+    data: Dict[str, Any],
+    env: Optional[Dict[str, str]],
+    build_args: Optional[Dict[str, str]],
+) -> CaseActionResponse:
+    runtime = data.get("runtime") or {}
+    container_id = data.get("container_id") or runtime.get("container_id")
+    host_port = data.get("host_port") or runtime.get("host_port")
+    if not container_id:
+        raise HTTPException(status_code=400, detail="No existing container to restart")
+    container = get_managed_container(case_id, container_id)
+    if PORT_MODE != "dynamic" and host_port:
+        try:
+            reserve_specific_port(case_id, int(host_port))
+        except BuildError as exc:
+            raise HTTPException(status_code=409, detail=f"{exc.code}: {exc}") from exc
+    container.start()
+    attrs = wait_for_container_running(docker.from_env(), container_id, STARTUP_TIMEOUT_SECONDS)
+    container_port = data.get("container_port")
+    host_port = host_port or resolve_host_port(attrs, container_port)
+    access_url = data.get("access_url") or runtime.get("access_url")
+    if host_port and not access_url:
+        access_url = f"http://{PUBLIC_HOST}:{host_port}"
+    update_case_runtime(
+        case_id,
+        {
+            "container_id": container_id,
+            "host_port": host_port,
+            "access_url": access_url,
+            "started_at": time.time(),
+            "exited_at": None,
+            "exit_code": None,
+        },
+        {
+            "status": "RUNNING",
+            "stage": "run",
+            "error_code": None,
+            "error_message": None,
+            "container_id": container_id,
+            "host_port": host_port,
+            "access_url": access_url,
+        },
+    )
+    append_system_log(case_id, "Container restarted")
+    return CaseActionResponse(case_id=case_id, action="restart", status="RUNNING", message="Restarted")
+
+
+async def _action_retry(
+    case_id: str,
+    data: Dict[str, Any],
+    env: Optional[Dict[str, str]],
+    build_args: Optional[Dict[str, str]],
+) -> CaseActionResponse:
+    repo_url = data.get("repo_url")
+    if not repo_url:
+        raise HTTPException(status_code=400, detail="Missing repo_url for retry")
+    ref = data.get("ref") or data.get("branch")
+    container_port = data.get("container_port")
+    retry_env = env or {}
+    retry_build_args = build_args or {}
+    # Stored key lists are already sorted when the case is created or retried.
+    env_keys = sorted(retry_env) if retry_env else list(data.get("env_keys") or [])
+    build_arg_keys = sorted(retry_build_args) if retry_build_args else list(data.get("build_arg_keys") or [])
+    attempt = int(data.get("attempt") or 1) + 1
+    retry_of = data.get("retry_of") or case_id
+    dockerfile_path = data.get("dockerfile_path")
+    compose_file = data.get("compose_file")
+    context_path = data.get("context_path")
+    docker_build_network = data.get("docker_build_network")
+    docker_no_cache = data.get("docker_no_cache")
+    docker_buildkit = data.get("docker_buildkit")
+    git_submodules = data.get("git_submodules")
+    git_lfs = data.get("git_lfs")
+    mode = data.get("run_mode") or data.get("mode")
+    auto_mode = bool(data.get("auto_mode"))
+    stored_auto_manual = data.get("auto_manual")
+    auto_manual = True if stored_auto_manual is None else bool(stored_auto_manual)
+    # The status reset and the log line are independent writes; the task is only
+    # published once the reset has landed so the worker cannot be overwritten by it.
+    await asyncio.gather(
+        asyncio.to_thread(
+            update_case,
             case_id,
             {
                 "status": "PENDING",
@@ -5423,54 +5500,85 @@ def handle_case_action(
                 "attempt": attempt,
                 "retry_of": retry_of,
             },
-        )
-        append_system_log(case_id, "Retry requested")
-        build_and_run.delay(
-            case_id,
-            repo_url,
-            ref,
-            container_port,
-            retry_env,
-            False,
-            dockerfile_path,
-            compose_file,
-            context_path,
-            docker_build_network,
-            docker_no_cache,
-            retry_build_args,
-            git_submodules,
-            git_lfs,
-            mode,
-            auto_mode,
-            auto_manual,
-            docker_buildkit,
-        )
-        return CaseActionResponse(case_id=case_id, action=action_key, status="PENDING", message="Retry started")
+        ),
+        asyncio.to_thread(append_system_log, case_id, "Retry requested"),
+    )
+    await asyncio.to_thread(
+        build_and_run.delay,
+        case_id,
+        repo_url,
+        ref,
+        container_port,
+        retry_env,
+        False,
+        dockerfile_path,
+        compose_file,
+        context_path,
+        docker_build_network,
+        docker_no_cache,
+        retry_build_args,
+        git_submodules,
+        git_lfs,
+        mode,
+        auto_mode,
+        auto_manual,
+        docker_buildkit,
+    )
+    return CaseActionResponse(case_id=case_id, action="retry", status="PENDING", message="Retry started")
 
-    if action_key == "archive":
-        update_case(case_id, {"archived": True, "archived_at": time.time()})
-        append_system_log(case_id, "Case archived")
-        return CaseActionResponse(case_id=case_id, action=action_key, status="ARCHIVED", message="Archived")
 
-    raise HTTPException(status_code=400, detail="Unsupported action")
+def _action_archive(
+    case_id: str,
+    data: Dict[str, Any],
+    env: Optional[Dict[str, str]],
+    build_args: Optional[Dict[str, str]],
+) -> CaseActionResponse:
+    update_case(case_id, {"archived": True, "archived_at": time.time()})
+    append_system_log(case_id, "Case archived")
+    return CaseActionResponse(case_id=case_id, action="archive", status="ARCHIVED", message="Archived")
+
+
+_CASE_ACTIONS = {
+    "stop": _action_stop,
+    "restart": _action_restart,
+    "retry": _action_retry,
+    "archive": _action_archive,
+}
+
+
+async def handle_case_action(
+    case_id: str,
+    action: str,
+    identity: AuthIdentity,
+    env: Optional[Dict[str, str]] = None,
+    build_args: Optional[Dict[str, str]] = None,
+) -> CaseActionResponse:
+    data = _get_case_for_identity(case_id, identity)
+    handler = _CASE_ACTIONS.get(action.lower())
+    if handler is None:
+        raise HTTPException(status_code=400, detail="Unsupported action")
+    if asyncio.iscoroutinefunction(handler):
+        return await handler(case_id, data, env, build_args)
+    # Stop/restart block on Docker; keep them off the event loop.
+    return await asyncio.to_thread(handler, case_id, data, env, build_args)
 
 
 @app.post("/cases/{case_id}/actions", response_model=CaseActionResponse)
 async def case_actions(case_id: str, payload: CaseActionRequest, request: Request) -> CaseActionResponse:
     identity = _request_identity_for_cases(request)
-    return handle_case_action(case_id, payload.action, identity, payload.env)
+    return await handle_case_action(case_id, payload.action, identity, payload.env)
 
 
 @app.post("/cases/{case_id}/stop", response_model=CaseActionResponse)
 async def case_stop(case_id: str, request: Request) -> CaseActionResponse:
     identity = _request_identity_for_cases(request)
-    return handle_case_action(case_id, "stop", identity)
+    return await handle_case_action(case_id, "stop", identity)
 
 
 @app.post("/cases/{case_id}/restart", response_model=CaseActionResponse)
 async def case_restart(case_id: str, request: Request) -> CaseActionResponse:
     identity = _request_identity_for_cases(request)
-    return handle_case_action(case_id, "restart", identity)
+    return await handle_case_action(case_id, "restart", identity)
 
 
 @app.post("/cases/{case_id}/retry", response_model=CaseActionResponse)
@@ -5482,13 +5590,13 @@ async def case_retry(
     identity = _request_identity_for_cases(request)
     env = payload.env
     build_args = payload.docker_build_args
-    return handle_case_action(case_id, "retry", identity, env, build_args)
+    return await handle_case_action(case_id, "retry", identity, env, build_args)
 
 
 @app.post("/cases/{case_id}/archive", response_model=CaseActionResponse)
 async def case_archive(case_id: str, request: Request) -> CaseActionResponse:
     identity = _request_identity_for_cases(request)
-    return handle_case_action(case_id, "archive", identity)
+    return await handle_case_action(case_id, "archive", identity)
 
 
 @app.post("/cases/{case_id}/analyze")
@@ -5498,8 +5606,7 @@ async def trigger_analyze(
     payload: AnalyzeRequest = Body(default_factory=AnalyzeRequest),
 ) -> Dict[str, Any]:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_for_identity(case_id, identity)
     repo_url = data.get("repo_url")
     commit_sha = data.get("commit_sha") or "unknown"
     if repo_url:
@@ -5533,8 +5640,7 @@ async def trigger_analyze(
 @app.get("/cases/{case_id}/report", response_model=ReportResponse)
 async def get_report(case_id: str, request: Request) -> ReportResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_for_identity(case_id, identity)
     repo_url = data.get("repo_url")
     commit_sha = data.get("commit_sha")
     if not repo_url or not commit_sha:
@@ -5545,7 +5651,7 @@ async def get_report(case_id: str, request: Request) -> ReportResponse:
                 "message": "Report not ready",
             },
         )
-    store = ReportStore()
+    store = _REPORT_STORE
     report = store.load_report(repo_url, commit_sha)
     if not report:
         raise HTTPException(
@@ -5569,15 +5675,14 @@ async def get_report(case_id: str, request: Request) -> ReportResponse:
     )
 
 
-@app.post("/cases/{case_id}/visualize")
-async def trigger_visualize(
+def _enqueue_visualize(
     case_id: str,
-    request: Request,
-    payload: VisualizeRequest = Body(default_factory=VisualizeRequest),
+    request: Request | None,
+    force: bool,
+    kinds: Optional[List[str]],
 ) -> Dict[str, Any]:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_for_identity(case_id, identity)
     repo_url = data.get("repo_url")
     commit_sha = data.get("commit_sha") or "unknown"
     if repo_url:
@@ -5600,11 +5705,7 @@ async def trigger_visualize(
             "visual_error_message": None,
         },
     )
-    requested_kinds = payload.kinds
-    if not VISUAL_VIDEO_ENABLED and requested_kinds:
-        filtered = [kind for kind in requested_kinds if str(kind).strip().lower() != "video"]
-        requested_kinds = filtered or None
-    visualize_case.delay(case_id, payload.force, requested_kinds)
+    visualize_case.delay(case_id, force, kinds)
     return {
         "case_id": case_id,
         "visual_status": "PENDING",
@@ -5612,50 +5713,32 @@ async def trigger_visualize(
     }
 
 
+@app.post("/cases/{case_id}/visualize")
+async def trigger_visualize(
+    case_id: str,
+    request: Request,
+    payload: VisualizeRequest = Body(default_factory=VisualizeRequest),
+) -> Dict[str, Any]:
+    requested_kinds = payload.kinds
+    if not VISUAL_VIDEO_ENABLED and requested_kinds:
+        filtered = [kind for kind in requested_kinds if str(kind).strip().lower() != "video"]
+        requested_kinds = filtered or None
+    return _enqueue_visualize(case_id, request, payload.force, requested_kinds)
+
+
 @app.post("/cases/{case_id}/understand")
 async def trigger_understand(
     case_id: str,
     request: Request,
     payload: UnderstandRequest = Body(default_factory=UnderstandRequest),
 ) -> Dict[str, Any]:
-    identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
-    repo_url = data.get("repo_url")
-    commit_sha = data.get("commit_sha") or "unknown"
-    if repo_url:
-        cache_key = visual_cache_key(repo_url, commit_sha)
-        locked = acquire_visualize_lock(cache_key, VISUAL_LOCK_TTL_SECONDS)
-        if not locked:
-            return {
-                "case_id": case_id,
-                "visual_status": "RUNNING",
-                "visual_ready": bool(data.get("visual_ready", False)),
-                "message": "already running",
-            }
-    update_case(
-        case_id,
-        {
-            "visual_status": "PENDING",
-            "visual_ready": False,
-            "visual_cached": False,
-            "visual_error_code": None,
-            "visual_error_message": None,
-        },
-    )
-    visualize_case.delay(case_id, payload.force, None)
-    return {
-        "case_id": case_id,
-        "visual_status": "PENDING",
-        "visual_ready": False,
-    }
+    return _enqueue_visualize(case_id, request, payload.force, None)
 
 
 @app.get("/cases/{case_id}/status", response_model=UnderstandStatusResponse)
 async def get_understand_status(case_id: str, request: Request) -> UnderstandStatusResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_for_identity(case_id, identity)
     state, message = _infer_understand_state(case_id, data)
     return UnderstandStatusResponse(
         case_id=case_id,
@@ -5673,8 +5756,7 @@ async def get_understand_status(case_id: str, request: Request) -> UnderstandSta
 @app.get("/cases/{case_id}/result", response_model=UnderstandResultResponse)
 async def get_understand_result(case_id: str, request: Request) -> UnderstandResultResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_for_identity(case_id, identity)
     repo_url = data.get("repo_url")
     commit_sha = data.get("commit_sha")
     state, message = _infer_understand_state(case_id, data)
@@ -5684,7 +5766,7 @@ async def get_understand_result(case_id: str, request: Request) -> UnderstandRes
     created_at = 0.0
     cached = None
     if repo_url and commit_sha:
-        store = VisualStore()
+        store = _VISUAL_STORE
         visuals = store.load_visuals(repo_url, commit_sha)
         if visuals:
             response = build_visuals_response(case_id, commit_sha, visuals)
@@ -5718,44 +5800,13 @@ async def trigger_visualize_video(
             status_code=410,
             detail="video rendering is disabled; use /cases/{case_id}/visualize for image/text walkthrough",
         )
-    identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
-    repo_url = data.get("repo_url")
-    commit_sha = data.get("commit_sha") or "unknown"
-    if repo_url:
-        cache_key = visual_cache_key(repo_url, commit_sha)
-        locked = acquire_visualize_lock(cache_key, VISUAL_LOCK_TTL_SECONDS)
-        if not locked:
-            return {
-                "case_id": case_id,
-                "visual_status": "RUNNING",
-                "visual_ready": bool(data.get("visual_ready", False)),
-                "message": "already running",
-            }
-    update_case(
-        case_id,
-        {
-            "visual_status": "PENDING",
-            "visual_ready": False,
-            "visual_cached": False,
-            "visual_error_code": None,
-            "visual_error_message": None,
-        },
-    )
-    visualize_case.delay(case_id, payload.force, ["video"])
-    return {
-        "case_id": case_id,
-        "visual_status": "PENDING",
-        "visual_ready": False,
-    }
+    return _enqueue_visualize(case_id, request, payload.force, ["video"])
 
 
 @app.get("/cases/{case_id}/visuals", response_model=VisualsResponse)
 async def get_visuals(case_id: str, request: Request) -> VisualsResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_for_identity(case_id, identity)
     repo_url = data.get("repo_url")
     commit_sha = data.get("commit_sha")
     if not repo_url or not commit_sha:
@@ -5766,7 +5817,7 @@ async def get_visuals(case_id: str, request: Request) -> VisualsResponse:
                 "message": "Visual assets not ready",
             },
         )
-    store = VisualStore()
+    store = _VISUAL_STORE
     visuals = store.load_visuals(repo_url, commit_sha)
     if not visuals:
         raise HTTPException(
@@ -5782,17 +5833,16 @@ async def get_visuals(case_id: str, request: Request) -> VisualsResponse:
 @app.get("/cases/{case_id}/visuals/{filename}")
 async def get_visual_file(case_id: str, filename: str, request: Request) -> FileResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
-    if not filename or "/" in filename or "\\" in filename or filename.startswith("."):
+    data = _get_case_for_identity(case_id, identity)
+    if not VISUAL_FILE_NAME_PATTERN.fullmatch(filename or ""):
         raise HTTPException(status_code=400, detail="Invalid file name")
     repo_url = data.get("repo_url")
     commit_sha = data.get("commit_sha")
     if not repo_url or not commit_sha:
         raise HTTPException(status_code=404, detail="Visual assets not ready")
-    target_dir = visuals_dir(repo_url, commit_sha)
-    target_path = target_dir / filename
-    if not target_path.exists() or not target_path.is_file():
+    target_dir = visuals_dir(repo_url, commit_sha).resolve()
+    target_path = (target_dir / filename).resolve()
+    if not target_path.is_relative_to(target_dir) or not target_path.is_file():
         raise HTTPException(status_code=404, detail="Visual file not found")
     return FileResponse(path=str(target_path))
 
@@ -5800,8 +5850,7 @@ async def get_visual_file(case_id: str, filename: str, request: Request) -> File
 @app.post("/cases/{case_id}/manual", response_model=ManualStatusResponse)
 async def trigger_manual(case_id: str, request: Request) -> ManualStatusResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    _get_case_fields_for_identity(case_id, identity)
     update_case(
         case_id,
         {
@@ -5818,8 +5867,7 @@ async def trigger_manual(case_id: str, request: Request) -> ManualStatusResponse
 @app.get("/cases/{case_id}/manual/status", response_model=ManualStatusResponse)
 async def manual_status(case_id: str, request: Request) -> ManualStatusResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    data = _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    data = _get_case_for_identity(case_id, identity)
     status_data = get_manual_status(case_id) or {}
     status = status_data.get("status") or data.get("manual_status") or "PENDING"
     status = str(status).upper()
@@ -5837,14 +5885,19 @@ async def manual_status(case_id: str, request: Request) -> ManualStatusResponse:
 @app.get("/cases/{case_id}/manual", response_model=ManualResponse)
 async def get_manual_content(case_id: str, request: Request) -> ManualResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
+    _get_case_fields_for_identity(case_id, identity)
     markdown, meta = get_manual(case_id)
     if not markdown or not meta:
         raise HTTPException(status_code=404, detail="Manual not found")
     return ManualResponse(case_id=case_id, manual_markdown=markdown, meta=ManualMeta(**meta))
 
 
+async def _send_log_backlog(websocket: WebSocket, case_id: str) -> None:
+    entries = get_logs(case_id)
+    if entries:
+        await websocket.send_text(orjson.dumps({"type": "backlog", "entries": entries}).decode("utf-8"))
+
+
 @app.websocket("/cases/{case_id}/logs")
 @app.websocket("/ws/logs/{case_id}")
 async def case_logs(websocket: WebSocket, case_id: str) -> None:
@@ -5857,35 +5910,29 @@ async def case_logs(websocket: WebSocket, case_id: str) -> None:
     if not data:
         await websocket.close(code=4404)
         return
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    if not _is_case_visible_to_identity(identity, data, actor_tenant_id=actor_tenant_id):
+    if not _is_case_visible_to_identity(identity, data):
         await websocket.close(code=4403)
         return
     await websocket.accept()
     if REDIS_DISABLED:
-        for entry in get_logs(case_id):
-            await websocket.send_json(entry)
+        await _send_log_backlog(websocket, case_id)
         await websocket.close()
         return
-    redis_client = get_async_redis_client()
-    pubsub = redis_client.pubsub()
+    pubsub = _shared_async_redis(websocket.app).pubsub()
     channel = log_channel(case_id)
     try:
-        for entry in get_logs(case_id):
-            await websocket.send_json(entry)
+        await _send_log_backlog(websocket, case_id)
         await pubsub.subscribe(channel)
-        while True:
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if not message or message.get("type") != "message":
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
                 continue
             payload = decode_log_entry(message["data"])
-            await websocket.send_json(payload)
+            await websocket.send_text(orjson.dumps(payload).decode("utf-8"))
     except WebSocketDisconnect:
         pass
     finally:
         await pubsub.unsubscribe(channel)
         await pubsub.close()
-        await redis_client.close()
 
 
 @app.get("/cases/{case_id}/logs")
@@ -5897,12 +5944,10 @@ async def http_logs(
     format: Optional[str] = Query(None, description="json | jsonl"),
 ) -> Any:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
-    entries = get_logs_slice(case_id, offset=offset, limit=limit)
+    _get_case_fields_for_identity(case_id, identity)
     if format == "jsonl":
-        return PlainTextResponse(build_jsonl(entries), media_type="application/jsonl")
-    return entries
+        return StreamingResponse(stream_logs_jsonl(case_id, offset, limit), media_type="application/jsonl")
+    return get_logs_slice(case_id, offset=offset, limit=limit)
 
 
 @app.get("/cases/{case_id}/logs/download")
@@ -5913,9 +5958,10 @@ async def download_logs(
     offset: int = Query(0, ge=0, description="Offset from tail"),
 ) -> StreamingResponse:
     identity = _request_identity_for_cases(request)
-    actor_tenant_id = _resolve_identity_tenant_for_cases(identity)
-    _get_case_for_identity(case_id, identity, actor_tenant_id=actor_tenant_id)
-    entries = get_logs_slice(case_id, offset=offset, limit=limit)
-    payload = build_jsonl(entries).encode("utf-8")
+    _get_case_fields_for_identity(case_id, identity)
     headers = {"Content-Disposition": f"attachment; filename={case_id}.jsonl"}
-    return StreamingResponse(iter([payload]), media_type="application/jsonl", headers=headers)
+    return StreamingResponse(
+        stream_logs_jsonl(case_id, offset, limit),
+        media_type="application/jsonl",
+        headers=headers,
+    )
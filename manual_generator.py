@@ -1,39 +1,59 @@
+import copy
 import hashlib
 import json
 import os
 import re
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from config import MANUAL_GENERATOR_VERSION, MANUAL_MAX_README_CHARS, MANUAL_TREE_DEPTH
+import orjson
+
+from config import MANUAL_CACHE_SIZE, MANUAL_GENERATOR_VERSION, MANUAL_MAX_README_CHARS, MANUAL_TREE_DEPTH
 
 README_CANDIDATES = ["README.md", "README.MD", "README"]
-IGNORED_DIRS = {
-    ".git",
-    ".hg",
-    ".svn",
-    ".idea",
-    ".vscode",
-    "__pycache__",
-    "node_modules",
-    "venv",
-    ".venv",
-    "dist",
-    "build",
-    ".tox",
-}
+IGNORED_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        ".idea",
+        ".vscode",
+        "__pycache__",
+        "node_modules",
+        "venv",
+        ".venv",
+        "dist",
+        "build",
+        ".tox",
+    }
+)
 
-CONFIG_FILE_PATTERNS = {
-    ".env",
-    ".env.example",
-    "docker-compose.yml",
-    "docker-compose.yaml",
-    "pyproject.toml",
-    "package.json",
-    "requirements.txt",
-}
+CONFIG_FILE_PATTERNS = frozenset(
+    {
+        ".env",
+        ".env.example",
+        "docker-compose.yml",
+        "docker-compose.yaml",
+        "pyproject.toml",
+        "package.json",
+        "requirements.txt",
+    }
+)
 CONFIG_SUFFIXES = (".yaml", ".yml", ".toml", ".json")
+CONFIG_EXTENSIONS = frozenset(suffix.lstrip(".") for suffix in CONFIG_SUFFIXES)
+
+MANUAL_FOOTER_TEMPLATE = """## 8. 版本与生成信息
+- generated_at: {generated_at}
+- generator_version: {generator_version}
+- repo_fingerprint: {repo_fingerprint}
+- similarity_score: {similarity_score}
+- warnings: {warnings}
+- signals: {signals}
+- time_cost_ms: {time_cost_ms}
+"""
 
 TEMPLATE_BASELINE = """
 说明书
@@ -59,6 +79,21 @@ BADGE_PATTERNS = (
 ENV_LINE_PATTERN = re.compile(r"^\s*([A-Z][A-Z0-9_]{1,})\s*[:=]")
 ENV_INLINE_PATTERN = re.compile(r"\b([A-Z][A-Z0-9_]{2,})\b\s*=")
 PORT_PATTERN = re.compile(r"(?:port|端口)\D{0,10}(\d{2,5})", re.IGNORECASE)
+BULLET_PREFIXES = frozenset({"- ", "* "})
+NUMBERED_BULLET_PATTERN = re.compile(r"\d+\.\s+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+REQUIREMENT_SPLIT_PATTERN = re.compile(r"[=<>]")
+PYPROJECT_REQUIREMENT_PATTERN = re.compile(rb"\s*([A-Za-z0-9][A-Za-z0-9_.-]*)")
+PYPROJECT_KEY_PATTERN = re.compile(rb"^([A-Za-z0-9][A-Za-z0-9_.-]*)\s*=")
+PYPROJECT_STRING_PATTERN = re.compile(rb"\"[^\"]*\"|'[^']*'")
+EXPOSE_PATTERN = re.compile(r"EXPOSE\s+(\d+)", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"\w+")
+TEMPLATE_BASELINE_TOKENS = frozenset(WORD_PATTERN.findall(TEMPLATE_BASELINE.lower()))
+
+FINGERPRINT_DEPTH = 3
+DATA_STORE_DEPENDENCIES = frozenset({"redis", "mysql", "postgres", "postgresql"})
+FRAMEWORK_SCAN_BYTES = 64 * 1024
+MANIFEST_MAX_BYTES = 64 * 1024
 
 KEY_PATH_HINTS = {
     "app.json": "小程序全局配置",
@@ -82,6 +117,15 @@ KEY_PATH_HINTS = {
     "pyproject.toml": "Python 项目配置",
 }
 
+_MANUAL_CACHE: "OrderedDict[Tuple[Any, ...], Tuple[str, Dict[str, Any], str]]" = OrderedDict()
+
+
+@dataclass
+class RepoScan:
+    entries: List[Tuple[str, bool, int]]
+    top_level: Dict[str, bool]
+    failed: bool
+
 
 def generate_manual(
     repo_path: Path,
@@ -90,30 +134,87 @@ def generate_manual(
     tree_depth: Optional[int] = None,
     readme_max_chars: Optional[int] = None,
     previous_manual: Optional[str] = None,
+    commit_sha: Optional[str] = None,
 ) -> Tuple[str, Dict[str, Any]]:
     start = time.time()
     repo_name = repo_name or repo_path.name
     tree_depth = tree_depth if tree_depth is not None else MANUAL_TREE_DEPTH
     readme_max_chars = readme_max_chars if readme_max_chars is not None else MANUAL_MAX_README_CHARS
 
+    # A checked-out commit pins the repository contents, so its analysis can be reused.
+    cache_key = (
+        (commit_sha, repo_path.name, repo_name, tree_depth, readme_max_chars, frozenset(env_keys))
+        if commit_sha and MANUAL_CACHE_SIZE > 0
+        else None
+    )
+    cached = _MANUAL_CACHE.get(cache_key) if cache_key else None
+    if cached is not None:
+        _MANUAL_CACHE.move_to_end(cache_key)
+        manual_markdown, signals, repo_fingerprint = cached
+        signals = copy.deepcopy(signals)
+    else:
+        manual_markdown, signals, repo_fingerprint = _analyze_repo(
+            repo_path, env_keys, repo_name, tree_depth, readme_max_chars
+        )
+        if cache_key:
+            _MANUAL_CACHE[cache_key] = (manual_markdown, copy.deepcopy(signals), repo_fingerprint)
+            while len(_MANUAL_CACHE) > MANUAL_CACHE_SIZE:
+                _MANUAL_CACHE.popitem(last=False)
+
+    # Similarity is scored before the footer values exist, against its unfilled template.
+    similarity_score = _compute_similarity(manual_markdown + MANUAL_FOOTER_TEMPLATE, previous_manual)
+    warnings: List[str] = []
+    if similarity_score is not None and similarity_score > 0.75:
+        warnings.append("MANUAL_TOO_GENERIC")
+
+    time_cost_ms = int((time.time() - start) * 1000)
+    meta = {
+        "generated_at": time.time(),
+        "generator_version": MANUAL_GENERATOR_VERSION,
+        "repo_fingerprint": repo_fingerprint,
+        "similarity_score": similarity_score,
+        "warnings": warnings,
+        "signals": signals,
+        "time_cost_ms": time_cost_ms,
+    }
+
+    manual_markdown += MANUAL_FOOTER_TEMPLATE.format(
+        generated_at=meta["generated_at"],
+        generator_version=meta["generator_version"],
+        repo_fingerprint=repo_fingerprint,
+        similarity_score=similarity_score,
+        warnings=", ".join(warnings) or "None",
+        signals=json.dumps(meta["signals"], ensure_ascii=False),
+        time_cost_ms=meta["time_cost_ms"],
+    )
+    return manual_markdown, meta
+
+
+def _analyze_repo(
+    repo_path: Path,
+    env_keys: List[str],
+    repo_name: str,
+    tree_depth: int,
+    readme_max_chars: int,
+) -> Tuple[str, Dict[str, Any], str]:
     readme_path, readme_text = _read_readme(repo_path, readme_max_chars)
     readme_info = _parse_readme(readme_text)
-    dockerfile_path = repo_path / "Dockerfile"
-    has_dockerfile = dockerfile_path.exists()
-    docker_info = _parse_dockerfile(dockerfile_path) if has_dockerfile else {}
-    tree_output, file_count = _build_tree(repo_path, tree_depth)
-    config_files = _find_config_files(repo_path, tree_depth)
+    scan = _scan_repo(repo_path, max(tree_depth, FINGERPRINT_DEPTH))
+    has_dockerfile = "Dockerfile" in scan.top_level
+    docker_info = _parse_dockerfile(repo_path / "Dockerfile") if has_dockerfile else {}
+    tree_output, file_count = _build_tree(scan, repo_path.name, tree_depth)
+    config_files = _find_config_files(scan, tree_depth)
     package_info = _parse_package_json(repo_path / "package.json")
     python_info = _parse_python_signals(repo_path)
 
-    key_paths = _describe_key_paths(repo_path)
-    repo_kind = _detect_repo_kind(repo_path, package_info, python_info)
+    key_paths = _describe_key_paths(scan)
+    repo_kind = _detect_repo_kind(scan, package_info, python_info)
 
     env_candidates = _collect_env_keys(
         repo_path,
         env_keys,
         docker_info,
-        readme_text,
+        readme_info["env_keys"],
     )
     port_hint = (
         docker_info.get("expose")
@@ -144,51 +245,22 @@ def generate_manual(
         mermaid=mermaid,
         faq_items=faq_items,
     )
-
-    similarity_score = _compute_similarity(manual_markdown, previous_manual)
-    warnings: List[str] = []
-    if similarity_score is not None and similarity_score > 0.75:
-        warnings.append("MANUAL_TOO_GENERIC")
-
-    fingerprint_source = "|".join(sorted(_collect_repo_fingerprint(repo_path)))
-    fingerprint_source += f"|{readme_info.get('title','')}|{readme_info.get('summary','')}"
-    repo_fingerprint = hashlib.sha1(fingerprint_source.encode("utf-8", errors="ignore")).hexdigest()[:10]
-
-    time_cost_ms = int((time.time() - start) * 1000)
-    meta = {
-        "generated_at": time.time(),
-        "generator_version": MANUAL_GENERATOR_VERSION,
-        "repo_fingerprint": repo_fingerprint,
-        "similarity_score": similarity_score,
-        "warnings": warnings,
-        "signals": {
-            "repo_kind": repo_kind,
-            "readme_title": readme_info.get("title"),
-            "readme_summary": readme_info.get("summary"),
-            "has_readme": bool(readme_text),
-            "has_dockerfile": has_dockerfile,
-            "docker_info": docker_info,
-            "config_files": config_files,
-            "package_scripts": package_info.get("scripts") if package_info else [],
-            "python_entrypoints": python_info.get("entrypoints") if python_info else [],
-            "env_candidates": env_candidates,
-            "key_paths": key_paths,
-            "tree_depth": tree_depth,
-            "file_count": file_count,
-        },
-        "time_cost_ms": time_cost_ms,
+    signals = {
+        "repo_kind": repo_kind,
+        "readme_title": readme_info.get("title"),
+        "readme_summary": readme_info.get("summary"),
+        "has_readme": bool(readme_text),
+        "has_dockerfile": has_dockerfile,
+        "docker_info": docker_info,
+        "config_files": config_files,
+        "package_scripts": package_info.get("scripts") if package_info else [],
+        "python_entrypoints": python_info.get("entrypoints") if python_info else [],
+        "env_candidates": env_candidates,
+        "key_paths": key_paths,
+        "tree_depth": tree_depth,
+        "file_count": file_count,
     }
-
-    manual_markdown = (
-        manual_markdown.replace("{generated_at}", str(meta["generated_at"]))
-        .replace("{generator_version}", str(meta["generator_version"]))
-        .replace("{signals}", json.dumps(meta["signals"], ensure_ascii=False))
-        .replace("{time_cost_ms}", str(meta["time_cost_ms"]))
-        .replace("{repo_fingerprint}", repo_fingerprint)
-        .replace("{similarity_score}", str(similarity_score))
-        .replace("{warnings}", ", ".join(warnings) or "None")
-    )
-    return manual_markdown, meta
+    return manual_markdown, signals, _compute_repo_fingerprint(scan, readme_info)
 
 
 def _read_readme(repo_path: Path, max_chars: int) -> Tuple[Optional[str], str]:
@@ -196,53 +268,64 @@ def _read_readme(repo_path: Path, max_chars: int) -> Tuple[Optional[str], str]:
         path = repo_path / name
         if path.exists():
             try:
-                text = path.read_text(encoding="utf-8", errors="replace")
+                # UTF-8 needs at most 4 bytes per character.
+                text = _read_text_prefix(path, max_chars * 4)
             except Exception:
                 text = ""
             return str(path.name), text[:max_chars]
     return None, ""
 
 
+def _read_text_prefix(path: Path, max_bytes: int) -> str:
+    with path.open("rb") as handle:
+        text = handle.read(max_bytes).decode("utf-8", errors="replace")
+    # Match read_text()'s universal-newline handling.
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
 def _parse_readme(readme_text: str) -> Dict[str, Any]:
-    cleaned: List[str] = []
+    title = ""
+    headings: List[str] = []
+    bullets: List[str] = []
+    summary = ""
+    paragraph: List[str] = []
+    # Title/headings/bullets and the summary paragraph are collected in one pass;
+    # the first paragraph that does not open with a heading or bullet wins.
     for raw in readme_text.splitlines():
         line = raw.strip()
         if not line:
-            cleaned.append("")
+            if paragraph:
+                summary = _summary_candidate(paragraph)
+                paragraph = []
             continue
         if _is_badge_line(line):
             continue
-        cleaned.append(line)
+        if not summary:
+            paragraph.append(line)
 
-    title = ""
-    headings: List[str] = []
-    bullets: List[str] = []
-    for line in cleaned:
-        if line.startswith("#") and not title:
-            title = line.lstrip("#").strip()
-            continue
-        if line.startswith("## ") or line.startswith("### "):
-            heading = line.lstrip("#").strip()
-            if heading and heading not in headings:
-                headings.append(heading)
-        if line.startswith(("- ", "* ")):
+        head = line[:4]
+        if head[:1] == "#":
+            if not title:
+                title = line.lstrip("#").strip()
+                continue
+            if head[:3] == "## " or head == "### ":
+                heading = line.lstrip("#").strip()
+                if heading and heading not in headings:
+                    headings.append(heading)
+        elif head[:2] in BULLET_PREFIXES:
             item = line[2:].strip()
             if item and item not in bullets:
                 bullets.append(item)
-        if re.match(r"\d+\.\s+", line):
-            item = re.sub(r"^\d+\.\s+", "", line).strip()
-            if item and item not in bullets:
-                bullets.append(item)
-
-    summary = ""
-    paragraphs = _split_paragraphs(cleaned)
-    for para in paragraphs:
-        if para.startswith("#"):
-            continue
-        if para.startswith(("- ", "* ")):
-            continue
-        summary = para
-        break
+        elif head[:1].isdigit():
+            numbered = NUMBERED_BULLET_PATTERN.match(line)
+            if numbered:
+                item = line[numbered.end() :].strip()
+                if item and item not in bullets:
+                    bullets.append(item)
+    if paragraph:
+        summary = _summary_candidate(paragraph)
     summary = _trim_summary(summary)
 
     env_keys = _extract_env_keys_from_text(readme_text)
@@ -255,25 +338,17 @@ def _parse_readme(readme_text: str) -> Dict[str, Any]:
     }
 
 
-def _split_paragraphs(lines: List[str]) -> List[str]:
-    paragraphs: List[str] = []
-    buffer: List[str] = []
-    for line in lines:
-        if not line:
-            if buffer:
-                paragraphs.append(" ".join(buffer).strip())
-                buffer = []
-            continue
-        buffer.append(line)
-    if buffer:
-        paragraphs.append(" ".join(buffer).strip())
-    return paragraphs
+def _summary_candidate(lines: List[str]) -> str:
+    para = " ".join(lines).strip()
+    if para[:1] == "#" or para[:2] in BULLET_PREFIXES:
+        return ""
+    return para
 
 
 def _trim_summary(text: str) -> str:
     if not text:
         return ""
-    text = re.sub(r"\s+", " ", text).strip()
+    text = WHITESPACE_PATTERN.sub(" ", text).strip()
     if len(text) <= 80:
         return text
     return text[:78].rstrip() + "…"
@@ -289,7 +364,12 @@ def _parse_package_json(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
     try:
-        data = json.loads(path.read_text(encoding="utf-8", errors="replace"))
+        raw = path.read_bytes()
+        try:
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson rejects invalid UTF-8 outright; keep the old lenient decode as a fallback.
+            data = json.loads(raw.decode("utf-8", errors="replace"))
     except Exception:
         return {}
     scripts = []
@@ -306,6 +386,7 @@ def _parse_package_json(path: Path) -> Dict[str, Any]:
     return {
         "scripts": scripts,
         "dependencies": sorted(set(deps)),
+        "dependency_names": frozenset(deps),
     }
 
 
@@ -313,6 +394,7 @@ def _parse_python_signals(repo_path: Path) -> Dict[str, Any]:
     deps: List[str] = []
     entrypoints: List[str] = []
     frameworks: List[str] = []
+    entry_frameworks: Dict[str, Optional[str]] = {}
 
     req_path = repo_path / "requirements.txt"
     if req_path.exists():
@@ -327,24 +409,27 @@ def _parse_python_signals(repo_path: Path) -> Dict[str, Any]:
         if path.exists():
             entrypoints.append(filename)
             framework = _detect_framework(path)
+            entry_frameworks[filename] = framework
             if framework and framework not in frameworks:
                 frameworks.append(framework)
 
     return {
         "dependencies": sorted(set(deps)),
+        "dependency_names": frozenset(dep.lower() for dep in deps),
         "entrypoints": entrypoints,
         "frameworks": frameworks,
+        "entry_frameworks": entry_frameworks,
     }
 
 
 def _parse_requirements(path: Path) -> List[str]:
     deps: List[str] = []
     try:
-        for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        for line in _read_text_prefix(path, MANIFEST_MAX_BYTES).splitlines():
             line = line.strip()
             if not line or line.startswith("#"):
                 continue
-            name = re.split(r"[=<>]", line)[0].strip()
+            name = REQUIREMENT_SPLIT_PATTERN.split(line)[0].strip()
             if name:
                 deps.append(name)
     except Exception:
@@ -352,43 +437,71 @@ def _parse_requirements(path: Path) -> List[str]:
     return deps
 
 
+def _pyproject_requirement_names(chunk: bytes) -> List[bytes]:
+    """Leading distribution name of each string literal; markers and versions after it are ignored."""
+    names: List[bytes] = []
+    for literal in PYPROJECT_STRING_PATTERN.finditer(chunk):
+        match = PYPROJECT_REQUIREMENT_PATTERN.match(literal.group(0), 1)
+        if match:
+            names.append(match.group(1))
+    return names
+
+
 def _parse_pyproject(path: Path) -> List[str]:
-    deps: List[str] = []
     try:
-        text = path.read_text(encoding="utf-8", errors="replace")
+        with path.open("rb") as handle:
+            data = handle.read(MANIFEST_MAX_BYTES)
     except Exception:
         return []
-    for line in text.splitlines():
-        if "dependencies" in line and "=" in line:
+    deps: List[bytes] = []
+    section = b""
+    in_array = False
+    for raw in data.splitlines():
+        line = raw.strip()
+        if in_array:
+            deps.extend(_pyproject_requirement_names(line))
+            in_array = b"]" not in PYPROJECT_STRING_PATTERN.sub(b"", line)
             continue
-        match = re.search(r"\"([A-Za-z0-9_.-]+)\"", line)
-        if match:
-            deps.append(match.group(1))
-    return deps
+        if line.startswith(b"["):
+            section = line.strip(b"[]").strip()
+            continue
+        if section == b"project" or section == b"project.optional-dependencies":
+            key, eq, value = line.partition(b"=")
+            if not eq or (section == b"project" and key.strip() != b"dependencies"):
+                continue
+            deps.extend(_pyproject_requirement_names(value))
+            value = PYPROJECT_STRING_PATTERN.sub(b"", value)
+            in_array = b"[" in value and b"]" not in value
+        elif section.startswith(b"tool.poetry") and section.endswith(b"dependencies"):
+            match = PYPROJECT_KEY_PATTERN.match(line)
+            if match and match.group(1) != b"python":
+                deps.append(match.group(1))
+    return [dep.decode("ascii") for dep in deps]
 
 
 def _detect_framework(path: Path) -> Optional[str]:
     try:
-        text = path.read_text(encoding="utf-8", errors="replace")
+        with path.open("rb") as handle:
+            data = handle.read(FRAMEWORK_SCAN_BYTES)
     except Exception:
         return None
-    if "FastAPI(" in text:
+    if b"FastAPI(" in data:
         return "FastAPI"
-    if "Flask(" in text:
+    if b"Flask(" in data:
         return "Flask"
-    if "django" in text.lower():
+    if b"django" in data.lower():
         return "Django"
     return None
 
 
-def _detect_repo_kind(repo_path: Path, package_info: Dict[str, Any], python_info: Dict[str, Any]) -> str:
-    if (repo_path / "app.json").exists() or (repo_path / "project.config.json").exists():
+def _detect_repo_kind(scan: RepoScan, package_info: Dict[str, Any], python_info: Dict[str, Any]) -> str:
+    if "app.json" in scan.top_level or "project.config.json" in scan.top_level:
         return "miniapp"
     if package_info.get("scripts"):
         return "node"
     if python_info.get("dependencies") or python_info.get("entrypoints"):
         return "python"
-    if (repo_path / "Dockerfile").exists():
+    if "Dockerfile" in scan.top_level:
         return "docker"
     return "unknown"
 
@@ -411,7 +524,7 @@ def _build_one_liner(
         keywords.append("FastAPI")
     if "Flask" in python_info.get("frameworks", []):
         keywords.append("Flask")
-    deps = set(package_info.get("dependencies", []))
+    deps = package_info.get("dependency_names", frozenset())
     if "react" in deps:
         keywords.append("React")
     if "vue" in deps:
@@ -471,18 +584,18 @@ def _build_features(
         if "test" in scripts:
             add("测试脚本 npm run test", "package.json scripts")
 
-    deps = set(package_info.get("dependencies", []))
+    deps = package_info.get("dependency_names", frozenset())
     if "react" in deps:
         add("React 前端渲染", "package.json dependencies")
     if "vue" in deps:
         add("Vue 前端应用", "package.json dependencies")
 
-    py_deps = set(python_info.get("dependencies", []))
-    if "fastapi" in {d.lower() for d in py_deps}:
+    py_deps = python_info.get("dependency_names", frozenset())
+    if "fastapi" in py_deps:
         add("FastAPI API 服务", "requirements.txt/pyproject.toml")
-    if "flask" in {d.lower() for d in py_deps}:
+    if "flask" in py_deps:
         add("Flask Web 服务", "requirements.txt/pyproject.toml")
-    if "django" in {d.lower() for d in py_deps}:
+    if "django" in py_deps:
         add("Django 应用结构", "requirements.txt/pyproject.toml")
 
     if docker_info.get("expose"):
@@ -543,7 +656,7 @@ def _infer_local_run(
             return commands
         for entry in ["main.py", "app.py", "server.py"]:
             if entry in entrypoints:
-                framework = _detect_framework(repo_path / entry)
+                framework = python_info.get("entry_frameworks", {}).get(entry)
                 module_name = entry.replace(".py", "")
                 if framework == "FastAPI":
                     commands.append(f"uvicorn {module_name}:app --host 0.0.0.0 --port 8000")
@@ -581,110 +694,147 @@ def _parse_dockerfile(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return info
     try:
-        contents = path.read_text(encoding="utf-8", errors="replace")
+        contents = _read_text_prefix(path, MANIFEST_MAX_BYTES)
     except Exception:
         return info
     for line in contents.splitlines():
         line = line.strip()
         if not line or line.startswith("#"):
             continue
-        upper = line.upper()
-        if upper.startswith("FROM "):
-            info["base"] = line.split(" ", 1)[1].strip()
-        if upper.startswith("EXPOSE "):
-            match = re.search(r"EXPOSE\s+(\d+)", line, re.IGNORECASE)
+        head, sep, rest = line.partition(" ")
+        if not sep:
+            continue
+        directive = head.upper()
+        if directive == "FROM":
+            info["base"] = rest.strip()
+        elif directive == "EXPOSE":
+            match = EXPOSE_PATTERN.search(line)
             if match:
                 info["expose"] = match.group(1)
-        if upper.startswith("CMD "):
+        elif directive == "CMD":
             info["cmd"] = line
-        if upper.startswith("ENTRYPOINT "):
+        elif directive == "ENTRYPOINT":
             info["entrypoint"] = line
-        if upper.startswith("ENV "):
-            keys = _extract_env_keys_from_line(line.replace("ENV ", "", 1))
-            info["env_keys"].extend(keys)
-        if upper.startswith("ARG "):
-            keys = _extract_env_keys_from_line(line.replace("ARG ", "", 1))
-            info["arg_keys"].extend(keys)
+        elif directive == "ENV":
+            info["env_keys"].extend(_extract_env_keys_from_line(rest))
+        elif directive == "ARG":
+            info["arg_keys"].extend(_extract_env_keys_from_line(rest))
     info["env_keys"] = sorted(set(info["env_keys"]))
     info["arg_keys"] = sorted(set(info["arg_keys"]))
     return info
 
 
-def _build_tree(repo_path: Path, depth: int) -> Tuple[str, int]:
+def _build_tree(scan: RepoScan, root_name: str, depth: int) -> Tuple[str, int]:
     lines: List[str] = []
     file_count = 0
+    children: Dict[str, List[Tuple[str, bool]]] = {}
+    for rel, is_dir, parent_depth in scan.entries:
+        if parent_depth >= depth:
+            continue
+        parent, _, name = rel.rpartition("/")
+        if name in IGNORED_DIRS:
+            continue
+        children.setdefault(parent, []).append((name, is_dir))
 
-    def walk(current: Path, prefix: str, current_depth: int) -> None:
-        nonlocal file_count
-        if current_depth > depth:
+    def push(parent: str, prefix: str) -> None:
+        entries = children.get(parent)
+        if not entries:
             return
-        entries = [p for p in sorted(current.iterdir(), key=lambda p: (not p.is_dir(), p.name.lower()))]
-        entries = [p for p in entries if p.name not in IGNORED_DIRS]
-        for idx, entry in enumerate(entries):
-            connector = "└──" if idx == len(entries) - 1 else "├──"
-            name = f"{entry.name}/" if entry.is_dir() else entry.name
+        entries.sort(key=lambda item: (not item[1], item[0].lower()))
+        last = len(entries) - 1
+        for idx in range(last, -1, -1):
+            name, is_dir = entries[idx]
+            stack.append((parent, name, is_dir, prefix, idx == last))
+
+    lines.append(f"{root_name}/")
+    stack: List[Tuple[str, str, bool, str, bool]] = []
+    push("", "")
+    while stack:
+        parent, name, is_dir, prefix, is_last = stack.pop()
+        connector = "└──" if is_last else "├──"
+        if is_dir:
+            lines.append(f"{prefix}{connector} {name}/")
+            push(f"{parent}/{name}" if parent else name, prefix + ("    " if is_last else "│   "))
+        else:
             lines.append(f"{prefix}{connector} {name}")
-            if entry.is_dir():
-                next_prefix = prefix + ("    " if idx == len(entries) - 1 else "│   ")
-                walk(entry, next_prefix, current_depth + 1)
-            else:
-                file_count += 1
-
-    lines.append(f"{repo_path.name}/")
-    try:
-        walk(repo_path, "", 1)
-    except Exception:
+            file_count += 1
+    if scan.failed:
         lines.append("(目录解析失败)")
 
     return "\n".join(lines), file_count
 
 
-def _find_config_files(repo_path: Path, depth: int) -> List[str]:
+def _find_config_files(scan: RepoScan, depth: int) -> List[str]:
     config_files: List[str] = []
-    for root, dirs, files in os.walk(repo_path):
-        rel = Path(root).relative_to(repo_path)
-        if any(part in IGNORED_DIRS for part in rel.parts):
-            dirs[:] = []
+    for rel, is_dir, parent_depth in scan.entries:
+        if is_dir or parent_depth > depth:
             continue
-        if len(rel.parts) > depth:
-            dirs[:] = []
-            continue
-        for file in files:
-            name = file
-            lower = name.lower()
-            if lower in CONFIG_FILE_PATTERNS or lower.endswith(CONFIG_SUFFIXES):
-                path = str((Path(root) / file).relative_to(repo_path))
-                if path not in config_files:
-                    config_files.append(path)
+        lower = rel.rpartition("/")[2].lower()
+        _, dot, extension = lower.rpartition(".")
+        if lower in CONFIG_FILE_PATTERNS or (dot and extension in CONFIG_EXTENSIONS):
+            config_files.append(rel)
     return sorted(config_files)
 
 
+def _scan_repo(repo_path: Path, depth: int) -> RepoScan:
+    """Walk the repository once; tree, config files and fingerprint are derived from the result."""
+    root = str(repo_path)
+    entries = list(_walk_repo(root, depth))
+    top_level = {rel: is_dir for rel, is_dir, parent_depth in entries if parent_depth == 0}
+    return RepoScan(entries=entries, top_level=top_level, failed=not os.path.isdir(root))
+
+
+def _walk_repo(root: str, max_depth: int) -> Iterator[Tuple[str, bool, int]]:
+    """Yield (relative path, is_dir, parent depth) for entries under ``root``.
+
+    Ignored directories are dropped by name before they are queued, and directories
+    deeper than ``max_depth`` are listed but never opened.
+    """
+    pending: List[Tuple[str, str, int]] = [(root, "", 0)]
+    while pending:
+        path, rel, depth = pending.pop()
+        try:
+            with os.scandir(path) as iterator:
+                entries = list(iterator)
+        except OSError:
+            continue
+        descend = depth < max_depth
+        for entry in entries:
+            name = rel + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in IGNORED_DIRS:
+                    continue
+                yield name, True, depth
+                if descend:
+                    pending.append((entry.path, name + "/", depth + 1))
+            else:
+                yield name, False, depth
+
+
 def _collect_env_keys(
     repo_path: Path,
     env_keys: List[str],
     docker_info: Dict[str, Any],
-    readme_text: str,
+    readme_env_keys: List[str],
 ) -> List[str]:
-    keys: List[str] = []
-    keys.extend([k for k in env_keys if k])
+    keys = set(env_keys)
 
     for filename in [".env.example", ".env"]:
         path = repo_path / filename
         if path.exists():
-            keys.extend(_extract_env_keys_from_file(path))
+            keys.update(_extract_env_keys_from_file(path))
 
-    keys.extend(readme_text and _extract_env_keys_from_text(readme_text) or [])
-    keys.extend(docker_info.get("env_keys", []))
-    keys.extend(docker_info.get("arg_keys", []))
+    keys.update(readme_env_keys)
+    keys.update(docker_info.get("env_keys", []))
+    keys.update(docker_info.get("arg_keys", []))
 
-    keys = [k for k in keys if k]
-    return sorted(set(keys))
+    return sorted(key for key in keys if key)
 
 
 def _extract_env_keys_from_file(path: Path) -> List[str]:
     keys: List[str] = []
     try:
-        for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        for line in _read_text_prefix(path, MANIFEST_MAX_BYTES).splitlines():
             line = line.strip()
             if not line or line.startswith("#"):
                 continue
@@ -697,8 +847,7 @@ def _extract_env_keys_from_file(path: Path) -> List[str]:
 
 
 def _extract_env_keys_from_text(text: str) -> List[str]:
-    keys = ENV_INLINE_PATTERN.findall(text)
-    return sorted(set(keys))
+    return sorted({match.group(1) for match in ENV_INLINE_PATTERN.finditer(text)})
 
 
 def _extract_env_keys_from_line(line: str) -> List[str]:
@@ -718,32 +867,25 @@ def _extract_port_from_readme(text: str) -> Optional[str]:
     return None
 
 
-def _describe_key_paths(repo_path: Path) -> List[Tuple[str, str]]:
+def _describe_key_paths(scan: RepoScan) -> List[Tuple[str, str]]:
     key_paths: List[Tuple[str, str]] = []
     seen: set[str] = set()
 
-    def add(path: Path, desc: str) -> None:
-        rel = str(path.relative_to(repo_path))
-        if rel in seen:
+    def add(name: str, desc: str) -> None:
+        if name in seen:
             return
-        seen.add(rel)
-        key_paths.append((rel + ("/" if path.is_dir() else ""), desc))
+        seen.add(name)
+        key_paths.append((name + ("/" if scan.top_level[name] else ""), desc))
 
     for name, desc in KEY_PATH_HINTS.items():
-        path = repo_path / name
-        if path.exists():
-            add(path, desc)
-
-    for name in ["pages", "components", "api", "backend", "frontend", "src", "server"]:
-        path = repo_path / name
-        if path.exists() and path.is_dir():
-            add(path, KEY_PATH_HINTS.get(name, "关键目录"))
+        if name in scan.top_level:
+            add(name, desc)
 
     if len(key_paths) < 5:
-        for entry in sorted(repo_path.iterdir(), key=lambda p: p.name.lower()):
-            if entry.name in IGNORED_DIRS:
+        for name in sorted(scan.top_level, key=str.lower):
+            if name in IGNORED_DIRS:
                 continue
-            add(entry, "顶层目录/文件")
+            add(name, "顶层目录/文件")
             if len(key_paths) >= 8:
                 break
 
@@ -795,9 +937,9 @@ def _build_mermaid(
         nodes.append("UI[src/frontend]")
         edges = ["U --> UI", "UI --> S"]
 
-    deps = set(package_info.get("dependencies", []))
-    py_deps = set(python_info.get("dependencies", []))
-    if any(dep in {"redis", "mysql", "postgres", "postgresql"} for dep in deps | {d.lower() for d in py_deps}):
+    deps = package_info.get("dependency_names", frozenset())
+    py_deps = python_info.get("dependency_names", frozenset())
+    if not DATA_STORE_DEPENDENCIES.isdisjoint(deps) or not DATA_STORE_DEPENDENCIES.isdisjoint(py_deps):
         nodes.append("DB[数据存储]")
         edges.append("S --> DB")
 
@@ -831,30 +973,30 @@ def _build_faq(
     return items[:5]
 
 
-def _collect_repo_fingerprint(repo_path: Path) -> List[str]:
-    paths: List[str] = []
-    for root, dirs, files in os.walk(repo_path):
-        rel = Path(root).relative_to(repo_path)
-        if any(part in IGNORED_DIRS for part in rel.parts):
-            dirs[:] = []
-            continue
-        if len(rel.parts) > 3:
-            dirs[:] = []
-            continue
-        for file in files:
-            paths.append(str(rel / file))
-    return paths
+def _compute_repo_fingerprint(scan: RepoScan, readme_info: Dict[str, Any]) -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    paths = sorted(
+        rel
+        for rel, is_dir, parent_depth in scan.entries
+        if not is_dir and parent_depth <= FINGERPRINT_DEPTH
+    )
+    for rel in paths:
+        digest.update(rel.encode("utf-8", errors="ignore"))
+        digest.update(b"\x00")
+    digest.update(str(readme_info.get("title", "")).encode("utf-8", errors="ignore"))
+    digest.update(b"|")
+    digest.update(str(readme_info.get("summary", "")).encode("utf-8", errors="ignore"))
+    return digest.hexdigest()[:10]
 
 
 def _compute_similarity(current: str, previous: Optional[str]) -> Optional[float]:
-    baseline = previous or TEMPLATE_BASELINE
-    current_tokens = set(re.findall(r"\w+", current.lower()))
-    prev_tokens = set(re.findall(r"\w+", baseline.lower()))
+    current_tokens = set(WORD_PATTERN.findall(current.lower()))
+    prev_tokens = set(WORD_PATTERN.findall(previous.lower())) if previous else TEMPLATE_BASELINE_TOKENS
     if not current_tokens or not prev_tokens:
         return None
-    intersection = current_tokens & prev_tokens
-    union = current_tokens | prev_tokens
-    return round(len(intersection) / max(1, len(union)), 3)
+    shared = len(current_tokens & prev_tokens)
+    union = len(current_tokens) + len(prev_tokens) - shared
+    return round(shared / max(1, union), 3)
 
 
 def _render_manual(
@@ -942,12 +1084,4 @@ Dockerfile/README 说明：
 ## 7. 常见问题与注意事项
 {faq_lines}
 
-## 8. 版本与生成信息
-- generated_at: {{generated_at}}
-- generator_version: {{generator_version}}
-- repo_fingerprint: {{repo_fingerprint}}
-- similarity_score: {{similarity_score}}
-- warnings: {{warnings}}
-- signals: {{signals}}
-- time_cost_ms: {{time_cost_ms}}
 """
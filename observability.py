@@ -3,10 +3,13 @@ from __future__ import annotations
 import json
 import logging
 import sys
-from datetime import datetime, timezone
+import threading
+import time
 from typing import Any
 
-_RESERVED_LOG_FIELDS = {
+import orjson
+
+_RESERVED_LOG_FIELDS = frozenset({
     "name",
     "msg",
     "args",
@@ -29,11 +32,17 @@ _RESERVED_LOG_FIELDS = {
     "process",
     "message",
     "asctime",
-}
+})
+
+LOG_BUFFER_BYTES = 64 * 1024
+LOG_FLUSH_INTERVAL_SECONDS = 1.0
+
+
+_JSON_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
 
 
 def _to_json_safe(value: Any) -> Any:
-    if value is None or isinstance(value, (str, int, float, bool)):
+    if type(value) in _JSON_SCALAR_TYPES or isinstance(value, (str, int, float)):
         return value
     if isinstance(value, dict):
         return {str(k): _to_json_safe(v) for k, v in value.items()}
@@ -43,20 +52,97 @@ def _to_json_safe(value: Any) -> Any:
 
 
 class JsonLogFormatter(logging.Formatter):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._timestamp_second = -1
+        self._timestamp_prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        if second != self._timestamp_second:
+            self._timestamp_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._timestamp_second = second
+        micros = min(int((created - second) * 1_000_000), 999_999)
+        return f"{self._timestamp_prefix}.{micros:06d}+00:00"
+
     def format(self, record: logging.LogRecord) -> str:  # noqa: D401
         payload: dict[str, Any] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname.lower(),
             "logger": record.name,
             "message": record.getMessage(),
         }
         for key, value in record.__dict__.items():
-            if key in _RESERVED_LOG_FIELDS or key.startswith("_"):
+            if key in _RESERVED_LOG_FIELDS or key[0] == "_":
                 continue
-            payload[key] = _to_json_safe(value)
+            payload[key] = value if type(value) in _JSON_SCALAR_TYPES else _to_json_safe(value)
         if record.exc_info:
             payload["exception"] = self.formatException(record.exc_info)
-        return json.dumps(payload, ensure_ascii=False)
+        try:
+            return orjson.dumps(payload).decode("utf-8")
+        except (TypeError, orjson.JSONEncodeError):
+            return json.dumps(payload, ensure_ascii=False)
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """Stream handler that batches formatted records into fewer, larger writes.
+
+    Buffered lines are written once ``buffer_size`` characters accumulate, when a
+    WARNING-or-higher record arrives, and at least every ``flush_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        stream: Any = None,
+        *,
+        buffer_size: int = LOG_BUFFER_BYTES,
+        flush_interval: float = LOG_FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        super().__init__(stream)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._pending: list[str] = []
+        self._pending_size = 0
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="json-log-flush", daemon=True)
+        self._flusher.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+            return
+        with self.lock:
+            self._pending.append(line)
+            self._pending_size += len(line)
+            if self._pending_size >= self.buffer_size or record.levelno >= logging.WARNING:
+                self._write_pending()
+
+    def flush(self) -> None:
+        with self.lock:
+            self._write_pending()
+
+    def close(self) -> None:
+        self._closed.set()
+        self.flush()
+        super().close()
+
+    def _write_pending(self) -> None:
+        try:
+            if self._pending:
+                self.stream.write("".join(self._pending))
+            if hasattr(self.stream, "flush"):
+                self.stream.flush()
+        except ValueError:
+            # The stream was closed underneath us (interpreter shutdown); drop the batch.
+            pass
+        self._pending.clear()
+        self._pending_size = 0
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
 
 
 def configure_json_logging(*, level: int = logging.INFO) -> None:
@@ -64,7 +150,7 @@ def configure_json_logging(*, level: int = logging.INFO) -> None:
     if any(getattr(handler, "_antihub_json_logger", False) for handler in root.handlers):
         root.setLevel(level)
         return
-    handler = logging.StreamHandler(stream=sys.stdout)
+    handler = BufferedStreamHandler(sys.stdout)
     handler.setFormatter(JsonLogFormatter())
     setattr(handler, "_antihub_json_logger", True)
     root.handlers.clear()
@@ -77,4 +163,5 @@ def get_logger(name: str) -> logging.Logger:
 
 
 def log_event(logger: logging.Logger, level: int, message: str, **fields: Any) -> None:
-    logger.log(level, message, extra={k: _to_json_safe(v) for k, v in fields.items()})
+    # JsonLogFormatter makes extras JSON-safe when the record is emitted.
+    logger.log(level, message, extra=fields)
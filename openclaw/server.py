@@ -1,16 +1,23 @@
-import json
 import os
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Any, Dict
 
+import orjson
+
 from openclaw.skills.github_fetch import github_fetch
 
+NOT_FOUND_BODY = orjson.dumps({"ok": False, "error": "not_found"})
+INVALID_JSON_BODY = orjson.dumps({"ok": False, "error": "invalid_json"})
+UNKNOWN_SKILL_BODY = orjson.dumps({"ok": False, "error": "unknown_skill"})
+
 
 class SkillHandler(BaseHTTPRequestHandler):
     server_version = "OpenClawMock/0.1"
 
     def _send(self, status: int, payload: Dict[str, Any]) -> None:
-        body = json.dumps(payload).encode("utf-8")
+        self._send_body(status, orjson.dumps(payload))
+
+    def _send_body(self, status: int, body: bytes) -> None:
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(body)))
@@ -19,20 +26,20 @@ class SkillHandler(BaseHTTPRequestHandler):
 
     def do_POST(self) -> None:  # noqa: N802
         if self.path.rstrip("/") != "/skills/run":
-            self._send(404, {"ok": False, "error": "not_found"})
+            self._send_body(404, NOT_FOUND_BODY)
             return
         try:
             length = int(self.headers.get("Content-Length", "0"))
             raw = self.rfile.read(length)
-            data = json.loads(raw.decode("utf-8"))
-        except Exception:
-            self._send(400, {"ok": False, "error": "invalid_json"})
+            data = orjson.loads(raw)
+        except (ValueError, orjson.JSONDecodeError):
+            self._send_body(400, INVALID_JSON_BODY)
             return
 
         skill = data.get("skill")
         payload = data.get("input") or {}
         if skill != "github.fetch":
-            self._send(400, {"ok": False, "error": "unknown_skill"})
+            self._send_body(400, UNKNOWN_SKILL_BODY)
             return
 
         result = github_fetch(payload)
@@ -52,7 +59,7 @@ class SkillHandler(BaseHTTPRequestHandler):
 def main() -> None:
     host = os.getenv("OPENCLAW_HOST", "0.0.0.0")
     port = int(os.getenv("OPENCLAW_PORT", "8787"))
-    server = HTTPServer((host, port), SkillHandler)
+    server = ThreadingHTTPServer((host, port), SkillHandler)
     print(f"OpenClaw mock server listening on {host}:{port}")
     server.serve_forever()
 
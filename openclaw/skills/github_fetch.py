@@ -1,3 +1,5 @@
+import contextlib
+import gzip
 import hashlib
 import json
 import logging
@@ -5,16 +7,28 @@ import os
 import re
 import shutil
 import socket
+import struct
 import subprocess
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.error import HTTPError
 from urllib.parse import urlparse
 from urllib.request import Request, urlopen
 
-IGNORED_DIRS = {".git", "node_modules", "venv", ".venv", "dist", "build"}
+# ".antihub" holds this skill's own output (ingest_meta.json, file_index.jsonl).
+IGNORED_DIRS = frozenset({".git", ".antihub", "node_modules", "venv", ".venv", "dist", "build"})
+MIRRORS_DIRNAME = "_mirrors"
+COMMIT_SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+SLUG_INVALID_PATTERN = re.compile(r"[^A-Za-z0-9_.-]+")
+GITHUB_SLUG_PATTERN = re.compile(r"github.com[:/](?P<owner>[^/]+)/(?P<repo>[^/]+)$")
+# Fixed-width (path length, size, mtime) header hashed ahead of each path.
+FINGERPRINT_RECORD = struct.Struct("<IQq")
 README_CANDIDATES = [
     "README.md",
     "README.MD",
@@ -24,6 +38,19 @@ README_CANDIDATES = [
 
 logger = logging.getLogger(__name__)
 
+# GitHub metadata lookups only need the URL, so they overlap with the git work.
+_META_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="github-meta")
+REPO_META_CACHE_TTL_SECONDS = 300.0
+REPO_META_CACHE_MAX_ENTRIES = 1024
+_REPO_META_CACHE: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+# Shared by _META_EXECUTOR workers across concurrent requests.
+_REPO_META_CACHE_LOCK = threading.Lock()
+PROXY_CHECK_TTL_SECONDS = 60.0
+# (host, port) -> (reachable, checked_at monotonic)
+_PROXY_REACHABILITY: Dict[Tuple[str, int], Tuple[bool, float]] = {}
+_WORKSPACE_LOCKS: Dict[str, threading.Lock] = {}
+_WORKSPACE_LOCKS_GUARD = threading.Lock()
+
 TLS_ERROR_HINTS = (
     "gnutls",
     "tls",
@@ -54,7 +81,7 @@ class GitHubRateLimitError(RuntimeError):
 
 
 def _safe_slug(value: str) -> str:
-    cleaned = re.sub(r"[^A-Za-z0-9_.-]+", "-", value.strip().lower())
+    cleaned = SLUG_INVALID_PATTERN.sub("-", value.strip().lower())
     return cleaned.strip("-") or "repo"
 
 
@@ -72,6 +99,93 @@ def _run(cmd: List[str], cwd: Optional[Path] = None, env: Optional[Dict[str, str
         return 1, "", str(exc)
 
 
+def _run_git_network(cmd: List[str], env: Dict[str, str]) -> Tuple[int, str, str, Dict[str, str]]:
+    code, out, err = _run(cmd, env=env)
+    if code != 0 and _looks_like_tls_error(f"{out}\n{err}".strip()):
+        logger.warning("git TLS error detected; retrying with GIT_SSL_NO_VERIFY=1")
+        insecure_env = _with_ssl_no_verify(env)
+        code, out, err = _run(cmd, env=insecure_env)
+        if code == 0:
+            return code, out, err, insecure_env
+    return code, out, err, env
+
+
+def _update_mirror(
+    repo_url: str,
+    mirror_path: Path,
+    ref: Optional[str],
+    depth: int,
+    env: Dict[str, str],
+) -> Tuple[Optional[str], str, Dict[str, str]]:
+    """Bring the shared blobless mirror up to date and return the commit to check out.
+
+    Returns ``(commit, error, env)``; ``commit`` is None when git failed.
+    """
+    depth_args = ["--depth", str(depth), "--filter=blob:none"]
+    if not (mirror_path / "HEAD").exists():
+        shutil.rmtree(mirror_path, ignore_errors=True)
+        mirror_path.parent.mkdir(parents=True, exist_ok=True)
+        code, out, err, env = _run_git_network(
+            ["git", "clone", "--bare", *depth_args, repo_url, str(mirror_path)],
+            env,
+        )
+        if code != 0:
+            shutil.rmtree(mirror_path, ignore_errors=True)
+            return None, (err or out).strip() or "git clone failed", env
+        if not ref:
+            code, out, _ = _run(["git", "-C", str(mirror_path), "rev-parse", "HEAD"])
+            return (out.strip() if code == 0 else None), "git clone failed", env
+
+    code, out, err, env = _run_git_network(
+        ["git", "-C", str(mirror_path), "fetch", *depth_args, "origin", ref or "HEAD"],
+        env,
+    )
+    if code != 0:
+        return None, (err or out).strip() or "git fetch failed", env
+    commit = _read_fetch_head(mirror_path)
+    if not commit:
+        return None, "git fetch failed", env
+    return commit, "", env
+
+
+def _read_fetch_head(mirror_path: Path) -> Optional[str]:
+    try:
+        line = (mirror_path / "FETCH_HEAD").read_text(encoding="utf-8").split("\n", 1)[0]
+    except OSError:
+        return None
+    commit = line[:40]
+    return commit if COMMIT_SHA_PATTERN.match(commit) else None
+
+
+def _checkout_worktree(mirror_path: Path, commit: str, repo_path: Path, env: Dict[str, str]) -> str:
+    # ``worktree add --force`` reclaims a registered-but-missing path, so prune only after a failed remove.
+    if repo_path.exists():
+        code, _, _ = _run(["git", "-C", str(mirror_path), "worktree", "remove", "--force", str(repo_path)])
+        if code != 0:
+            shutil.rmtree(repo_path, ignore_errors=True)
+            _run(["git", "-C", str(mirror_path), "worktree", "prune"])
+    code, out, err = _run(
+        ["git", "-C", str(mirror_path), "worktree", "add", "--detach", "--force", str(repo_path), commit],
+        env=env,
+    )
+    if code != 0:
+        return (err or out).strip() or "git checkout failed"
+    return ""
+
+
+def _reuse_worktree(repo_path: Path, ref: Optional[str]) -> bool:
+    """Reset an existing worktree in place when it already sits on the pinned commit."""
+    if not ref or not COMMIT_SHA_PATTERN.match(ref) or not repo_path.exists():
+        return False
+    if _resolve_commit(repo_path) != ref:
+        return False
+    code, _, _ = _run(["git", "-C", str(repo_path), "reset", "--hard", "-q"])
+    if code != 0:
+        return False
+    code, _, _ = _run(["git", "-C", str(repo_path), "clean", "-fdxq"])
+    return code == 0
+
+
 def _read_readme(repo_path: Path, max_chars: int = 4000) -> str:
     for name in README_CANDIDATES:
         path = repo_path / name
@@ -84,24 +198,48 @@ def _read_readme(repo_path: Path, max_chars: int = 4000) -> str:
     return ""
 
 
-def _file_index(repo_path: Path, max_files: int) -> List[Dict[str, Any]]:
-    entries: List[Dict[str, Any]] = []
+def _scan_dir(path: str) -> Tuple[List[str], List[os.DirEntry]]:
+    """Split a directory into child directories to descend into and sorted file entries."""
+    dirs: List[str] = []
+    files: List[os.DirEntry] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name == ".git":
+                    # A worktree's .git is a pointer file, not repository content.
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    files.append(entry)
+                elif entry.name not in IGNORED_DIRS and not entry.is_symlink():
+                    dirs.append(entry.name)
+    except OSError:
+        pass
+    files.sort(key=lambda entry: entry.name)
+    return dirs, files
+
+
+def _iter_file_index(repo_path: Path, max_files: int) -> Iterator[Dict[str, Any]]:
     count = 0
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
-        for name in sorted(files):
+    root = str(repo_path)
+    pending = deque([""])
+    while pending:
+        rel_dir = pending.popleft()
+        dirs, files = _scan_dir(os.path.join(root, rel_dir) if rel_dir else root)
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for entry in files:
             if count >= max_files:
-                return entries
-            path = Path(root) / name
-            rel = str(path.relative_to(repo_path))
+                return
             try:
-                stat = path.stat()
-                size = stat.st_size
-            except Exception:
+                size = entry.stat().st_size
+            except OSError:
                 size = 0
-            entries.append({"path": rel, "size": size, "type": "file"})
+            yield {"path": prefix + entry.name, "size": size, "type": "file"}
             count += 1
-    return entries
+        pending.extend(prefix + name for name in dirs)
 
 
 def _resolve_commit(repo_path: Path) -> Optional[str]:
@@ -111,20 +249,25 @@ def _resolve_commit(repo_path: Path) -> Optional[str]:
     return None
 
 
-def _fingerprint(repo_path: Path) -> str:
-    hasher = hashlib.sha1()
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
-        for name in sorted(files)[:2000]:
-            path = Path(root) / name
-            rel = str(path.relative_to(repo_path))
+def _fingerprint(repo_path: Path, max_entries: int) -> str:
+    """Return a 12-hex snapshot id over (path, size, mtime) of the first ``max_entries`` files."""
+    hasher = hashlib.blake2b(digest_size=6)
+    root = str(repo_path)
+    pending = deque([""])
+    remaining = max_entries
+    while pending and remaining > 0:
+        rel_dir = pending.popleft()
+        dirs, files = _scan_dir(os.path.join(root, rel_dir) if rel_dir else root)
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for entry in files[:remaining]:
             try:
-                stat = path.stat()
-            except Exception:
+                stat = entry.stat()
+            except OSError:
                 continue
-            hasher.update(rel.encode("utf-8", errors="ignore"))
-            hasher.update(str(stat.st_size).encode("utf-8"))
-            hasher.update(str(int(stat.st_mtime)).encode("utf-8"))
+            rel = (prefix + entry.name).encode("utf-8", errors="ignore")
+            hasher.update(FINGERPRINT_RECORD.pack(len(rel), stat.st_size, int(stat.st_mtime)) + rel)
+        remaining -= len(files)
+        pending.extend(prefix + name for name in dirs)
     return hasher.hexdigest()
 
 
@@ -132,7 +275,7 @@ def _parse_repo_slug(repo_url: str) -> Optional[Tuple[str, str]]:
     cleaned = repo_url.rstrip("/")
     if cleaned.endswith(".git"):
         cleaned = cleaned[:-4]
-    match = re.search(r"github.com[:/](?P<owner>[^/]+)/(?P<repo>[^/]+)$", cleaned)
+    match = GITHUB_SLUG_PATTERN.search(cleaned)
     if not match:
         return None
     return match.group("owner"), match.group("repo")
@@ -158,12 +301,17 @@ def _proxy_reachable(proxy_url: str, timeout: float = 0.5) -> bool:
     target = _proxy_target(proxy_url)
     if not target:
         return True
-    host, port = target
+    now = time.monotonic()
+    cached = _PROXY_REACHABILITY.get(target)
+    if cached and now - cached[1] < PROXY_CHECK_TTL_SECONDS:
+        return cached[0]
     try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return True
+        with socket.create_connection(target, timeout=timeout):
+            reachable = True
     except OSError:
-        return False
+        reachable = False
+    _PROXY_REACHABILITY[target] = (reachable, now)
+    return reachable
 
 
 def _git_env_without_unreachable_proxy() -> Optional[Dict[str, str]]:
@@ -181,20 +329,41 @@ def _git_env_without_unreachable_proxy() -> Optional[Dict[str, str]]:
     return None
 
 
+def _read_json_response(resp: Any) -> Any:
+    body = resp.read()
+    if str(resp.headers.get("Content-Encoding") or "").lower() == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
 def _fetch_repo_meta(repo_url: str, token: Optional[str]) -> Dict[str, Any]:
     slug = _parse_repo_slug(repo_url)
     if not slug:
         return {}
     owner, repo = slug
     api_url = f"https://api.github.com/repos/{owner}/{repo}"
-    headers = {"Accept": "application/vnd.github+json"}
+    headers = {"Accept": "application/vnd.github+json", "Accept-Encoding": "gzip"}
     if token:
         headers["Authorization"] = f"Bearer {token}"
-    request = Request(api_url, headers=headers)
+    cache_key = (owner.lower(), repo.lower(), token or "")
+    with _REPO_META_CACHE_LOCK:
+        cached = _REPO_META_CACHE.get(cache_key)
+    now = time.time()
+    if cached and now - float(cached.get("ts", 0.0)) < REPO_META_CACHE_TTL_SECONDS:
+        return dict(cached["meta"])
+    request_headers = dict(headers)
+    if cached and cached.get("etag"):
+        request_headers["If-None-Match"] = str(cached["etag"])
+    request = Request(api_url, headers=request_headers)
     try:
         with urlopen(request, timeout=12) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
+            etag = resp.headers.get("ETag")
+            data = _read_json_response(resp)
     except HTTPError as exc:
+        if exc.code == 304 and cached:
+            with _REPO_META_CACHE_LOCK:
+                cached["ts"] = now
+            return dict(cached["meta"])
         if exc.code == 403:
             raise GitHubRateLimitError("GITHUB_RATE_LIMIT") from exc
         return {}
@@ -207,18 +376,55 @@ def _fetch_repo_meta(repo_url: str, token: Optional[str]) -> Dict[str, Any]:
         headers["Accept"] = "application/vnd.github+json"
         try:
             with urlopen(Request(topics_url, headers=headers), timeout=10) as resp:
-                topics_data = json.loads(resp.read().decode("utf-8"))
+                topics_data = _read_json_response(resp)
                 topics = topics_data.get("names") or []
         except Exception:
             topics = []
 
-    return {
+    meta = {
         "stars": data.get("stargazers_count"),
         "forks": data.get("forks_count"),
         "topics": topics,
         "license": (data.get("license") or {}).get("spdx_id") if data.get("license") else None,
         "default_branch": data.get("default_branch"),
     }
+    with _REPO_META_CACHE_LOCK:
+        if len(_REPO_META_CACHE) >= REPO_META_CACHE_MAX_ENTRIES and cache_key not in _REPO_META_CACHE:
+            _REPO_META_CACHE.pop(next(iter(_REPO_META_CACHE)), None)
+        _REPO_META_CACHE[cache_key] = {"etag": etag, "meta": meta, "ts": now}
+    return dict(meta)
+
+
+def _write_atomic(path: Path, write: Callable[[BinaryIO], Any]) -> None:
+    """Write via ``write`` next to ``path`` and rename it into place so readers never see a partial file."""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            write(handle)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+def _write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    _write_atomic(path, lambda handle: handle.write(json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")))
+
+
+def _write_file_index(path: Path, entries: Iterable[Dict[str, Any]]) -> int:
+    """Stream index entries to ``path`` as JSON lines and return how many were written."""
+    count = 0
+
+    def _write(handle: BinaryIO) -> None:
+        nonlocal count
+        for entry in entries:
+            handle.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+            count += 1
+
+    _write_atomic(path, _write)
+    return count
 
 
 @dataclass
@@ -229,7 +435,22 @@ class GithubFetchResult:
     error_message: Optional[str] = None
 
 
+def _workspace_lock(slug: str) -> threading.Lock:
+    with _WORKSPACE_LOCKS_GUARD:
+        lock = _WORKSPACE_LOCKS.get(slug)
+        if lock is None:
+            lock = _WORKSPACE_LOCKS[slug] = threading.Lock()
+        return lock
+
+
 def github_fetch(payload: Dict[str, Any]) -> GithubFetchResult:
+    # Requests for the same repository share its mirror and worktree, so they run one at a time.
+    repo_url = str(payload.get("repo_url") or "").strip()
+    with _workspace_lock(_safe_slug(repo_url)):
+        return _github_fetch(payload)
+
+
+def _github_fetch(payload: Dict[str, Any]) -> GithubFetchResult:
     repo_url = str(payload.get("repo_url") or "").strip()
     if not repo_url:
         return GithubFetchResult(ok=False, output={}, error_code="GIT_CLONE_FAILED", error_message="Missing repo_url")
@@ -239,51 +460,38 @@ def github_fetch(payload: Dict[str, Any]) -> GithubFetchResult:
     include_submodules = bool(payload.get("include_submodules"))
     include_lfs = bool(payload.get("include_lfs"))
     max_files = int(payload.get("max_files") or 20000)
+    include_file_index = bool(payload.get("include_file_index", True))
 
     workspace = Path(os.getenv("OPENCLAW_WORKSPACE", "/tmp/openclaw"))
     workspace.mkdir(parents=True, exist_ok=True)
     slug = _safe_slug(repo_url)
     repo_path = workspace / slug
-    if repo_path.exists():
-        shutil.rmtree(repo_path, ignore_errors=True)
+    mirror_path = workspace / MIRRORS_DIRNAME / f"{slug}.git"
+
+    token = os.getenv("GITHUB_TOKEN") or os.getenv("GITHUB_API_TOKEN")
+    repo_meta_future = _META_EXECUTOR.submit(_fetch_repo_meta, repo_url, token)
 
     git_env = _git_env_without_unreachable_proxy()
-    base_env = dict(git_env) if git_env is not None else os.environ.copy()
-    effective_env = base_env
-    clone_cmd = ["git", "clone", "--depth", str(max(1, depth)), repo_url, str(repo_path)]
-    code, out, err = _run(clone_cmd, env=effective_env)
-    if code != 0:
-        combined = f"{out}\n{err}".strip()
-        if _looks_like_tls_error(combined):
-            logger.warning("git clone TLS error detected; retrying with GIT_SSL_NO_VERIFY=1")
-            shutil.rmtree(repo_path, ignore_errors=True)
-            insecure_env = _with_ssl_no_verify(base_env)
-            code, out, err = _run(clone_cmd, env=insecure_env)
-            if code == 0:
-                effective_env = insecure_env
-            else:
-                return GithubFetchResult(
-                    ok=False,
-                    output={},
-                    error_code="GIT_CLONE_FAILED",
-                    error_message=(err or out).strip() or "git clone failed",
-                )
-        else:
+    effective_env = dict(git_env) if git_env is not None else os.environ.copy()
+    commit: Optional[str] = ref
+    if not _reuse_worktree(repo_path, ref):
+        commit, error, effective_env = _update_mirror(
+            repo_url, mirror_path, ref, max(1, depth), effective_env
+        )
+        if not commit:
             return GithubFetchResult(
                 ok=False,
                 output={},
                 error_code="GIT_CLONE_FAILED",
-                error_message=err.strip() or "git clone failed",
+                error_message=error,
             )
-
-    if ref:
-        code, _, err = _run(["git", "-C", str(repo_path), "checkout", ref], env=effective_env)
-        if code != 0:
+        error = _checkout_worktree(mirror_path, commit, repo_path, effective_env)
+        if error:
             return GithubFetchResult(
                 ok=False,
                 output={},
                 error_code="GIT_CLONE_FAILED",
-                error_message=err.strip() or "git checkout failed",
+                error_message=error,
             )
 
     if include_submodules:
@@ -309,19 +517,18 @@ def github_fetch(payload: Dict[str, Any]) -> GithubFetchResult:
                 error_message=err.strip() or "git lfs pull failed",
             )
 
-    commit_sha = _resolve_commit(repo_path)
+    # Submodule/LFS steps never move HEAD, so the commit checked out above is still current.
+    commit_sha = commit or _resolve_commit(repo_path)
     if not commit_sha:
-        fingerprint = _fingerprint(repo_path)
-        commit_sha = f"snapshot-{fingerprint[:12]}"
+        commit_sha = f"snapshot-{_fingerprint(repo_path, max_entries=max_files)}"
 
     readme_rendered = _read_readme(repo_path)
 
-    token = os.getenv("GITHUB_TOKEN") or os.getenv("GITHUB_API_TOKEN")
     repo_meta: Dict[str, Any] = {}
     repo_meta_available = True
     repo_meta_reason: Optional[str] = None
     try:
-        repo_meta = _fetch_repo_meta(repo_url, token)
+        repo_meta = repo_meta_future.result()
         if not repo_meta:
             repo_meta_available = False
             repo_meta_reason = "unavailable"
@@ -331,7 +538,15 @@ def github_fetch(payload: Dict[str, Any]) -> GithubFetchResult:
         repo_meta_reason = "rate_limit"
         repo_meta = {}
 
-    file_index = _file_index(repo_path, max_files=max_files)
+    meta_dir = repo_path / ".antihub"
+    meta_dir.mkdir(parents=True, exist_ok=True)
+    file_index_path = meta_dir / "file_index.jsonl"
+    entries = _iter_file_index(repo_path, max_files=max_files)
+    file_index: Optional[List[Dict[str, Any]]] = None
+    if include_file_index:
+        file_index = list(entries)
+        entries = iter(file_index)
+    file_index_count = _write_file_index(file_index_path, entries)
 
     ingest_meta = {
         "generated_at": time.time(),
@@ -343,14 +558,13 @@ def github_fetch(payload: Dict[str, Any]) -> GithubFetchResult:
         "repo_meta_available": repo_meta_available,
         "repo_meta_reason": repo_meta_reason,
         "readme_rendered": readme_rendered,
-        "file_index_count": len(file_index),
+        "file_index_count": file_index_count,
+        "file_index_path": str(file_index_path),
         "max_files": max_files,
     }
 
-    meta_dir = repo_path / ".antihub"
-    meta_dir.mkdir(parents=True, exist_ok=True)
     ingest_meta_path = meta_dir / "ingest_meta.json"
-    ingest_meta_path.write_text(json.dumps(ingest_meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_json_atomic(ingest_meta_path, ingest_meta)
 
     return GithubFetchResult(
         ok=True,
@@ -358,6 +572,8 @@ def github_fetch(payload: Dict[str, Any]) -> GithubFetchResult:
             "repo_path": str(repo_path),
             "commit_sha": commit_sha,
             "file_index": file_index,
+            "file_index_count": file_index_count,
+            "file_index_path": str(file_index_path),
             "readme_rendered": readme_rendered,
             "repo_meta": repo_meta,
             "repo_meta_available": repo_meta_available,
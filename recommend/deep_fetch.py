@@ -5,41 +5,111 @@ import html
 import json
 import os
 import re
+import threading
 import time
-import urllib.error
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
-from config import OPENCLAW_BASE_URL, build_url_opener
+from config import OPENCLAW_BASE_URL
 from ingest.openclaw import OpenClawClient, OpenClawClientError
+from recommend.http_pool import HTTP_POOL_SIZE, client_for_url
 from runtime_metrics import record_counter_metric, record_timing_metric
 
+# Script/style blocks (an unclosed one runs to the end of the page) or any other tag.
+HTML_MARKUP_PATTERN = re.compile(
+    r"(?is)<script\b[^>]*>.*?(?:</script\s*>|\Z)|<style\b[^>]*>.*?(?:</style\s*>|\Z)|<[^>]+>"
+)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Documents are trimmed to a few thousand characters, so bodies past this are never used.
+HTTP_BODY_MAX_BYTES = 512 * 1024
+HTTP_READ_CHUNK_BYTES = 64 * 1024
+CANDIDATE_FETCH_CONCURRENCY = 3
+DOC_TRIM_LIMIT = 2400
+GITHUB_API_CACHE_TTL_SECONDS = 300.0
+GITHUB_API_CACHE_MAX_ENTRIES = 1024
+REPO_URL_PATTERN = re.compile(r"(github|gitee|gitcode)\.com/(?P<owner>[^/]+)/(?P<repo>[^/]+)$")
 
-def _build_opener_for_url(url: str) -> urllib.request.OpenerDirector:
-    return build_url_opener(url)
 
+_GITHUB_API_CACHE: Dict[Tuple[str, str], Dict[str, Any]] = {}
+# Document fetches run on thread pools, so every read and write of the cache holds this lock.
+_GITHUB_API_CACHE_LOCK = threading.Lock()
 
-def _http_get_text(url: str, timeout: int = 10, headers: Optional[Dict[str, str]] = None) -> str:
-    request = urllib.request.Request(url, headers=headers or {}, method="GET")
-    opener = _build_opener_for_url(url)
-    with opener.open(request, timeout=timeout) as resp:  # nosec B310
-        raw = resp.read()
-    return raw.decode("utf-8", errors="replace")
+
+def _http_get(
+    url: str,
+    timeout: int = 10,
+    headers: Optional[Dict[str, str]] = None,
+    max_bytes: int = HTTP_BODY_MAX_BYTES,
+) -> Tuple[int, Optional[str], str, bool]:
+    """GET ``url`` and return ``(status, etag, text, truncated)``; 304 is returned, other errors raise.
+
+    ``truncated`` is True when the body was cut off at ``max_bytes``.
+    """
+    client = client_for_url(url)
+    chunks: List[bytes] = []
+    size = 0
+    truncated = False
+    with client.stream("GET", url, headers=headers, timeout=timeout) as resp:
+        if resp.status_code == 304:
+            return 304, resp.headers.get("ETag"), "", False
+        resp.raise_for_status()
+        for chunk in resp.iter_bytes(HTTP_READ_CHUNK_BYTES):
+            chunks.append(chunk[: max_bytes - size])
+            size += len(chunk)
+            if size >= max_bytes:
+                truncated = True
+                break
+        etag = resp.headers.get("ETag")
+    return resp.status_code, etag, b"".join(chunks).decode("utf-8", errors="replace"), truncated
+
+
+def _http_get_text(
+    url: str,
+    timeout: int = 10,
+    headers: Optional[Dict[str, str]] = None,
+    max_bytes: int = HTTP_BODY_MAX_BYTES,
+) -> str:
+    return _http_get(url, timeout=timeout, headers=headers, max_bytes=max_bytes)[2]
+
+
+def _github_api_get_text(url: str, timeout: int, headers: Dict[str, str]) -> str:
+    """GET a GitHub API URL, reusing a fresh cached body or revalidating it by ETag.
+
+    A 304 answer does not count against the GitHub rate limit. Truncated bodies are never cached.
+    """
+    key = (url, headers.get("Authorization") or "")
+    with _GITHUB_API_CACHE_LOCK:
+        cached = _GITHUB_API_CACHE.get(key)
+    now = time.time()
+    if cached and now - float(cached.get("ts", 0.0)) < GITHUB_API_CACHE_TTL_SECONDS:
+        return str(cached.get("body") or "")
+    request_headers = dict(headers)
+    if cached and cached.get("etag"):
+        request_headers["If-None-Match"] = str(cached["etag"])
+    status, etag, body, truncated = _http_get(url, timeout=timeout, headers=request_headers)
+    if status == 304 and cached:
+        body = str(cached.get("body") or "")
+        etag = etag or cached.get("etag")
+    if truncated:
+        return body
+    with _GITHUB_API_CACHE_LOCK:
+        if len(_GITHUB_API_CACHE) >= GITHUB_API_CACHE_MAX_ENTRIES and key not in _GITHUB_API_CACHE:
+            _GITHUB_API_CACHE.pop(next(iter(_GITHUB_API_CACHE)), None)
+        _GITHUB_API_CACHE[key] = {"etag": etag, "body": body, "ts": now}
+    return body
 
 
 def _clean_html_to_text(raw_html: str) -> str:
     payload = str(raw_html or "")
-    payload = re.sub(r"(?is)<script.*?>.*?</script>", " ", payload)
-    payload = re.sub(r"(?is)<style.*?>.*?</style>", " ", payload)
-    payload = re.sub(r"(?is)<[^>]+>", " ", payload)
+    payload = HTML_MARKUP_PATTERN.sub(" ", payload)
     payload = html.unescape(payload)
-    payload = re.sub(r"\s+", " ", payload).strip()
+    payload = WHITESPACE_PATTERN.sub(" ", payload).strip()
     return payload
 
 
-def _trim_doc(text: str, limit: int = 2400) -> str:
+def _trim_doc(text: str, limit: int = DOC_TRIM_LIMIT) -> str:
     value = str(text or "").strip()
     if not value:
         return ""
@@ -51,7 +121,7 @@ def _repo_full_name(item: Dict[str, Any]) -> str:
     if full_name:
         return full_name
     url = str(item.get("html_url") or "").strip().rstrip("/")
-    match = re.search(r"(github|gitee|gitcode)\.com/(?P<owner>[^/]+)/(?P<repo>[^/]+)$", url)
+    match = REPO_URL_PATTERN.search(url)
     if not match:
         return ""
     return f"{match.group('owner')}/{match.group('repo')}"
@@ -98,6 +168,20 @@ def _readme_candidates(item: Dict[str, Any]) -> List[str]:
     return deduped
 
 
+def _decode_base64_doc(content: str, limit: int = DOC_TRIM_LIMIT) -> str:
+    """Decode only as much of a base64 document as ``_trim_doc(..., limit)`` can keep."""
+    # Up to 4 UTF-8 bytes per kept character, plus slack for leading whitespace.
+    needed = (limit * 4 + 1024 + 2) // 3 * 4
+    head = "".join(content[: needed + needed // 16].split())
+    truncated = len(head) > needed
+    if truncated:
+        head = head[:needed]
+    decoded = base64.b64decode(head, validate=False).decode("utf-8", errors="replace")
+    if truncated and len(decoded.strip()) <= limit:
+        decoded = base64.b64decode(content, validate=False).decode("utf-8", errors="replace")
+    return decoded
+
+
 def _fetch_github_readme_via_api(full_name: str, timeout: int) -> Tuple[str, Optional[str], Optional[str]]:
     if not full_name:
         return "", None, None
@@ -110,7 +194,7 @@ def _fetch_github_readme_via_api(full_name: str, timeout: int) -> Tuple[str, Opt
         headers["Authorization"] = f"Bearer {token}"
     url = f"https://api.github.com/repos/{full_name}/readme"
     try:
-        payload_raw = _http_get_text(url, timeout=timeout, headers=headers)
+        payload_raw = _github_api_get_text(url, timeout=timeout, headers=headers)
         parsed = json.loads(payload_raw)
     except Exception:
         return "", None, None
@@ -121,8 +205,7 @@ def _fetch_github_readme_via_api(full_name: str, timeout: int) -> Tuple[str, Opt
     encoding = str(parsed.get("encoding") or "").lower()
     if isinstance(content, str) and encoding == "base64":
         try:
-            decoded = base64.b64decode(content.encode("utf-8"), validate=False).decode("utf-8", errors="replace")
-            return _trim_doc(decoded), html_url, "github_api"
+            return _trim_doc(_decode_base64_doc(content)), html_url, "github_api"
         except Exception:
             return "", html_url, "github_api"
     return "", html_url, "github_api"
@@ -143,6 +226,7 @@ def _fetch_with_openclaw(repo_url: str, timeout: int) -> Tuple[str, Optional[str
                 "include_submodules": False,
                 "include_lfs": False,
                 "max_files": 800,
+                "include_file_index": False,
             },
         )
     except OpenClawClientError as exc:
@@ -156,6 +240,50 @@ def _fetch_with_openclaw(repo_url: str, timeout: int) -> Tuple[str, Optional[str
     return readme, url, "openclaw_github_fetch", None
 
 
+def _fetch_candidate(candidate_url: str, timeout: int) -> Optional[Tuple[str, str]]:
+    try:
+        text = _http_get_text(candidate_url, timeout=timeout, headers={"User-Agent": "AntiHub/0.5"})
+    except Exception:
+        return None
+    if candidate_url.endswith(".md") or candidate_url.endswith(".rst") or "raw" in candidate_url:
+        markdown = _trim_doc(text)
+        if markdown:
+            return markdown, "native_readme"
+    cleaned = _trim_doc(_clean_html_to_text(text))
+    if cleaned:
+        return cleaned, "native_web_snapshot"
+    return None
+
+
+def _fetch_first_candidate(candidates: List[str], timeout: int) -> Optional[Tuple[str, str, str]]:
+    """Return ``(url, content, fetch_source)`` for the first candidate, in order, that yields text.
+
+    Up to ``CANDIDATE_FETCH_CONCURRENCY`` candidates are in flight at once, so a miss
+    on an early URL does not cost a full round trip before the next one starts.
+    """
+    if not candidates:
+        return None
+    pool = ThreadPoolExecutor(max_workers=min(CANDIDATE_FETCH_CONCURRENCY, len(candidates)))
+    try:
+        remaining = iter(candidates)
+        in_flight: Deque[Tuple[str, Future]] = deque()
+        for candidate_url in remaining:
+            in_flight.append((candidate_url, pool.submit(_fetch_candidate, candidate_url, timeout)))
+            if len(in_flight) >= CANDIDATE_FETCH_CONCURRENCY:
+                break
+        while in_flight:
+            candidate_url, future = in_flight.popleft()
+            found = future.result()
+            if found:
+                return candidate_url, found[0], found[1]
+            next_url = next(remaining, None)
+            if next_url is not None:
+                in_flight.append((next_url, pool.submit(_fetch_candidate, next_url, timeout)))
+        return None
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 def fetch_repo_document(
     item: Dict[str, Any],
     timeout: int = 10,
@@ -195,36 +323,19 @@ def fetch_repo_document(
                 "duration_ms": duration_ms,
             }
 
-    for candidate_url in _readme_candidates(item):
-        try:
-            text = _http_get_text(candidate_url, timeout=timeout, headers={"User-Agent": "AntiHub/0.5"})
-        except urllib.error.HTTPError:
-            continue
-        except Exception:
-            continue
-        if candidate_url.endswith(".md") or candidate_url.endswith(".rst") or "raw" in candidate_url:
-            markdown = _trim_doc(text)
-            if markdown:
-                duration_ms = int((time.perf_counter() - started) * 1000)
-                record_timing_metric(name="recommend.deep_fetch.native_readme.latency_ms", duration_ms=duration_ms)
-                return {
-                    "content": markdown,
-                    "url": candidate_url,
-                    "fetch_source": "native_readme",
-                    "warnings": warnings,
-                    "duration_ms": duration_ms,
-                }
-        cleaned = _trim_doc(_clean_html_to_text(text))
-        if cleaned:
-            duration_ms = int((time.perf_counter() - started) * 1000)
-            record_timing_metric(name="recommend.deep_fetch.native_web.latency_ms", duration_ms=duration_ms)
-            return {
-                "content": cleaned,
-                "url": candidate_url,
-                "fetch_source": "native_web_snapshot",
-                "warnings": warnings,
-                "duration_ms": duration_ms,
-            }
+    found = _fetch_first_candidate(_readme_candidates(item), timeout=timeout)
+    if found:
+        candidate_url, content, fetch_source = found
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        metric = "native_readme" if fetch_source == "native_readme" else "native_web"
+        record_timing_metric(name=f"recommend.deep_fetch.{metric}.latency_ms", duration_ms=duration_ms)
+        return {
+            "content": content,
+            "url": candidate_url,
+            "fetch_source": fetch_source,
+            "warnings": warnings,
+            "duration_ms": duration_ms,
+        }
 
     warnings.append("document fetch failed")
     record_counter_metric(name="recommend.deep_fetch.failed", value=1)
@@ -248,7 +359,8 @@ def enrich_candidates_with_documents(
     if not candidates:
         return warnings
     picks = candidates[: max(1, min(int(top_n), len(candidates)))]
-    with ThreadPoolExecutor(max_workers=min(4, len(picks))) as pool:
+    # One worker per pick, capped at the HTTP pool size so every fetch can hold a pooled connection.
+    with ThreadPoolExecutor(max_workers=min(HTTP_POOL_SIZE, len(picks))) as pool:
         futures = {pool.submit(fetch_repo_document, item, timeout): item for item in picks}
         for future in as_completed(futures):
             item = futures[future]
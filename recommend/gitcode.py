@@ -1,15 +1,22 @@
 from __future__ import annotations
 
-import json
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
 from typing import Any, Dict, List, Optional, Tuple
 
-from config import GITCODE_API_BASE_URL, GITCODE_SEARCH_PATH, GITCODE_TOKEN, build_url_opener
+import orjson
+
+from config import GITCODE_API_BASE_URL, GITCODE_SEARCH_PATH, GITCODE_TOKEN
+from recommend.http_pool import client_for_url
+from recommend.ratelimit import ProviderRateLimiter
+from recommend.repo_fields import project_repo_items
+from recommend.ttl_cache import TTLCache
 from runtime_metrics import record_counter_metric, record_timing_metric
 
+_SEARCH_LIMITER = ProviderRateLimiter(rate_per_second=1.0, burst=10)
+_SEARCH_CACHE = TTLCache(max_entries=512, ttl_seconds=600)
+_HTML_PREFIXES = ("<!DOCTYPE html", "<!doctype html", "<html", "<HTML")
+
 
 class GitCodeAPIError(RuntimeError):
     def __init__(self, code: str, message: str) -> None:
@@ -36,30 +43,29 @@ def _request_json(url: str, token: Optional[str], timeout: int = 8) -> Any:
         # GitLab-compatible instances usually accept PRIVATE-TOKEN.
         headers["PRIVATE-TOKEN"] = token
         headers["Authorization"] = f"Bearer {token}"
-    request = urllib.request.Request(url, headers=headers)
-    opener = build_url_opener(url)
     started = time.perf_counter()
     try:
-        with opener.open(request, timeout=timeout) as resp:  # nosec B310
-            raw = resp.read().decode("utf-8", errors="replace")
-    except urllib.error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace") if exc.fp else str(exc)
-        record_counter_metric(name="recommend.provider.gitcode.http_error", value=1)
-        raise GitCodeAPIError("GITCODE_HTTP_ERROR", f"{exc.code} {detail}") from exc
+        resp = client_for_url(url).get(url, headers=headers, timeout=timeout)
     except Exception as exc:  # noqa: BLE001
         record_counter_metric(name="recommend.provider.gitcode.request_failed", value=1)
         raise GitCodeAPIError("GITCODE_REQUEST_FAILED", str(exc)) from exc
+    if resp.status_code >= 400:
+        raw = resp.content.decode("utf-8", errors="replace")
+        record_counter_metric(name="recommend.provider.gitcode.http_error", value=1)
+        raise GitCodeAPIError("GITCODE_HTTP_ERROR", f"{resp.status_code} {raw or resp.reason_phrase}")
     try:
-        return json.loads(raw)
+        parsed = orjson.loads(resp.content)
     except Exception as exc:  # noqa: BLE001
-        snippet = (raw or "").strip().replace("\n", " ")[:160]
-        if snippet.startswith("<!DOCTYPE html") or snippet.startswith("<html"):
+        snippet = resp.content[:200].decode("utf-8", errors="replace").lstrip()
+        if snippet.startswith(_HTML_PREFIXES):
             raise GitCodeAPIError(
                 "GITCODE_NON_JSON_RESPONSE",
                 "GitCode endpoint returned HTML (check API path/token/WAF), expected JSON.",
             ) from exc
         raise GitCodeAPIError("GITCODE_PARSE_FAILED", str(exc)) from exc
-    record_timing_metric(name="recommend.provider.gitcode.latency_ms", duration_ms=int((time.perf_counter() - started) * 1000))
+    finally:
+        # A 200 carrying a WAF/HTML page still took a full round-trip; time it too.
+        record_timing_metric(name="recommend.provider.gitcode.latency_ms", duration_ms=int((time.perf_counter() - started) * 1000))
     return parsed
 
 
@@ -85,12 +91,22 @@ def search_repositories(
     token = str(GITCODE_TOKEN or "").strip() or None
     encoded = urllib.parse.urlencode(params)
     url = f"{base}{search_path}?{encoded}"
-    payload = _request_json(url, token, timeout=timeout)
+    cached = _SEARCH_CACHE.get(url)
+    if cached is not None:
+        record_counter_metric(name="recommend.provider.gitcode.cache_hit", value=1)
+        return cached
+    if not _SEARCH_LIMITER.acquire(timeout):
+        record_counter_metric(name="recommend.provider.gitcode.rate_limited", value=1)
+        raise GitCodeAPIError("GITCODE_RATE_LIMIT", "search rate limit budget exhausted")
+    try:
+        payload = _request_json(url, token, timeout=timeout)
+    finally:
+        _SEARCH_LIMITER.release()
 
     items: List[Dict[str, Any]] = []
     meta: Dict[str, Any] = {}
     if isinstance(payload, list):
-        items = [dict(item) for item in payload if isinstance(item, dict)]
+        items = project_repo_items(payload)
         meta = {"total_count": len(items)}
     elif isinstance(payload, dict):
         raw_items = payload.get("items")
@@ -99,6 +115,7 @@ def search_repositories(
         if not isinstance(raw_items, list):
             raw_items = payload.get("projects")
         if isinstance(raw_items, list):
-            items = [dict(item) for item in raw_items if isinstance(item, dict)]
-        meta = dict(payload)
+            items = project_repo_items(raw_items)
+        meta = {key: value for key, value in payload.items() if value is not raw_items}
+    _SEARCH_CACHE.set(url, (items, meta))
     return items, meta
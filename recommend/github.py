@@ -1,14 +1,26 @@
-import json
 import os
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
 from typing import Any, Dict, List, Optional, Tuple
 
-from config import build_url_opener
+import orjson
+
+from recommend.http_pool import client_for_url
+from recommend.ratelimit import ProviderRateLimiter
+from recommend.repo_fields import project_repo_items
+from recommend.ttl_cache import TTLCache
 from runtime_metrics import record_counter_metric, record_timing_metric
 
+# Search API quota is 30 req/min with a token and 10 req/min without one;
+# burst + rate * 60 stays within it so a full bucket plus a minute of refill never overshoots.
+_SEARCH_QUOTA_PER_MINUTE = {True: 30, False: 10}
+_SEARCH_LIMITERS = {
+    True: ProviderRateLimiter(rate_per_second=0.4, burst=6),
+    False: ProviderRateLimiter(rate_per_second=0.1, burst=4),
+}
+_SEARCH_CACHE = TTLCache(max_entries=512, ttl_seconds=600)
+_REPO_CACHE = TTLCache(max_entries=512, ttl_seconds=3600)
+
 class GitHubAPIError(RuntimeError):
     def __init__(self, code: str, message: str) -> None:
         super().__init__(message)
@@ -22,6 +34,20 @@ def _token() -> Optional[str]:
     return token or None
 
 
+def _encoded_len(text: str) -> int:
+    return len(urllib.parse.quote(text))
+
+
+def _longest_encoded_prefix(text: str, budget: int) -> str:
+    """Longest prefix of ``text`` whose percent-encoded form fits ``budget`` (quote is per-char additive)."""
+    used = 0
+    for idx, ch in enumerate(text):
+        used += _encoded_len(ch)
+        if used > budget:
+            return text[:idx]
+    return text
+
+
 def _trim_search_query(query: str, max_encoded_chars: int = 220) -> str:
     """
     Keep GitHub Search API `q` within a safe length budget.
@@ -31,7 +57,7 @@ def _trim_search_query(query: str, max_encoded_chars: int = 220) -> str:
     """
 
     normalized = " ".join(str(query or "").split())
-    if len(urllib.parse.quote(normalized)) <= max_encoded_chars:
+    if _encoded_len(normalized) <= max_encoded_chars:
         return normalized
 
     suffix = ""
@@ -40,31 +66,29 @@ def _trim_search_query(query: str, max_encoded_chars: int = 220) -> str:
         suffix = searchable_suffix
         normalized = normalized[: -len(searchable_suffix)].strip()
 
-    suffix_encoded = len(urllib.parse.quote(suffix)) if suffix else 0
+    suffix_encoded = _encoded_len(suffix) if suffix else 0
     budget = max(1, max_encoded_chars - suffix_encoded)
-    tokens = [token for token in normalized.split(" ") if token]
+    separator_encoded = _encoded_len(" ")
     kept: list[str] = []
-    for token in tokens:
-        candidate = token if not kept else f"{' '.join(kept)} {token}"
-        if len(urllib.parse.quote(candidate)) > budget:
+    running_encoded = 0
+    for token in normalized.split(" "):
+        if not token:
+            continue
+        token_encoded = _encoded_len(token) + (separator_encoded if kept else 0)
+        if running_encoded + token_encoded > budget:
             break
         kept.append(token)
+        running_encoded += token_encoded
 
     trimmed = " ".join(kept).strip()
     if not trimmed:
         # Fallback for very long no-space tokens.
-        probe = normalized
-        while probe and len(urllib.parse.quote(probe)) > budget:
-            probe = probe[:-1]
-        trimmed = probe.strip()
+        trimmed = _longest_encoded_prefix(normalized, budget).strip()
 
-    if suffix and len(urllib.parse.quote(f"{trimmed}{suffix}")) <= max_encoded_chars:
+    if suffix and _encoded_len(f"{trimmed}{suffix}") <= max_encoded_chars:
         trimmed = f"{trimmed}{suffix}"
     if not trimmed:
-        probe = normalized
-        while probe and len(urllib.parse.quote(probe)) > max_encoded_chars:
-            probe = probe[:-1]
-        trimmed = probe.strip()
+        trimmed = _longest_encoded_prefix(normalized, max_encoded_chars).strip()
     return trimmed
 
 
@@ -76,29 +100,26 @@ def _request_json(url: str, token: Optional[str], timeout: int = 12) -> Dict[str
     }
     if token:
         headers["Authorization"] = f"Bearer {token}"
-    request = urllib.request.Request(url, headers=headers)
-    opener = build_url_opener(url)
     started = time.perf_counter()
     try:
-        with opener.open(request, timeout=timeout) as resp:  # nosec B310
-            raw = resp.read().decode("utf-8", errors="replace")
-    except urllib.error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace") if exc.fp else str(exc)
-        record_counter_metric(name="recommend.provider.github.http_error", value=1)
-        if exc.code == 403 and "rate limit" in detail.lower():
-            raise GitHubAPIError("GITHUB_RATE_LIMIT", detail) from exc
-        raise GitHubAPIError("GITHUB_HTTP_ERROR", f"{exc.code} {detail}") from exc
+        resp = client_for_url(url).get(url, headers=headers, timeout=timeout)
     except Exception as exc:
         record_counter_metric(name="recommend.provider.github.request_failed", value=1)
         raise GitHubAPIError("GITHUB_REQUEST_FAILED", str(exc)) from exc
+    if resp.status_code >= 400:
+        detail = resp.content.decode("utf-8", errors="replace") or resp.reason_phrase
+        record_counter_metric(name="recommend.provider.github.http_error", value=1)
+        if resp.status_code == 403 and "rate limit" in detail.lower():
+            raise GitHubAPIError("GITHUB_RATE_LIMIT", detail)
+        raise GitHubAPIError("GITHUB_HTTP_ERROR", f"{resp.status_code} {detail}")
     try:
-        parsed = json.loads(raw)
+        parsed = orjson.loads(resp.content)
     except Exception as exc:
         raise GitHubAPIError("GITHUB_PARSE_FAILED", str(exc)) from exc
     if not isinstance(parsed, dict):
         raise GitHubAPIError("GITHUB_PARSE_FAILED", "response payload is not an object")
     record_timing_metric(name="recommend.provider.github.latency_ms", duration_ms=int((time.perf_counter() - started) * 1000))
-    return dict(parsed)
+    return parsed
 
 
 def search_repositories(
@@ -116,11 +137,24 @@ def search_repositories(
         "https://api.github.com/search/repositories"
         f"?q={encoded}&sort=stars&order=desc&per_page={per_page}&page={page}"
     )
-    payload = _request_json(url, token, timeout=timeout)
-    items = payload.get("items") if isinstance(payload, dict) else None
-    if not isinstance(items, list):
-        return [], payload if isinstance(payload, dict) else {}
-    return items, payload
+    cache_key = (url, bool(token))
+    cached = _SEARCH_CACHE.get(cache_key)
+    if cached is not None:
+        record_counter_metric(name="recommend.provider.github.cache_hit", value=1)
+        return cached
+    limiter = _SEARCH_LIMITERS[bool(token)]
+    if not limiter.acquire(timeout):
+        record_counter_metric(name="recommend.provider.github.rate_limited", value=1)
+        raise GitHubAPIError("GITHUB_RATE_LIMIT", "search rate limit budget exhausted")
+    try:
+        payload = _request_json(url, token, timeout=timeout)
+    finally:
+        limiter.release()
+    raw_items = payload.get("items") if isinstance(payload, dict) else None
+    items = project_repo_items(raw_items) if isinstance(raw_items, list) else []
+    meta = {key: value for key, value in payload.items() if key != "items"} if isinstance(payload, dict) else {}
+    _SEARCH_CACHE.set(cache_key, (items, meta))
+    return items, meta
 
 
 def fetch_repo(full_name: str, timeout: int = 12) -> Dict[str, Any]:
@@ -128,5 +162,13 @@ def fetch_repo(full_name: str, timeout: int = 12) -> Dict[str, Any]:
         return {}
     token = _token()
     url = f"https://api.github.com/repos/{full_name}"
+    cache_key = (url, bool(token))
+    cached = _REPO_CACHE.get(cache_key)
+    if cached is not None:
+        record_counter_metric(name="recommend.provider.github.cache_hit", value=1)
+        return cached
     payload = _request_json(url, token, timeout=timeout)
-    return payload if isinstance(payload, dict) else {}
+    if not isinstance(payload, dict):
+        return {}
+    _REPO_CACHE.set(cache_key, payload)
+    return payload
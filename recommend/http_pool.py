@@ -0,0 +1,46 @@
+"""Shared keep-alive HTTP clients for outbound recommend traffic."""
+
+from __future__ import annotations
+
+import atexit
+import threading
+from typing import Dict
+
+import httpx
+
+from config import should_bypass_proxy
+
+HTTP_POOL_SIZE = 32
+
+_CLIENTS: Dict[bool, httpx.Client] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def client_for_url(url: str) -> httpx.Client:
+    """Return the pooled client matching ``url``'s proxy mode (see ``config.should_bypass_proxy``)."""
+    direct = should_bypass_proxy(url)
+    client = _CLIENTS.get(direct)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(direct)
+            if client is None:
+                client = httpx.Client(
+                    trust_env=not direct,
+                    follow_redirects=True,
+                    limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+                )
+                _CLIENTS[direct] = client
+    return client
+
+
+@atexit.register
+def close_clients() -> None:
+    """Close pooled connections so worker/API shutdown doesn't leave sockets for the GC."""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:  # noqa: BLE001
+            continue
@@ -1,49 +1,68 @@
+import hashlib
 import json
 import re
 import time
-import urllib.error
-import urllib.request
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
 
 from config import (
     RECOMMEND_LLM_MAX_TOKENS,
     RECOMMEND_LLM_TEMPERATURE,
-    build_url_opener,
 )
 from llm_registry import (
     anthropic_response_to_openai,
     openai_to_anthropic_payload,
-    provider_available,
     resolve_provider,
 )
+from recommend.http_pool import client_for_url
+from recommend.ttl_cache import TTLCache
 from runtime_metrics import record_counter_metric, record_timing_metric
 
+_RESPONSE_CACHE = TTLCache(max_entries=1024, ttl_seconds=3600)
+_PROMPT_CACHE = TTLCache(max_entries=1024, ttl_seconds=24 * 3600)
+_JSON_DECODER = json.JSONDecoder()
+_THINK_BLOCK_PATTERN = re.compile(r"<think>.*?</think>", re.IGNORECASE | re.DOTALL)
+
 
 class RecommendLLMError(RuntimeError):
     pass
 
 
+@lru_cache(maxsize=1)
+def _provider_state() -> Tuple[str, str, str, str, str]:
+    """Resolve the recommend provider once; the env it reads is only loaded at startup."""
+    return resolve_provider("recommend")
+
+
+def reset_provider_state() -> None:
+    """Forget the memoized provider resolution (tests, or after changing LLM env vars)."""
+    _provider_state.cache_clear()
+
+
 def llm_available() -> bool:
-    return provider_available("recommend")
+    _, api_key, *_ = _provider_state()
+    return bool(api_key)
 
 
 def _active_provider() -> str:
-    name, *_ = resolve_provider("recommend")
+    name, *_ = _provider_state()
     return name
 
 
 def _active_api_key() -> str:
-    _, api_key, *_ = resolve_provider("recommend")
+    _, api_key, *_ = _provider_state()
     return api_key
 
 
 def _active_base_url() -> str:
-    _, _, base_url, *_ = resolve_provider("recommend")
+    _, _, base_url, *_ = _provider_state()
     return base_url
 
 
 def _active_model(default: str) -> str:
-    _, _, _, model, _ = resolve_provider("recommend")
+    _, _, _, model, _ = _provider_state()
     return model or default
 
 
@@ -51,47 +70,107 @@ def _strip_think_blocks(text: str) -> str:
     raw = str(text or "")
     if not raw:
         return ""
-    return re.sub(r"<think>[\s\S]*?</think>", "", raw, flags=re.IGNORECASE).strip()
+    if "<" not in raw:
+        return raw.strip()
+    return _THINK_BLOCK_PATTERN.sub("", raw).strip()
 
 
 def _find_json_array_fragment(text: str) -> Optional[str]:
+    """Return the first substring that decodes as a JSON array, scanning ``[`` positions in order."""
     raw = str(text or "")
-    if not raw:
-        return None
-    start = -1
-    depth = 0
-    in_string = False
-    quote_char = ""
-    escaped = False
-    for idx, ch in enumerate(raw):
-        if in_string:
-            if escaped:
-                escaped = False
-                continue
-            if ch == "\\":
-                escaped = True
-                continue
-            if ch == quote_char:
-                in_string = False
-            continue
-        if ch in {'"', "'"}:
-            in_string = True
-            quote_char = ch
-            continue
-        if ch == "[":
-            if depth == 0:
-                start = idx
-            depth += 1
-            continue
-        if ch == "]" and depth > 0:
-            depth -= 1
-            if depth == 0 and start >= 0:
-                return raw[start : idx + 1]
+    idx = raw.find("[")
+    while idx >= 0:
+        try:
+            parsed, end = _JSON_DECODER.raw_decode(raw, idx)
+        except ValueError:
+            parsed, end = None, -1
+        if isinstance(parsed, list):
+            return raw[idx:end]
+        idx = raw.find("[", idx + 1)
     return None
 
 
+def _prompt_cache_key(metric_scope: str, provider: str, payload: Dict[str, Any]) -> str:
+    """Key completions by scope, provider and request, ignoring whitespace differences in message text."""
+    messages: List[Any] = []
+    for message in payload.get("messages") or []:
+        if isinstance(message, dict) and isinstance(message.get("content"), str):
+            message = {**message, "content": " ".join(message["content"].split())}
+        messages.append(message)
+    normalized = {**payload, "messages": messages}
+    blob = orjson.dumps([metric_scope, provider, normalized], option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _stream_delta_text(event: Any, api_format: str) -> str:
+    if not isinstance(event, dict):
+        return ""
+    if api_format == "anthropic":
+        delta = event.get("delta") if event.get("type") == "content_block_delta" else None
+        return str(delta.get("text") or "") if isinstance(delta, dict) else ""
+    choices = event.get("choices")
+    if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+        return ""
+    delta = choices[0].get("delta")
+    return str(delta.get("content") or "") if isinstance(delta, dict) else ""
+
+
+def _has_complete_json_array(text: str) -> bool:
+    lowered = text.lower()
+    if lowered.count("<think>") > lowered.count("</think>"):
+        return False
+    return _find_json_array_fragment(_strip_think_blocks(text)) is not None
+
+
+def _post_stream(url: str, body: bytes, headers: Dict[str, str], timeout: int, api_format: str) -> Any:
+    """POST a ``stream`` completion and stop reading once the text holds a complete JSON array.
+
+    Breaking out of the SSE loop closes the connection, so the model stops billing for
+    trailing commentary. Providers that ignore ``stream`` get their plain JSON body returned.
+    """
+    parts: List[str] = []
+    try:
+        with client_for_url(url).stream("POST", url, content=body, headers=headers, timeout=timeout) as resp:
+            if resp.status_code >= 400:
+                raw = resp.read().decode("utf-8", errors="replace")
+                raise RecommendLLMError(f"LLM request failed: {resp.status_code} {raw or resp.reason_phrase}")
+            if not str(resp.headers.get("content-type") or "").startswith("text/event-stream"):
+                parsed = orjson.loads(resp.read())
+                if api_format == "anthropic" and isinstance(parsed, dict):
+                    parsed = anthropic_response_to_openai(parsed)
+                return parsed
+            for line in resp.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    event = orjson.loads(data)
+                except orjson.JSONDecodeError:
+                    continue
+                delta = _stream_delta_text(event, api_format)
+                if not delta:
+                    continue
+                parts.append(delta)
+                if "]" in delta and _has_complete_json_array("".join(parts)):
+                    break
+    except RecommendLLMError:
+        raise
+    except orjson.JSONDecodeError as exc:
+        raise RecommendLLMError(f"LLM response parse failed: {exc}") from exc
+    except Exception as exc:
+        raise RecommendLLMError(f"LLM request failed: {exc}") from exc
+    return {
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": "".join(parts)}, "finish_reason": "stop"}
+        ]
+    }
+
+
 def _post(payload: Dict[str, Any], timeout: int = 25, metric_scope: str = "recommend.llm") -> Dict[str, Any]:
-    name, api_key, base_url, model, api_format = resolve_provider("recommend")
+    """Run a chat completion; payloads with ``stream`` set are read only up to the first complete JSON array."""
+    name, api_key, base_url, model, api_format = _provider_state()
     if not api_key:
         raise RecommendLLMError(
             "LLM API 密钥未配置。请设置 LLM_PROVIDER 及对应的 API Key 环境变量。"
@@ -104,8 +183,10 @@ def _post(payload: Dict[str, Any], timeout: int = 25, metric_scope: str = "recom
     # Build the HTTP request based on provider API format.
     if api_format == "anthropic":
         claude_payload = openai_to_anthropic_payload(request_payload)
+        if request_payload.get("stream"):
+            claude_payload["stream"] = True
         url = f"{base_url}/v1/messages"
-        body = json.dumps(claude_payload).encode("utf-8")
+        body = orjson.dumps(claude_payload)
         headers = {
             "Content-Type": "application/json",
             "x-api-key": api_key,
@@ -113,31 +194,41 @@ def _post(payload: Dict[str, Any], timeout: int = 25, metric_scope: str = "recom
         }
     else:
         url = f"{base_url}/chat/completions"
-        body = json.dumps(request_payload).encode("utf-8")
+        body = orjson.dumps(request_payload)
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}",
         }
 
-    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
-    opener = build_url_opener(url)
-    started = time.perf_counter()
-    try:
-        with opener.open(request, timeout=timeout) as resp:  # nosec B310
-            raw = resp.read().decode("utf-8", errors="replace")
-    except urllib.error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace") if exc.fp else str(exc)
-        raise RecommendLLMError(f"LLM request failed: {exc.code} {detail}") from exc
-    except Exception as exc:
-        raise RecommendLLMError(f"LLM request failed: {exc}") from exc
-    try:
-        parsed = json.loads(raw)
-    except Exception as exc:
-        raise RecommendLLMError(f"LLM response parse failed: {exc}") from exc
+    body_key = hashlib.sha256(url.encode("utf-8") + b"\n" + body).hexdigest()
+    cached = _RESPONSE_CACHE.get(body_key)
+    if cached is not None:
+        record_counter_metric(name=f"{metric_scope}.cache_hit", value=1)
+        return cached
+    prompt_key = _prompt_cache_key(metric_scope, name, request_payload)
+    cached = _PROMPT_CACHE.get(prompt_key)
+    if cached is not None:
+        record_counter_metric(name=f"{metric_scope}.normalized_cache_hit", value=1)
+        return cached
 
-    # Normalize Claude response to OpenAI format for downstream compatibility.
-    if api_format == "anthropic":
-        parsed = anthropic_response_to_openai(parsed)
+    started = time.perf_counter()
+    if request_payload.get("stream"):
+        parsed = _post_stream(url, body, headers, timeout, api_format)
+    else:
+        try:
+            resp = client_for_url(url).post(url, content=body, headers=headers, timeout=timeout)
+        except Exception as exc:
+            raise RecommendLLMError(f"LLM request failed: {exc}") from exc
+        if resp.status_code >= 400:
+            raw = resp.content.decode("utf-8", errors="replace")
+            raise RecommendLLMError(f"LLM request failed: {resp.status_code} {raw or resp.reason_phrase}")
+        try:
+            parsed = orjson.loads(resp.content)
+        except Exception as exc:
+            raise RecommendLLMError(f"LLM response parse failed: {exc}") from exc
+        # Normalize Claude response to OpenAI format for downstream compatibility.
+        if api_format == "anthropic":
+            parsed = anthropic_response_to_openai(parsed)
 
     if not isinstance(parsed, dict):
         raise RecommendLLMError("LLM response payload is not a JSON object")
@@ -151,6 +242,8 @@ def _post(payload: Dict[str, Any], timeout: int = 25, metric_scope: str = "recom
         record_counter_metric(name=f"{metric_scope}.tokens.total", value=total_tokens)
         record_counter_metric(name=f"{metric_scope}.tokens.prompt", value=prompt_tokens)
         record_counter_metric(name=f"{metric_scope}.tokens.completion", value=completion_tokens)
+    _RESPONSE_CACHE.set(body_key, parsed)
+    _PROMPT_CACHE.set(prompt_key, parsed)
     return dict(parsed)
 
 
@@ -234,63 +327,66 @@ def _extract_json_array(text: str) -> Optional[List[Any]]:
     return list(parsed)
 
 
-_INDUSTRY_NOISE_TERMS = {
-    "医院",
-    "医疗",
-    "医生",
-    "患者",
-    "学校",
-    "校园",
-    "老师",
-    "学生",
-    "社区",
-    "居民",
-    "政府",
-    "企业",
-    "客户",
-    "hospital",
-    "medical",
-    "doctor",
-    "patient",
-    "school",
-    "campus",
-    "teacher",
-    "student",
-}
+_INDUSTRY_NOISE_TERMS = frozenset(
+    {
+        "医院",
+        "医疗",
+        "医生",
+        "患者",
+        "学校",
+        "校园",
+        "老师",
+        "学生",
+        "社区",
+        "居民",
+        "政府",
+        "企业",
+        "客户",
+        "hospital",
+        "medical",
+        "doctor",
+        "patient",
+        "school",
+        "campus",
+        "teacher",
+        "student",
+    }
+)
+_QUERY_TERM_TECH_MARKERS = (
+    "watch",
+    "sync",
+    "service",
+    "filesystem",
+    "monitor",
+    "daemon",
+    "监控",
+    "同步",
+    "增量",
+    "后台",
+    "服务",
+    "监听",
+    "抓取",
+    "爬虫",
+    "队列",
+)
+_QUERY_TERM_LEAD_PATTERN = re.compile(r"^[\-\d\.\)\(、\s]+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
 
 
 def _clean_query_term(value: Any) -> str:
     text = str(value or "").strip()
     if not text:
         return ""
-    text = re.sub(r"^[\-\d\.\)\(、\s]+", "", text)
-    text = re.sub(r"\s+", " ", text).strip(" \t\r\n\"'`，,;；。")
+    text = _QUERY_TERM_LEAD_PATTERN.sub("", text)
+    text = _WHITESPACE_PATTERN.sub(" ", text).strip(" \t\r\n\"'`，,;；。")
     if len(text) < 2:
         return ""
     lowered = text.lower()
     if lowered in _INDUSTRY_NOISE_TERMS:
         return ""
-    if any(noise in lowered for noise in _INDUSTRY_NOISE_TERMS):
-        tech_markers = (
-            "watch",
-            "sync",
-            "service",
-            "filesystem",
-            "monitor",
-            "daemon",
-            "监控",
-            "同步",
-            "增量",
-            "后台",
-            "服务",
-            "监听",
-            "抓取",
-            "爬虫",
-            "队列",
-        )
-        if not any(marker in lowered or marker in text for marker in tech_markers):
-            return ""
-    if re.fullmatch(r"[\u4e00-\u9fff]{2,6}", text) and text in _INDUSTRY_NOISE_TERMS:
+    if any(noise in lowered for noise in _INDUSTRY_NOISE_TERMS) and not any(
+        marker in lowered for marker in _QUERY_TERM_TECH_MARKERS
+    ):
         return ""
     return text[:80]
 
@@ -326,6 +422,7 @@ def extract_search_queries(requirement_text: str) -> List[str]:
         ],
         "temperature": 0.1,
         "max_tokens": max(256, min(RECOMMEND_LLM_MAX_TOKENS, 512)),
+        "stream": True,
     }
     response = _post(payload, metric_scope="recommend.llm.query_rewrite")
     content = _extract_content(response)
@@ -385,6 +482,17 @@ def build_requirement_profile(requirement_text: str, query: str) -> Optional[Dic
     return _extract_json(content)
 
 
+def _condense_candidate(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a candidate onto the few fields the ranking/summary prompts need, with text capped."""
+    return {
+        "id": str(item.get("id") or ""),
+        "name": str(item.get("name") or item.get("full_name") or ""),
+        "description": str(item.get("description") or "")[:240],
+        "topics": [str(topic) for topic in (item.get("topics") or [])[:6]],
+        "language": str(item.get("language") or ""),
+    }
+
+
 def rank_candidates(
     requirement_summary: str,
     candidates: List[Dict[str, Any]],
@@ -392,6 +500,10 @@ def rank_candidates(
 ) -> Optional[Dict[str, Any]]:
     if not llm_available():
         return None
+    condensed = [
+        {**_condense_candidate(item), "stars": int(item.get("stars") or item.get("stargazers_count") or 0)}
+        for item in candidates
+    ]
     payload = {
         "model": _active_model("gpt-4o-mini"),
         "messages": [
@@ -410,7 +522,7 @@ def rank_candidates(
                     "  ]\n"
                     "}\n"
                     f"需求摘要：{requirement_summary}\n"
-                    f"候选仓库：{json.dumps(candidates, ensure_ascii=False)}\n"
+                    f"候选仓库：{orjson.dumps(condensed).decode('utf-8')}\n"
                     f"只返回前 {top_k} 条结果，score 越高越匹配。\n"
                 ),
             },
@@ -430,19 +542,14 @@ def summarize_findings(
 ) -> Optional[Dict[str, Any]]:
     if not llm_available():
         return None
-    condensed: List[Dict[str, Any]] = []
-    for item in candidates[:10]:
-        condensed.append(
-            {
-                "id": str(item.get("id") or ""),
-                "name": str(item.get("name") or item.get("full_name") or ""),
-                "source": str(item.get("source") or ""),
-                "description": str(item.get("description") or "")[:240],
-                "topics": [str(topic) for topic in (item.get("topics") or [])[:6]],
-                "language": str(item.get("language") or ""),
-                "match_score": int(item.get("match_score") or 0),
-            }
-        )
+    condensed = [
+        {
+            **_condense_candidate(item),
+            "source": str(item.get("source") or ""),
+            "match_score": int(item.get("match_score") or 0),
+        }
+        for item in candidates[:10]
+    ]
 
     payload = {
         "model": _active_model("gpt-4o-mini"),
@@ -463,7 +570,7 @@ def summarize_findings(
                     '  "insight_points": ["要点1(需包含项目名+匹配技术点)", "要点2"]\n'
                     "}\n"
                     f"需求：{requirement_summary}\n"
-                    f"候选：{json.dumps(condensed, ensure_ascii=False)}\n"
+                    f"候选：{orjson.dumps(condensed).decode('utf-8')}\n"
                     "请优先点评用户需求中的关键实现点（如文件监控、增量同步、Windows 后台服务）"
                     "分别由哪些项目满足，并给出简短依据。\n"
                     f"insight_points 不超过 {max(2, min(max_points, 8))} 条。\n"
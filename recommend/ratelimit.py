@@ -0,0 +1,45 @@
+"""In-process token buckets that keep provider search calls under upstream quotas."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class ProviderRateLimiter:
+    """Token bucket (``rate_per_second`` refill, ``burst`` capacity) plus a concurrency cap.
+
+    Tokens may go negative: a caller reserves the next token and sleeps until it
+    refills, so concurrent callers queue in arrival order instead of racing.
+    """
+
+    def __init__(self, *, rate_per_second: float, burst: int, max_concurrent: int = 5) -> None:
+        self.rate_per_second = max(0.001, float(rate_per_second))
+        self.burst = max(1, int(burst))
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._slots = threading.BoundedSemaphore(max(1, int(max_concurrent)))
+
+    def acquire(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for a token and a slot; ``release()`` must follow a True result."""
+        budget = max(0.0, float(timeout))
+        started = time.monotonic()
+        with self._lock:
+            elapsed = max(0.0, started - self._updated_at)
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate_per_second)
+            self._updated_at = max(self._updated_at, started)
+            wait_seconds = max(0.0, (1.0 - self._tokens) / self.rate_per_second)
+            if wait_seconds > budget:
+                return False
+            self._tokens -= 1.0
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+        if self._slots.acquire(timeout=max(0.0, budget - (time.monotonic() - started))):
+            return True
+        with self._lock:
+            self._tokens += 1.0
+        return False
+
+    def release(self) -> None:
+        self._slots.release()
@@ -0,0 +1,42 @@
+"""Projection of provider search hits onto the fields the recommend pipeline reads."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+# Every key ``recommend.service._normalize_repo_item`` looks at, across GitHub, Gitee and GitCode.
+REPO_ITEM_FIELDS = (
+    "id",
+    "full_name",
+    "path_with_namespace",
+    "name_with_owner",
+    "html_url",
+    "web_url",
+    "url",
+    "description",
+    "language",
+    "topics",
+    "tag_list",
+    "stargazers_count",
+    "stars_count",
+    "star_count",
+    "stars",
+    "forks_count",
+    "forks",
+    "open_issues_count",
+    "open_issues",
+    "license",
+    "archived",
+    "pushed_at",
+    "updated_at",
+    "last_activity_at",
+)
+
+
+def project_repo_items(raw_items: List[Any]) -> List[Dict[str, Any]]:
+    """Keep dict hits only, reduced to ``REPO_ITEM_FIELDS`` (owner objects, permissions and URL templates are dropped)."""
+    return [
+        {field: item[field] for field in REPO_ITEM_FIELDS if field in item}
+        for item in raw_items
+        if isinstance(item, dict)
+    ]
@@ -1,9 +1,12 @@
+import heapq
 import math
 import re
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from analyze.signals import sanitize_text
 from config import (
@@ -22,6 +25,7 @@ from recommend.deep_fetch import enrich_candidates_with_documents
 from recommend.gitee import GiteeAPIError
 from recommend.gitee import search_repositories as search_gitee_repositories
 from recommend.github import GitHubAPIError, fetch_repo, search_repositories
+from recommend.http_pool import HTTP_POOL_SIZE
 from recommend.llm import (
     build_requirement_profile,
     extract_search_queries,
@@ -39,6 +43,15 @@ from recommend.models import (
 )
 from templates_store import load_templates
 
+# Provider searches are blocking round-trips on the shared pooled clients; one
+# process-wide executor lets every query x provider pair run at once instead of
+# spinning up (and capping) a fresh pool per recommendation.
+_PROVIDER_EXECUTOR = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="recommend-search")
+
+# The LLM only returns top_k (<= 20) rows, so it never needs the whole recall pool;
+# larger pools are cut down by the keyword ranker before prompting.
+RERANK_CANDIDATE_LIMIT = 50
+
 CJK_SYNONYM_MAP: Dict[str, List[str]] = {
     "微信": ["wechat", "weixin", "mp-weixin"],
     "公众号": ["official-account", "wechat-official-account"],
@@ -57,6 +70,10 @@ SEMANTIC_GROUPS: Dict[str, List[str]] = {
     "aggregate": ["汇总", "聚合", "collection", "aggregator", "awesome"],
 }
 
+_SEMANTIC_GROUPS_LC: Dict[str, Tuple[str, ...]] = {
+    group: tuple(item.lower() for item in terms) for group, terms in SEMANTIC_GROUPS.items()
+}
+
 SEMANTIC_GROUP_LABELS: Dict[str, str] = {
     "wechat": "微信生态",
     "crawl": "采集抓取",
@@ -96,20 +113,40 @@ CN_STOPWORDS = {
     "需求",
 }
 
+_NOISE_TERM_PATTERN = re.compile(r"(keyword|kw)\d{1,5}")
+_CN_NOISE_TERM_PATTERN = re.compile(r"关键词\d{1,5}")
+_GITHUB_FULL_NAME_PATTERN = re.compile(r"github.com[:/](?P<owner>[^/]+)/(?P<repo>[^/]+)$")
+_CJK_CHAR_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+# ASCII tokens and CJK runs share no characters, so one alternation finds both in a single scan.
+_TERM_PATTERN = re.compile(r"([a-z0-9][a-z0-9_+#\.-]{1,31})|([\u4e00-\u9fff]{2,})")
+_LATIN_LETTER_PATTERN = re.compile(r"[a-z]", re.IGNORECASE)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# One alternation over every synonym key rejects the common no-hit text in a single scan.
+_CJK_SYNONYM_KEY_PATTERN = re.compile(
+    "|".join(re.escape(key) for key in sorted(CJK_SYNONYM_MAP, key=len, reverse=True))
+)
+
 
 def is_deep_search_mode(mode: str) -> bool:
     return str(mode or "").strip().lower() == "deep"
 
 
+# Scoring sanitizes the same query and candidate strings many times per round.
+@lru_cache(maxsize=4096)
+def _sanitize_cached(text: str) -> str:
+    return sanitize_text(text or "")
+
+
+@lru_cache(maxsize=2048)
 def _is_noise_term(term: str) -> bool:
     token = str(term or "").strip().lower()
     if not token:
         return True
     if token.isdigit():
         return True
-    if re.fullmatch(r"(keyword|kw)\d{1,5}", token):
+    if _NOISE_TERM_PATTERN.fullmatch(token):
         return True
-    if re.fullmatch(r"关键词\d{1,5}", token):
+    if _CN_NOISE_TERM_PATTERN.fullmatch(token):
         return True
     return False
 
@@ -133,7 +170,7 @@ def _parse_full_name(repo_url: str) -> Optional[str]:
     cleaned = repo_url.strip().rstrip("/")
     if cleaned.endswith(".git"):
         cleaned = cleaned[: -4]
-    match = re.search(r"github.com[:/](?P<owner>[^/]+)/(?P<repo>[^/]+)$", cleaned)
+    match = _GITHUB_FULL_NAME_PATTERN.search(cleaned)
     if not match:
         return None
     return f"{match.group('owner')}/{match.group('repo')}"
@@ -155,16 +192,16 @@ def _normalize_license(value: Any) -> Optional[str]:
     return None
 
 
-def _days_since(iso_time: Optional[str]) -> Optional[int]:
+def _days_since(iso_time: Optional[str], now: Optional[datetime] = None) -> Optional[int]:
+    """Whole days since ``iso_time``; pass ``now`` to reuse one clock reading across a batch."""
     if not iso_time:
         return None
     try:
         dt = datetime.fromisoformat(iso_time.replace("Z", "+00:00"))
     except Exception:
         return None
-    now = datetime.now(timezone.utc)
-    delta = now - dt
-    return max(0, int(delta.total_seconds() // 86400))
+    delta = (now or datetime.now(timezone.utc)) - dt
+    return max(0, delta.days)
 
 
 def _score_status(score: int) -> str:
@@ -268,14 +305,26 @@ def _compute_health_card(repo: Dict[str, Any]) -> RepoHealthCard:
     )
 
 
+@lru_cache(maxsize=2048)
 def _contains_cjk(text: str) -> bool:
-    return bool(re.search(r"[\u4e00-\u9fff]", text or ""))
+    return bool(_CJK_CHAR_PATTERN.search(text or ""))
+
 
+@lru_cache(maxsize=2048)
+def _synonym_keys_in(text: str) -> Tuple[str, ...]:
+    """CJK_SYNONYM_MAP keys contained in ``text``, in map order."""
+    if not _CJK_SYNONYM_KEY_PATTERN.search(text):
+        return ()
+    return tuple(key for key in CJK_SYNONYM_MAP if key in text)
 
-def _dedupe_keep_order(items: List[str]) -> List[str]:
+
+def _dedupe_keep_order(items: Iterable[str], limit: Optional[int] = None) -> List[str]:
+    """Case-insensitive dedupe; stops consuming ``items`` once ``limit`` values are kept."""
     seen: set[str] = set()
     result: List[str] = []
     for raw in items:
+        if limit is not None and len(result) >= limit:
+            break
         value = str(raw or "").strip()
         if not value:
             continue
@@ -287,116 +336,179 @@ def _dedupe_keep_order(items: List[str]) -> List[str]:
     return result
 
 
-def _extract_ascii_terms(text: str) -> List[str]:
-    terms: List[str] = []
-    for token in re.findall(r"[a-z0-9][a-z0-9_+#\.-]{1,31}", (text or "").lower()):
-        if token in EN_STOPWORDS:
-            continue
-        if len(token) < 2:
+@lru_cache(maxsize=2048)
+def _extract_terms(text: str) -> Tuple[str, ...]:
+    """ASCII terms followed by CJK terms (with synonym keys and edge bigrams), each deduped."""
+    ascii_terms: List[str] = []
+    cjk_terms: List[str] = []
+    for ascii_token, chunk in _TERM_PATTERN.findall((text or "").lower()):
+        if ascii_token:
+            if ascii_token not in EN_STOPWORDS:
+                ascii_terms.append(ascii_token)
             continue
-        terms.append(token)
-    return _dedupe_keep_order(terms)
+        if len(chunk) <= 14:
+            cjk_terms.append(chunk)
+        matched_keywords = _synonym_keys_in(chunk)
+        cjk_terms.extend(matched_keywords)
+        if not matched_keywords and len(chunk) >= 4:
+            cjk_terms.append(chunk[:2])
+            cjk_terms.append(chunk[-2:])
+    return tuple(_dedupe_keep_order(ascii_terms)) + tuple(
+        _dedupe_keep_order([term for term in cjk_terms if term not in CN_STOPWORDS])
+    )
 
 
-def _extract_cjk_terms(text: str) -> List[str]:
-    terms: List[str] = []
-    chunks = re.findall(r"[\u4e00-\u9fff]{2,}", text or "")
-    for chunk in chunks:
-        normalized = chunk.strip()
-        if not normalized:
-            continue
-        if len(normalized) <= 14:
-            terms.append(normalized)
-        matched_keyword = False
-        for keyword in CJK_SYNONYM_MAP.keys():
-            if keyword in normalized:
-                terms.append(keyword)
-                matched_keyword = True
-        if not matched_keyword and len(normalized) >= 4:
-            terms.append(normalized[:2])
-            terms.append(normalized[-2:])
-    return _dedupe_keep_order([term for term in terms if term not in CN_STOPWORDS])
-
-
-def _query_terms(text: str) -> List[str]:
-    raw = sanitize_text(text or "")
-    terms = _extract_ascii_terms(raw) + _extract_cjk_terms(raw)
-    expanded: List[str] = []
+def _expand_query_terms(terms: Iterable[str]) -> Iterator[str]:
+    """Non-noise terms, each followed by the English synonyms of any CJK keyword it contains."""
     for term in terms:
         if _is_noise_term(term):
             continue
-        expanded.append(term)
-        for key, synonyms in CJK_SYNONYM_MAP.items():
-            if key in term:
-                expanded.extend(synonyms)
-    return _dedupe_keep_order([item for item in expanded if not _is_noise_term(item)])[:24]
+        yield term
+        for key in _synonym_keys_in(term):
+            for synonym in CJK_SYNONYM_MAP[key]:
+                if not _is_noise_term(synonym):
+                    yield synonym
 
 
-def _candidate_terms(text: str) -> List[str]:
-    raw = sanitize_text(text or "")
-    terms = _extract_ascii_terms(raw) + _extract_cjk_terms(raw)
-    return _dedupe_keep_order(terms)[:32]
+# Ranking re-tokenizes the same query once per candidate, so the tokenizers are
+# memoized per process; they return tuples so a cached result cannot be mutated.
+@lru_cache(maxsize=2048)
+def _query_terms(text: str) -> Tuple[str, ...]:
+    raw = _sanitize_cached(text or "")
+    return tuple(_dedupe_keep_order(_expand_query_terms(_extract_terms(raw)), limit=24))
+
+
+@lru_cache(maxsize=2048)
+def _candidate_terms(text: str) -> Tuple[str, ...]:
+    raw = _sanitize_cached(text or "")
+    terms = _extract_terms(raw)
+    return tuple(_dedupe_keep_order(terms, limit=32))
+
+
+@lru_cache(maxsize=1024)
+def _active_groups(query: str) -> Tuple[str, ...]:
+    """Semantic groups named by the query text or by its expanded terms."""
+    query_text = _sanitize_cached(query or "").lower()
+    query_terms = set(item.lower() for item in _query_terms(query))
+    return tuple(
+        group
+        for group, terms in _SEMANTIC_GROUPS_LC.items()
+        if any(item in query_text for item in terms) or any(item in query_terms for item in terms)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _must_groups(query: str) -> Tuple[str, ...]:
+    query_text = _sanitize_cached(query or "").lower()
+    return tuple(
+        group for group, terms in _SEMANTIC_GROUPS_LC.items() if any(item in query_text for item in terms)
+    )
+
+
+@dataclass(frozen=True)
+class _QueryContext:
+    """Query-side scoring inputs, built once per query instead of once per candidate."""
+
+    terms: Tuple[str, ...]
+    terms_lc: Tuple[str, ...]
+    term_set: frozenset[str]
+    precision_terms: Tuple[str, ...]
+    phrase: str
+    active_groups: Tuple[str, ...]
+    must_groups: Tuple[str, ...]
+
+
+@lru_cache(maxsize=256)
+def _query_context(query: str) -> _QueryContext:
+    terms = _query_terms(query)
+    return _QueryContext(
+        terms=terms,
+        terms_lc=tuple(term.lower() for term in terms),
+        term_set=frozenset(term.lower() for term in terms),
+        precision_terms=tuple(term.lower() for term in terms if len(term) >= 3),
+        phrase=_sanitize_cached(query or "").strip().lower(),
+        active_groups=_active_groups(query),
+        must_groups=_must_groups(query),
+    )
+
+
+def _candidate_term_set(candidate: str) -> set[str]:
+    return set(item.lower() for item in _candidate_terms(candidate))
+
+
+def _candidate_context(candidate: str) -> Tuple[str, set[str]]:
+    return _sanitize_cached(candidate or "").lower(), _candidate_term_set(candidate)
+
+
+def _matched_query_terms(ctx: _QueryContext, candidate_text: str, candidate_terms: set[str]) -> set[str]:
+    """Lowercased query terms found in the candidate: exact term hits first, substring checks for the rest."""
+    matched = candidate_terms.intersection(ctx.term_set)
+    matched.update(term for term in ctx.term_set - matched if term in candidate_text)
+    return matched
+
+
+def _collect_match_terms_ctx(
+    ctx: _QueryContext,
+    candidate_text: str,
+    candidate_terms: set[str],
+    max_items: int = 5,
+) -> List[str]:
+    matched = _matched_query_terms(ctx, candidate_text, candidate_terms)
+    hits = [term for term, normalized in zip(ctx.terms, ctx.terms_lc) if len(normalized) >= 2 and normalized in matched]
+    return _dedupe_keep_order(hits)[:max_items]
 
 
 def _collect_match_terms(query: str, candidate: str, max_items: int = 5) -> List[str]:
-    query_terms = _query_terms(query)
-    if not query_terms:
+    ctx = _query_context(query)
+    if not ctx.terms:
         return []
-    candidate_terms = set(item.lower() for item in _candidate_terms(candidate))
-    candidate_text = sanitize_text(candidate or "").lower()
-    hits: List[str] = []
-    for term in query_terms:
-        normalized = term.lower()
-        if len(normalized) < 2:
-            continue
-        if normalized in candidate_terms or normalized in candidate_text:
-            hits.append(term)
-    return _dedupe_keep_order(hits)[:max_items]
+    candidate_text, candidate_terms = _candidate_context(candidate)
+    return _collect_match_terms_ctx(ctx, candidate_text, candidate_terms, max_items)
 
 
-def _semantic_group_coverage(query: str, candidate: str) -> Tuple[int, int, List[str]]:
-    query_text = sanitize_text(query or "").lower()
-    candidate_text = sanitize_text(candidate or "").lower()
-    query_terms = set(item.lower() for item in _query_terms(query))
+def _semantic_group_coverage_ctx(ctx: _QueryContext, candidate_text: str) -> Tuple[int, int, List[str]]:
+    hit_groups = [
+        group for group in ctx.active_groups if any(item in candidate_text for item in _SEMANTIC_GROUPS_LC[group])
+    ]
+    return len(hit_groups), len(ctx.active_groups), hit_groups
 
-    active_groups: List[str] = []
-    hit_groups: List[str] = []
-    for group, terms in SEMANTIC_GROUPS.items():
-        lowered_terms = [item.lower() for item in terms]
-        is_active = any(item in query_text for item in lowered_terms) or any(
-            item in query_terms for item in lowered_terms
-        )
-        if not is_active:
-            continue
-        active_groups.append(group)
-        if any(item in candidate_text for item in lowered_terms):
-            hit_groups.append(group)
 
-    return len(hit_groups), len(active_groups), hit_groups
+def _semantic_group_coverage(query: str, candidate: str) -> Tuple[int, int, List[str]]:
+    return _semantic_group_coverage_ctx(_query_context(query), _sanitize_cached(candidate or "").lower())
 
 
 def _query_must_groups(query: str) -> List[str]:
-    query_text = sanitize_text(query or "").lower()
-    must: List[str] = []
-    for group, terms in SEMANTIC_GROUPS.items():
-        if any(item.lower() in query_text for item in terms):
-            must.append(group)
-    return _dedupe_keep_order(must)
+    return list(_must_groups(query))
 
 
 def _is_community_query(query: str) -> bool:
-    lowered = sanitize_text(query or "").lower()
+    lowered = _sanitize_cached(query or "").lower()
     return any(alias.lower() in lowered for alias in COMMUNITY_QUERY_ALIASES)
 
 
-def _precision_score(query: str, item: Dict[str, Any]) -> int:
-    query_terms = [term.lower() for term in _query_terms(query) if len(term) >= 3]
+def _summary_text_lc(item: Dict[str, Any]) -> str:
+    prelowered = item.get("_summary_lc")
+    if prelowered is not None:
+        return prelowered
+    return _sanitize_cached(str(item.get("summary") or "")).lower()
+
+
+def _precision_texts(item: Dict[str, Any]) -> Tuple[str, str]:
+    name_text = item.get("_name_lc")
+    desc_text = item.get("_desc_lc")
+    if name_text is None or desc_text is None:
+        topics = item.get("topics") or []
+        topics_text = " ".join(str(topic) for topic in topics if str(topic).strip())
+        name_text = _sanitize_cached(f"{item.get('full_name') or ''} {topics_text}").lower()
+        desc_text = _sanitize_cached(str(item.get("description") or "")).lower()
+    return name_text, desc_text
+
+
+def _precision_score_ctx(ctx: _QueryContext, item: Dict[str, Any]) -> int:
+    query_terms = ctx.precision_terms
     if not query_terms:
         return 0
-    topics = item.get("topics") or []
-    topics_text = " ".join(str(topic) for topic in topics if str(topic).strip())
-    name_text = sanitize_text(f"{item.get('full_name') or ''} {topics_text}").lower()
-    desc_text = sanitize_text(str(item.get("description") or "")).lower()
+    name_text, desc_text = _precision_texts(item)
 
     name_hits = 0
     desc_hits = 0
@@ -410,101 +522,187 @@ def _precision_score(query: str, item: Dict[str, Any]) -> int:
     return max(0, min(100, int(round(min(1.0, raw) * 100))))
 
 
-def _simple_similarity(query: str, candidate: str) -> int:
-    query_tokens = _query_terms(query)
-    if not query_tokens:
+def _precision_score(query: str, item: Dict[str, Any]) -> int:
+    return _precision_score_ctx(_query_context(query), item)
+
+
+def _similarity_cap(group_hit_count: int, group_total: int, missing_must_count: int) -> float:
+    """Ceiling on the blended similarity when core semantic groups are missing from the candidate."""
+    cap = 1.0
+    if group_total >= 3 and group_hit_count <= 1:
+        cap = 0.34
+    elif group_total >= 2 and group_hit_count <= 1:
+        cap = 0.46
+    if missing_must_count >= 3:
+        cap = min(cap, 0.22)
+    elif missing_must_count >= 2:
+        cap = min(cap, 0.35)
+    elif missing_must_count == 1:
+        cap = min(cap, 0.62)
+    return cap
+
+
+def _simple_similarity_ctx(
+    ctx: _QueryContext,
+    candidate_text: str,
+    candidate_terms: set[str],
+    coverage: Tuple[int, int, List[str]],
+) -> int:
+    if not ctx.terms:
         return 0
-    candidate_tokens = set(item.lower() for item in _candidate_terms(candidate))
-    candidate_text = sanitize_text(candidate or "").lower()
-    overlap = sum(
-        1 for token in query_tokens if token.lower() in candidate_tokens or token.lower() in candidate_text
-    )
-    lexical_coverage = overlap / max(1, len(query_tokens))
-    group_hit_count, group_total, hit_groups = _semantic_group_coverage(query, candidate)
-    must_groups = _query_must_groups(query)
-    missing_must = [group for group in must_groups if group not in hit_groups]
+    # Query terms are deduped case-insensitively, so each matched term counts once.
+    overlap = len(_matched_query_terms(ctx, candidate_text, candidate_terms))
+    lexical_coverage = overlap / max(1, len(ctx.terms))
+    group_hit_count, group_total, hit_groups = coverage
+    missing_must = [group for group in ctx.must_groups if group not in hit_groups]
     semantic_coverage = (group_hit_count / group_total) if group_total else 0.0
-    phrase = sanitize_text(query or "").strip().lower()
+    phrase = ctx.phrase
     phrase_bonus = 0.0
     if phrase and len(phrase) >= 4 and phrase in candidate_text:
         phrase_bonus = 0.18
     blended = lexical_coverage * 0.62 + semantic_coverage * 0.38 + phrase_bonus
-    if group_total >= 3 and group_hit_count <= 1:
-        blended = min(blended, 0.34)
-    elif group_total >= 2 and group_hit_count <= 1:
-        blended = min(blended, 0.46)
-    if len(missing_must) >= 3:
-        blended = min(blended, 0.22)
-    elif len(missing_must) >= 2:
-        blended = min(blended, 0.35)
-    elif len(missing_must) == 1:
-        blended = min(blended, 0.62)
+    blended = min(blended, _similarity_cap(group_hit_count, group_total, len(missing_must)))
     score = int(round(min(1.0, blended) * 100))
     return max(0, min(100, score))
 
 
+def _simple_similarity(query: str, candidate: str) -> int:
+    ctx = _query_context(query)
+    if not ctx.terms:
+        return 0
+    candidate_text, candidate_terms = _candidate_context(candidate)
+    coverage = _semantic_group_coverage_ctx(ctx, candidate_text)
+    return _simple_similarity_ctx(ctx, candidate_text, candidate_terms, coverage)
+
+
+@dataclass(frozen=True)
+class _FallbackScore:
+    item: Dict[str, Any]
+    score: int
+    similarity: int
+    precision: int
+    stars: int
+    group_hit_count: int
+    group_total: int
+    hit_groups: List[str]
+    missing_must: List[str]
+    candidate_text: str
+    candidate_terms: set[str]
+
+
+def _score_fallback_candidate(
+    ctx: _QueryContext,
+    item: Dict[str, Any],
+    floor: Optional[int] = None,
+) -> Optional[_FallbackScore]:
+    """Score one candidate, or return None when it cannot beat ``floor`` (the current K-th best score)."""
+    summary = item.get("summary") or ""
+    candidate_text = _summary_text_lc(item)
+    coverage = _semantic_group_coverage_ctx(ctx, candidate_text)
+    group_hit_count, group_total, hit_groups = coverage
+    missing_must = [group for group in ctx.must_groups if group not in hit_groups]
+    stars = int(item.get("stars") or 0)
+    star_score = min(100, int(math.log10(stars + 1) * 30))
+    group_score = int(round((group_hit_count / max(1, group_total)) * 100))
+    semantic_penalty = 0
+    if group_total >= 3 and group_hit_count <= 1:
+        semantic_penalty = 26
+    elif group_total >= 2 and group_hit_count <= 1:
+        semantic_penalty = 16
+    semantic_penalty += len(missing_must) * 9
+    if floor is not None:
+        # Group coverage alone bounds the score; ties keep the earlier candidate, so <= is safe to drop.
+        max_similarity = round(_similarity_cap(group_hit_count, group_total, len(missing_must)) * 100)
+        max_precision = 100 if ctx.precision_terms else 0
+        best_case = (
+            int(round(max_similarity * 0.72 + max_precision * 0.16 + group_score * 0.10 + star_score * 0.02))
+            - semantic_penalty
+        )
+        if best_case <= floor:
+            return None
+    candidate_terms = _candidate_term_set(summary)
+    similarity = _simple_similarity_ctx(ctx, candidate_text, candidate_terms, coverage)
+    precision = _precision_score_ctx(ctx, item)
+    source_penalty = 8 if str(item.get("source") or "") == "templates" and similarity < 30 else 0
+    if precision < 14 and similarity >= 55:
+        semantic_penalty += 12
+    # Keyword relevance is the primary ranking signal.
+    score = max(
+        0,
+        int(round(similarity * 0.72 + precision * 0.16 + group_score * 0.10 + star_score * 0.02))
+        - source_penalty
+        - semantic_penalty,
+    )
+    return _FallbackScore(
+        item=item,
+        score=score,
+        similarity=similarity,
+        precision=precision,
+        stars=stars,
+        group_hit_count=group_hit_count,
+        group_total=group_total,
+        hit_groups=hit_groups,
+        missing_must=missing_must,
+        candidate_text=candidate_text,
+        candidate_terms=candidate_terms,
+    )
+
+
+def _fallback_ranked_row(ctx: _QueryContext, scored: _FallbackScore) -> Dict[str, Any]:
+    hit_terms = (
+        _collect_match_terms_ctx(ctx, scored.candidate_text, scored.candidate_terms) if ctx.terms else []
+    )
+    reasons: List[str] = []
+    if hit_terms:
+        reasons.append(f"命中关键词：{', '.join(hit_terms[:4])}")
+    if scored.hit_groups:
+        labels = [SEMANTIC_GROUP_LABELS.get(name, name) for name in scored.hit_groups]
+        reasons.append(f"语义覆盖：{', '.join(labels[:3])}")
+    if scored.precision >= 18:
+        reasons.append("仓库名/主题词命中较高")
+    elif scored.similarity >= 20:
+        reasons.append("与需求存在弱关键词重叠")
+    else:
+        reasons.append("关键词命中较弱，建议人工复核")
+    if scored.stars > 100:
+        reasons.append("社区热度较高")
+    risks: List[str] = []
+    if scored.similarity < 18:
+        risks.append("与输入关键词的直接重合较弱，请人工复核。")
+    if scored.group_total >= 2 and scored.group_hit_count <= 1:
+        risks.append("仅覆盖了部分核心语义（微信/采集/情报/汇总），建议人工确认。")
+    if scored.missing_must:
+        missing_labels = [SEMANTIC_GROUP_LABELS.get(name, name) for name in scored.missing_must[:3]]
+        risks.append(f"未覆盖关键语义：{', '.join(missing_labels)}。")
+    return {
+        "id": scored.item.get("id"),
+        "score": scored.score,
+        "reasons": reasons,
+        "tags": ["关键词匹配", "社区热度" if scored.stars > 100 else "基础排序"],
+        "risks": risks,
+    }
+
+
 def _fallback_rank(candidates: List[Dict[str, Any]], query: str, top_k: int) -> List[Dict[str, Any]]:
-    ranked: List[Dict[str, Any]] = []
+    if top_k <= 0:
+        return []
+    ctx = _query_context(query)
+    # Score every candidate first; reasons and risks are only worth building for the rows we keep.
+    # A min-heap of the best top_k scores so far lets the long tail skip tokenization entirely.
+    best_scores: List[int] = []
+    scored: List[_FallbackScore] = []
     for item in candidates:
-        summary = item.get("summary") or ""
-        similarity = _simple_similarity(query, summary)
-        hit_terms = _collect_match_terms(query, summary)
-        group_hit_count, group_total, hit_groups = _semantic_group_coverage(query, summary)
-        must_groups = _query_must_groups(query)
-        missing_must = [group for group in must_groups if group not in hit_groups]
-        precision = _precision_score(query, item)
-        stars = int(item.get("stars") or 0)
-        star_score = min(100, int(math.log10(stars + 1) * 30))
-        group_score = int(round((group_hit_count / max(1, group_total)) * 100))
-        source_penalty = 8 if str(item.get("source") or "") == "templates" and similarity < 30 else 0
-        semantic_penalty = 0
-        if group_total >= 3 and group_hit_count <= 1:
-            semantic_penalty = 26
-        elif group_total >= 2 and group_hit_count <= 1:
-            semantic_penalty = 16
-        semantic_penalty += len(missing_must) * 9
-        if precision < 14 and similarity >= 55:
-            semantic_penalty += 12
-        # Keyword relevance is the primary ranking signal.
-        score = max(
-            0,
-            int(round(similarity * 0.72 + precision * 0.16 + group_score * 0.10 + star_score * 0.02))
-            - source_penalty
-            - semantic_penalty,
-        )
-        reasons: List[str] = []
-        if hit_terms:
-            reasons.append(f"命中关键词：{', '.join(hit_terms[:4])}")
-        if hit_groups:
-            labels = [SEMANTIC_GROUP_LABELS.get(name, name) for name in hit_groups]
-            reasons.append(f"语义覆盖：{', '.join(labels[:3])}")
-        if precision >= 18:
-            reasons.append("仓库名/主题词命中较高")
-        elif similarity >= 20:
-            reasons.append("与需求存在弱关键词重叠")
-        else:
-            reasons.append("关键词命中较弱，建议人工复核")
-        if stars > 100:
-            reasons.append("社区热度较高")
-        risks: List[str] = []
-        if similarity < 18:
-            risks.append("与输入关键词的直接重合较弱，请人工复核。")
-        if group_total >= 2 and group_hit_count <= 1:
-            risks.append("仅覆盖了部分核心语义（微信/采集/情报/汇总），建议人工确认。")
-        if missing_must:
-            missing_labels = [SEMANTIC_GROUP_LABELS.get(name, name) for name in missing_must[:3]]
-            risks.append(f"未覆盖关键语义：{', '.join(missing_labels)}。")
-        ranked.append(
-            {
-                "id": item.get("id"),
-                "score": score,
-                "reasons": reasons,
-                "tags": ["关键词匹配", "社区热度" if stars > 100 else "基础排序"],
-                "risks": risks,
-            }
-        )
-    ranked.sort(key=lambda x: x.get("score") or 0, reverse=True)
-    return ranked[:top_k]
+        floor = best_scores[0] if len(best_scores) >= top_k else None
+        row = _score_fallback_candidate(ctx, item, floor)
+        if row is None:
+            continue
+        scored.append(row)
+        if len(best_scores) < top_k:
+            heapq.heappush(best_scores, row.score)
+        elif row.score > best_scores[0]:
+            heapq.heapreplace(best_scores, row.score)
+    top = heapq.nlargest(top_k, scored, key=lambda row: row.score)
+    return [_fallback_ranked_row(ctx, row) for row in top]
 
 
 def _provider_specs() -> List[Tuple[str, Callable[..., Tuple[List[Dict[str, Any]], Dict[str, Any]]], str]]:
@@ -518,7 +716,7 @@ def _provider_specs() -> List[Tuple[str, Callable[..., Tuple[List[Dict[str, Any]
     return specs
 
 
-def _normalize_repo_item(item: Dict[str, Any], source: str) -> Dict[str, Any]:
+def _normalize_repo_item(item: Dict[str, Any], source: str, now: Optional[datetime] = None) -> Dict[str, Any]:
     full_name = str(
         item.get("full_name")
         or item.get("path_with_namespace")
@@ -543,7 +741,7 @@ def _normalize_repo_item(item: Dict[str, Any], source: str) -> Dict[str, Any]:
     license_name = _normalize_license(item.get("license"))
     archived = item.get("archived")
     pushed_at = item.get("pushed_at") or item.get("updated_at") or item.get("last_activity_at")
-    updated_days = _days_since(pushed_at)
+    updated_days = _days_since(pushed_at, now)
     summary = " ".join(
         [
             full_name,
@@ -554,7 +752,7 @@ def _normalize_repo_item(item: Dict[str, Any], source: str) -> Dict[str, Any]:
     ).strip()
     normalized_id = f"{source}:{full_name or html_url or str(item.get('id') or '')}".strip(":")
 
-    return {
+    normalized = {
         "id": normalized_id,
         "full_name": full_name,
         "html_url": html_url,
@@ -572,6 +770,11 @@ def _normalize_repo_item(item: Dict[str, Any], source: str) -> Dict[str, Any]:
         "summary": summary,
         "source": source,
     }
+    # Lowercased scoring text is derived once here instead of by every scorer; the
+    # underscore keys are never copied into RepoRecommendation.
+    normalized["_summary_lc"] = _sanitize_cached(summary).lower()
+    normalized["_name_lc"], normalized["_desc_lc"] = _precision_texts(normalized)
+    return normalized
 
 
 def _emit_trace(
@@ -598,28 +801,26 @@ def _search_provider_parallel(
 ) -> List[Tuple[str, str, List[Dict[str, Any]], Optional[Exception]]]:
     if not provider_specs:
         return []
-    max_workers = max(1, min(4, len(provider_specs)))
     futures: Dict[Any, Tuple[str, str]] = {}
     results: List[Tuple[str, str, List[Dict[str, Any]], Optional[Exception]]] = []
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        for source_name, provider_fn, provider_label in provider_specs:
-            future = pool.submit(
-                provider_fn,
-                query_item,
-                per_page,
-                1,
-                timeout,
-            )
-            futures[future] = (source_name, provider_label)
-        for future in as_completed(futures):
-            source_name, provider_label = futures[future]
-            try:
-                items, _ = future.result()
-            except Exception as exc:  # noqa: BLE001
-                results.append((source_name, provider_label, [], exc))
-                continue
-            safe_items = [dict(item) for item in (items or []) if isinstance(item, dict)]
-            results.append((source_name, provider_label, safe_items, None))
+    for source_name, provider_fn, provider_label in provider_specs:
+        future = _PROVIDER_EXECUTOR.submit(
+            provider_fn,
+            query_item,
+            per_page,
+            1,
+            timeout,
+        )
+        futures[future] = (source_name, provider_label)
+    for future in as_completed(futures):
+        source_name, provider_label = futures[future]
+        try:
+            items, _ = future.result()
+        except Exception as exc:  # noqa: BLE001
+            results.append((source_name, provider_label, [], exc))
+            continue
+        safe_items = [item for item in (items or []) if isinstance(item, dict)]
+        results.append((source_name, provider_label, safe_items, None))
     return results
 
 
@@ -777,13 +978,12 @@ def _build_search_queries(
 
     base_for_expand = normalized_query or base_query
     expanded_terms = _query_terms(base_for_expand)
-    english_terms = [item for item in expanded_terms if re.search(r"[a-z]", item, re.IGNORECASE)]
+    english_terms = [item for item in expanded_terms if _LATIN_LETTER_PATTERN.search(item)]
     cjk_terms = [item for item in expanded_terms if _contains_cjk(item)]
     expanded_query = ""
     prioritized_english: List[str] = []
-    for key, synonyms in CJK_SYNONYM_MAP.items():
-        if key in base_for_expand:
-            prioritized_english.extend(synonyms[:1])
+    for key in _synonym_keys_in(base_for_expand):
+        prioritized_english.extend(CJK_SYNONYM_MAP[key][:1])
     if english_terms:
         selected_english = _dedupe_keep_order(prioritized_english + english_terms)[:7]
         selected_cjk = _dedupe_keep_order(cjk_terms)[:2]
@@ -812,7 +1012,7 @@ def _normalize_rewritten_queries(raw_queries: List[str]) -> List[str]:
         value = sanitize_text(str(item or "")).strip()
         if not value:
             continue
-        value = re.sub(r"\s+", " ", value).strip()
+        value = _WHITESPACE_PATTERN.sub(" ", value).strip()
         if len(value) < 2:
             continue
         trimmed = value[:96]
@@ -836,6 +1036,21 @@ def _is_long_requirement_input(normalized_query: str, requirement_text: str) ->
     return combined_len > 100
 
 
+def _rewrite_source_text(normalized_query: str, requirement_text: str) -> str:
+    rewrite_text_parts = [str(normalized_query or "").strip(), str(requirement_text or "").strip()]
+    return "\n".join([part for part in rewrite_text_parts if part]).strip()
+
+
+def _prefetch_query_rewrite(mode: str, normalized_query: str, requirement_text: str) -> Optional["Future[List[str]]"]:
+    """Start the LLM query rewrite early; it does not depend on the requirement profile."""
+    if not _should_rewrite_queries(mode, normalized_query, requirement_text):
+        return None
+    rewrite_source_text = _rewrite_source_text(normalized_query, requirement_text)
+    if not rewrite_source_text:
+        return None
+    return _PROVIDER_EXECUTOR.submit(extract_search_queries, rewrite_source_text)
+
+
 def _resolve_search_queries(
     *,
     mode: str,
@@ -846,15 +1061,18 @@ def _resolve_search_queries(
     warnings: List[str],
     trace_steps: List[str],
     progress_callback: Optional[Callable[[str], None]],
+    prefetched_rewrite: Optional["Future[List[str]]"] = None,
 ) -> List[str]:
     should_rewrite = _should_rewrite_queries(mode, normalized_query, requirement_text)
     long_requirement = _is_long_requirement_input(normalized_query, requirement_text)
-    rewrite_text_parts = [str(normalized_query or "").strip(), str(requirement_text or "").strip()]
-    rewrite_source_text = "\n".join([part for part in rewrite_text_parts if part]).strip()
+    rewrite_source_text = _rewrite_source_text(normalized_query, requirement_text)
     if should_rewrite and rewrite_source_text:
         _emit_trace(trace_steps, progress_callback, "启动需求拆解：提取可用于开源检索的技术实现词...")
         try:
-            rewritten = extract_search_queries(rewrite_source_text)
+            if prefetched_rewrite is not None:
+                rewritten = prefetched_rewrite.result()
+            else:
+                rewritten = extract_search_queries(rewrite_source_text)
             rewritten_queries = _normalize_rewritten_queries([str(item) for item in rewritten])
             if rewritten_queries:
                 preview = " | ".join(rewritten_queries[:3])
@@ -895,27 +1113,27 @@ def _search_multi_query_provider_parallel(
         return []
     futures: Dict[Any, Tuple[int, str, str, str]] = {}
     results: List[Tuple[int, str, str, str, List[Dict[str, Any]], Optional[Exception]]] = []
-    with ThreadPoolExecutor(max_workers=max(1, min(12, len(search_queries) * len(provider_specs)))) as pool:
-        for idx, query_item in enumerate(search_queries):
-            query_per_page = max(6, int(per_page_base / (idx + 1)))
-            for source_name, provider_fn, provider_label in provider_specs:
-                future = pool.submit(
-                    provider_fn,
-                    query_item,
-                    query_per_page,
-                    1,
-                    timeout,
-                )
-                futures[future] = (idx, query_item, source_name, provider_label)
-        for future in as_completed(futures):
-            idx, query_item, source_name, provider_label = futures[future]
-            try:
-                items, _ = future.result()
-            except Exception as exc:  # noqa: BLE001
-                results.append((idx, query_item, source_name, provider_label, [], exc))
-                continue
-            safe_items = [dict(item) for item in (items or []) if isinstance(item, dict)]
-            results.append((idx, query_item, source_name, provider_label, safe_items, None))
+    for idx, query_item in enumerate(search_queries):
+        query_per_page = max(6, int(per_page_base / (idx + 1)))
+        for source_name, provider_fn, provider_label in provider_specs:
+            future = _PROVIDER_EXECUTOR.submit(
+                provider_fn,
+                query_item,
+                query_per_page,
+                1,
+                timeout,
+            )
+            futures[future] = (idx, query_item, source_name, provider_label)
+    for future in as_completed(futures):
+        idx, query_item, source_name, provider_label = futures[future]
+        try:
+            items, _ = future.result()
+        except Exception as exc:  # noqa: BLE001
+            results.append((idx, query_item, source_name, provider_label, [], exc))
+            continue
+        # Providers hand back freshly parsed (or cache deep-copied) dicts that callers may own outright.
+        safe_items = [item for item in (items or []) if isinstance(item, dict)]
+        results.append((idx, query_item, source_name, provider_label, safe_items, None))
     return results
 
 
@@ -936,6 +1154,7 @@ def recommend_repositories(
     citations: List[RecommendationCitation] = []
 
     _emit_trace(trace_steps, progress_callback, "解析输入并提取关键词画像...")
+    prefetched_rewrite = _prefetch_query_rewrite(mode, normalized_query, requirement_text)
     try:
         profile, search_query, summary = _build_profile(requirement_text, normalized_query)
     except Exception as exc:
@@ -958,6 +1177,7 @@ def recommend_repositories(
         warnings=warnings,
         trace_steps=trace_steps,
         progress_callback=progress_callback,
+        prefetched_rewrite=prefetched_rewrite,
     )
     _emit_trace(
         trace_steps,
@@ -997,6 +1217,8 @@ def recommend_repositories(
         timeout=RECOMMEND_PROVIDER_TIMEOUT_SECONDS,
         provider_specs=provider_specs,
     )
+    # datetime.now() costs more than parsing pushed_at, so the whole recall pool shares one reading.
+    collected_at = datetime.now(timezone.utc)
     for _idx, _query_item, source_name, provider_label, items, error in search_results:
         if error is not None:
             if source_name in warned_providers:
@@ -1006,7 +1228,7 @@ def recommend_repositories(
             warnings.append(str(getattr(error, "message", error)))
             continue
         for item in items:
-            normalized_item = _normalize_repo_item(item, source=source_name)
+            normalized_item = _normalize_repo_item(item, source=source_name, now=collected_at)
             repo_id = str(normalized_item.get("id") or "")
             if not repo_id or repo_id in seen_candidate_ids:
                 continue
@@ -1031,6 +1253,7 @@ def recommend_repositories(
                     "topics": item.get("tags") or item.get("dimensions") or [],
                 },
                 source="templates",
+                now=collected_at,
             )
             normalized_id = str(normalized_item.get("id") or "")
             if not normalized_id or normalized_id in seen_candidate_ids:
@@ -1065,23 +1288,31 @@ def recommend_repositories(
             recommendations=[],
         )
 
-    candidate_summaries = [
-        {
-            "id": item["id"],
-            "name": item["full_name"],
-            "description": item["description"],
-            "topics": item["topics"],
-            "language": item["language"],
-            "stars": item["stars"],
-        }
-        for item in candidates
-    ]
-
     # Product requirement: keep result set >= 10 (if candidate pool allows).
     top_k = max(10, min(int(limit or RECOMMEND_TOP_K), 20))
     ranking = None
     _emit_trace(trace_steps, progress_callback, "开始关键词优先排序与语义重排...")
     if llm_available():
+        rerank_pool = candidates
+        if len(candidates) > RERANK_CANDIDATE_LIMIT:
+            shortlist = {
+                row["id"]
+                for row in _fallback_rank(
+                    candidates, summary or normalized_query or requirement_text, RERANK_CANDIDATE_LIMIT
+                )
+            }
+            rerank_pool = [item for item in candidates if item["id"] in shortlist]
+        candidate_summaries = [
+            {
+                "id": item["id"],
+                "name": item["full_name"],
+                "description": item["description"],
+                "topics": item["topics"],
+                "language": item["language"],
+                "stars": item["stars"],
+            }
+            for item in rerank_pool
+        ]
         try:
             ranking = rank_candidates(summary or normalized_query or requirement_text[:120], candidate_summaries, top_k)
         except Exception:
@@ -1098,6 +1329,8 @@ def recommend_repositories(
         query_for_score = " ".join(search_queries[:5])
     else:
         query_for_score = summary or normalized_query or requirement_text
+    score_ctx = _query_context(query_for_score)
+    must_groups = list(score_ctx.must_groups)
     sorted_candidates: List[Dict[str, Any]] = []
     for item in ranked_items:
         repo_id = item.get("id")
@@ -1107,10 +1340,12 @@ def recommend_repositories(
         if not match:
             continue
         summary_text = str(match.get("summary") or "")
-        lexical_score = _simple_similarity(query_for_score, summary_text)
-        precision_score = _precision_score(query_for_score, match)
-        group_hit_count, group_total, hit_groups = _semantic_group_coverage(query_for_score, summary_text)
-        must_groups = _query_must_groups(query_for_score)
+        candidate_text = _summary_text_lc(match)
+        candidate_terms = _candidate_term_set(summary_text)
+        coverage = _semantic_group_coverage_ctx(score_ctx, candidate_text)
+        lexical_score = _simple_similarity_ctx(score_ctx, candidate_text, candidate_terms, coverage)
+        precision_score = _precision_score_ctx(score_ctx, match)
+        group_hit_count, group_total, hit_groups = coverage
         missing_must = [group for group in must_groups if group not in hit_groups]
         must_coverage = int(round((len(must_groups) - len(missing_must)) / max(1, len(must_groups)) * 100))
         model_score = int(item.get("score") or 0)
@@ -1139,7 +1374,9 @@ def recommend_repositories(
         if missing_must:
             final_score = max(0, final_score - len(missing_must) * 8)
 
-        hit_terms = _collect_match_terms(query_for_score, summary_text)
+        hit_terms = (
+            _collect_match_terms_ctx(score_ctx, candidate_text, candidate_terms) if score_ctx.terms else []
+        )
         reasons = [str(r) for r in (item.get("reasons") or []) if str(r).strip()]
         if hit_terms:
             reasons.insert(0, f"命中关键词：{', '.join(hit_terms[:4])}")
@@ -1188,8 +1425,7 @@ def recommend_repositories(
         hard_groups = [group for group in must_groups if group in {"wechat", "crawl"}]
         filtered_candidates: List[Dict[str, Any]] = []
         for item in sorted_candidates:
-            summary_text = str(item.get("summary") or "")
-            _, _, hit_groups = _semantic_group_coverage(query_for_score, summary_text)
+            _, _, hit_groups = _semantic_group_coverage_ctx(score_ctx, _summary_text_lc(item))
             if any(group not in hit_groups for group in hard_groups):
                 continue
             if len(hit_groups) >= min_group_hits and int(item.get("match_score") or 0) >= 12:
@@ -1204,8 +1440,7 @@ def recommend_repositories(
                     item_id = str(item.get("id") or "")
                     if not item_id or item_id in seen_ids:
                         continue
-                    summary_text = str(item.get("summary") or "")
-                    _, _, hit_groups = _semantic_group_coverage(query_for_score, summary_text)
+                    _, _, hit_groups = _semantic_group_coverage_ctx(score_ctx, _summary_text_lc(item))
                     if any(group not in hit_groups for group in hard_groups):
                         continue
                     if int(item.get("keyword_score") or 0) < 24:
@@ -1223,7 +1458,7 @@ def recommend_repositories(
             if _is_community_query(query_for_score):
                 relaxed: List[Dict[str, Any]] = []
                 for item in pre_guardrail_candidates:
-                    text = sanitize_text(str(item.get("summary") or "")).lower()
+                    text = _summary_text_lc(item)
                     if not any(alias.lower() in text for alias in COMMUNITY_QUERY_ALIASES):
                         continue
                     relaxed.append(item)
@@ -0,0 +1,44 @@
+"""Small bounded in-process TTL cache for provider and LLM responses."""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after ``ttl_seconds``; the oldest entry is evicted when full.
+
+    Values are deep-copied on the way in and out so callers can mutate what they get back.
+    """
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl_seconds:
+                self._entries.pop(key, None)
+                return None
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        frozen = copy.deepcopy(value)
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)), None)
+            self._entries[key] = (time.monotonic(), frozen)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -374,6 +374,25 @@ type LogEntry = {
   line: string;
 };
 
+const toLogEntry = (data: unknown, fallbackLine: string): LogEntry => {
+  const parsed: LogEntry = {
+    ts: Date.now() / 1000,
+    stream: "system",
+    level: "INFO",
+    line: fallbackLine,
+  };
+  if (!data || typeof data !== "object") {
+    return parsed;
+  }
+  const item = data as Partial<LogEntry>;
+  return {
+    ts: item.ts ?? parsed.ts,
+    stream: item.stream ?? parsed.stream,
+    level: item.level ?? parsed.level,
+    line: item.line ?? parsed.line,
+  };
+};
+
 type Toast = {
   type: "success" | "error";
   message: string;
@@ -7072,30 +7091,20 @@ function LogPanel({
       scheduleReconnect();
     };
     ws.onmessage = (event) => {
-      let parsed: LogEntry = {
-        ts: Date.now() / 1000,
-        stream: "system",
-        level: "INFO",
-        line: String(event.data || ""),
-      };
+      const raw = String(event.data || "");
+      let incoming: LogEntry[];
       try {
-        const data = JSON.parse(event.data as string);
-        if (data && typeof data === "object") {
-          parsed = {
-            ts: data.ts ?? parsed.ts,
-            stream: data.stream ?? parsed.stream,
-            level: data.level ?? parsed.level,
-            line: data.line ?? parsed.line,
-          };
+        const data = JSON.parse(raw);
+        if (data && typeof data === "object" && data.type === "backlog" && Array.isArray(data.entries)) {
+          incoming = data.entries.map((item: unknown) => toLogEntry(item, ""));
+        } else {
+          incoming = [toLogEntry(data, raw)];
         }
       } catch (err) {
-        parsed = {
-          ...parsed,
-          line: String(event.data || ""),
-        };
+        incoming = [toLogEntry(null, raw)];
       }
       setLogs((prev) => {
-        const next = [...prev, parsed];
+        const next = prev.concat(incoming);
         if (next.length > 2000) {
           return next.slice(-2000);
         }
@@ -3,11 +3,13 @@ import json
 import re
 import time
 from collections import defaultdict
+from collections.abc import AsyncIterator
 from contextlib import contextmanager
 from datetime import datetime, timezone
 from threading import Lock
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterable, List, Union
 
+import orjson
 import redis
 import redis.asyncio as redis_async
 from sqlalchemy import Float, Integer, String, Text, delete, func, select
@@ -19,12 +21,14 @@ from config import (
     CASE_PREFIX,
     CASE_STORE_BACKEND,
     CASE_STORE_DATABASE_URL,
+    LOG_JSONL_CACHE_TTL_SECONDS,
     LOG_LIST_PREFIX,
     LOG_RETENTION_LINES,
     MANUAL_META_PREFIX,
     MANUAL_PREFIX,
     MANUAL_STATS_KEY,
     MANUAL_STATUS_PREFIX,
+    REDIS_ASYNC_MAX_CONNECTIONS,
     REDIS_DISABLED,
     REDIS_URL,
     VISUAL_LOCK_PREFIX,
@@ -45,6 +49,8 @@ BEARER_PATTERN = re.compile(r"(?i)\bBearer\s+([A-Za-z0-9._\-~+/]+=*)")
 SK_PATTERN = re.compile(r"\bsk-[A-Za-z0-9_\-]{6,}\b")
 JWT_PATTERN = re.compile(r"\beyJ[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+\b")
 
+RUNTIME_FIELD_PREFIX = "runtime."
+
 USE_MEMORY_STORE = REDIS_DISABLED or str(REDIS_URL).startswith("memory://")
 USE_DB_CASE_STORE = CASE_STORE_BACKEND in {"database", "db", "sql", "sqlalchemy"}
 _MEM_CASES: Dict[str, Dict[str, Any]] = {}
@@ -54,6 +60,7 @@ _MEM_MANUAL_META: Dict[str, Dict[str, Any]] = {}
 _MEM_MANUAL_STATUS: Dict[str, Dict[str, Any]] = {}
 _MEM_STATS: Dict[str, int] = {}
 _MEM_LOCKS: Dict[str, float] = {}
+_MEM_LOG_JSONL: Dict[str, tuple[float, str]] = {}
 
 
 class RuntimeStoreBase(DeclarativeBase):
@@ -110,6 +117,11 @@ class _MemoryPubSub:
         await asyncio.sleep(0)
         return None
 
+    async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        # Nothing is ever published in memory mode; park until the caller is cancelled.
+        await asyncio.Event().wait()
+        yield {}
+
     async def unsubscribe(self, *_args: Any, **_kwargs: Any) -> None:
         return None
 
@@ -124,6 +136,9 @@ class _MemoryAsyncRedis:
     async def close(self) -> None:
         return None
 
+    async def aclose(self) -> None:
+        return None
+
 
 def _utc_ts() -> float:
     return datetime.now(timezone.utc).timestamp()
@@ -229,17 +244,23 @@ def _publish_log_payload(case_id: str, payload: Dict[str, Any]) -> None:
         client.publish(log_channel(case_id), json.dumps(payload, ensure_ascii=False))
     except Exception:
         return
-
+
 def get_redis_client() -> redis.Redis:
     if USE_MEMORY_STORE:
         raise RuntimeError("redis disabled")
     return redis.Redis.from_url(REDIS_URL, decode_responses=True)
 
 
-def get_async_redis_client() -> redis_async.Redis:
+def get_async_redis_client(max_connections: int | None = None) -> redis_async.Redis:
     if USE_MEMORY_STORE:
         return _MemoryAsyncRedis()  # type: ignore[return-value]
-    return redis_async.Redis.from_url(REDIS_URL, decode_responses=True)
+    if max_connections is None:
+        return redis_async.Redis.from_url(REDIS_URL, decode_responses=True)
+    return redis_async.Redis.from_url(REDIS_URL, decode_responses=True, max_connections=max_connections)
+
+
+def build_shared_async_redis_client() -> redis_async.Redis:
+    return get_async_redis_client(max_connections=REDIS_ASYNC_MAX_CONNECTIONS)
 
 
 def set_case(case_id: str, data: Dict[str, Any]) -> None:
@@ -249,8 +270,7 @@ def set_case(case_id: str, data: Dict[str, Any]) -> None:
     if USE_MEMORY_STORE:
         _MEM_CASES[case_id] = dict(data)
         return
-    client = get_redis_client()
-    client.hset(f"{CASE_PREFIX}{case_id}", mapping=_encode_data(data))
+    _redis_write_case(get_redis_client(), case_id, data)
 
 
 def update_case(case_id: str, data: Dict[str, Any]) -> None:
@@ -266,8 +286,40 @@ def update_case(case_id: str, data: Dict[str, Any]) -> None:
     if USE_MEMORY_STORE:
         _MEM_CASES.setdefault(case_id, {}).update(data)
         return
+    _redis_write_case(get_redis_client(), case_id, data)
+
+
+def update_case_runtime(
+    case_id: str,
+    runtime: Dict[str, Any],
+    data: Dict[str, Any] | None = None,
+) -> None:
+    """Merge ``runtime`` fields into the case without rewriting the whole runtime dict.
+
+    Redis stores each runtime field as its own ``runtime.<field>`` hash entry, so this
+    is a single HSET with no read-modify-write on the caller side.
+    """
+    data = dict(data or {})
+    data["updated_at"] = time.time()
+    if USE_DB_CASE_STORE:
+        existing = get_case(case_id) or {}
+        merged_runtime = existing.get("runtime")
+        merged_runtime = dict(merged_runtime) if isinstance(merged_runtime, dict) else {}
+        merged_runtime.update(runtime)
+        existing.update(data)
+        existing["runtime"] = merged_runtime
+        _db_set_kv("case", case_id, json.dumps(existing, ensure_ascii=False))
+        return
+    if USE_MEMORY_STORE:
+        case = _MEM_CASES.setdefault(case_id, {})
+        case.update(data)
+        current = case.get("runtime")
+        case["runtime"] = {**current, **runtime} if isinstance(current, dict) else dict(runtime)
+        return
+    mapping = _encode_data(data)
+    mapping.update(_encode_runtime_fields(runtime))
     client = get_redis_client()
-    client.hset(f"{CASE_PREFIX}{case_id}", mapping=_encode_data(data))
+    client.hset(f"{CASE_PREFIX}{case_id}", mapping=mapping)
 
 
 def get_case(case_id: str) -> Dict[str, Any] | None:
@@ -289,7 +341,51 @@ def get_case(case_id: str) -> Dict[str, Any] | None:
     raw = client.hgetall(f"{CASE_PREFIX}{case_id}")
     if not raw:
         return None
-    return {key: json.loads(value) for key, value in raw.items()}
+    return _decode_case_fields(raw)
+
+
+def get_case_fields(case_id: str, fields: Iterable[str]) -> Dict[str, Any] | None:
+    """Load only ``fields`` of a case; ``runtime.<field>`` selects a single runtime entry.
+
+    Returns ``None`` when the case does not exist; fields that are not set are omitted.
+    """
+    wanted = list(dict.fromkeys(fields))
+    if USE_DB_CASE_STORE or USE_MEMORY_STORE:
+        data = get_case(case_id)
+        if data is None:
+            return None
+        return _select_case_fields(data, wanted)
+    key = f"{CASE_PREFIX}{case_id}"
+    fetch = list(wanted)
+    if "runtime" not in fetch and any(field.startswith(RUNTIME_FIELD_PREFIX) for field in fetch):
+        # Cases written before runtime was flattened keep it as a single JSON field.
+        fetch.append("runtime")
+    pipe = get_redis_client().pipeline()
+    pipe.exists(key)
+    if fetch:
+        pipe.hmget(key, fetch)
+    results = pipe.execute()
+    if not results[0]:
+        return None
+    values = results[1] if fetch else []
+    raw = {field: value for field, value in zip(fetch, values) if value is not None}
+    return _decode_case_fields(raw)
+
+
+def _select_case_fields(data: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    selected: Dict[str, Any] = {}
+    runtime = data.get("runtime") if isinstance(data.get("runtime"), dict) else {}
+    selected_runtime: Dict[str, Any] = {}
+    for field in fields:
+        if field.startswith(RUNTIME_FIELD_PREFIX):
+            runtime_key = field[len(RUNTIME_FIELD_PREFIX) :]
+            if runtime_key in runtime:
+                selected_runtime[runtime_key] = runtime[runtime_key]
+        elif field in data:
+            selected[field] = data[field]
+    if selected_runtime:
+        selected["runtime"] = {**selected.get("runtime", {}), **selected_runtime}
+    return selected
 
 
 def list_case_ids() -> List[str]:
@@ -361,6 +457,47 @@ def log_channel(case_id: str) -> str:
     return f"{WS_LOG_CHANNEL_PREFIX}{case_id}"
 
 
+def _log_jsonl_cache_key(case_id: str, offset: int, limit: int) -> str:
+    # Kept out of CASE_PREFIX: list_case_ids() scans that prefix and expects only case hashes.
+    return f"{LOG_LIST_PREFIX}{case_id}:jsonl:{offset}:{limit}"
+
+
+def get_cached_logs_jsonl(case_id: str, offset: int, limit: int) -> str | None:
+    if LOG_JSONL_CACHE_TTL_SECONDS <= 0:
+        return None
+    key = _log_jsonl_cache_key(case_id, offset, limit)
+    if USE_MEMORY_STORE:
+        cached = _MEM_LOG_JSONL.get(key)
+        if not cached:
+            return None
+        expires_at, payload = cached
+        if expires_at <= time.time():
+            _MEM_LOG_JSONL.pop(key, None)
+            return None
+        return payload
+    try:
+        return get_redis_client().get(key)
+    except Exception:
+        return None
+
+
+def cache_logs_jsonl(case_id: str, offset: int, limit: int, payload: str) -> None:
+    if LOG_JSONL_CACHE_TTL_SECONDS <= 0:
+        return
+    key = _log_jsonl_cache_key(case_id, offset, limit)
+    if USE_MEMORY_STORE:
+        now = time.time()
+        expired = [item for item, (expires_at, _) in _MEM_LOG_JSONL.items() if expires_at <= now]
+        for item in expired:
+            _MEM_LOG_JSONL.pop(item, None)
+        _MEM_LOG_JSONL[key] = (now + LOG_JSONL_CACHE_TTL_SECONDS, payload)
+        return
+    try:
+        get_redis_client().set(key, payload, ex=LOG_JSONL_CACHE_TTL_SECONDS)
+    except Exception:
+        return
+
+
 def acquire_analyze_lock(cache_key: str, ttl_seconds: int) -> bool:
     if USE_MEMORY_STORE:
         return _memory_lock(f"{ANALYZE_LOCK_PREFIX}{cache_key}", ttl_seconds)
@@ -399,6 +536,52 @@ def _encode_data(data: Dict[str, Any]) -> Dict[str, str]:
     return {key: json.dumps(value) for key, value in data.items()}
 
 
+def _encode_runtime_fields(runtime: Dict[str, Any]) -> Dict[str, str]:
+    return {f"{RUNTIME_FIELD_PREFIX}{key}": json.dumps(value) for key, value in runtime.items()}
+
+
+def _encode_case_fields(data: Dict[str, Any]) -> Dict[str, str]:
+    runtime = data.get("runtime")
+    if not isinstance(runtime, dict):
+        return _encode_data(data)
+    encoded = _encode_data({key: value for key, value in data.items() if key != "runtime"})
+    encoded.update(_encode_runtime_fields(runtime))
+    return encoded
+
+
+def _decode_case_fields(raw: Dict[str, str]) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {}
+    runtime: Dict[str, Any] = {}
+    for key, value in raw.items():
+        if key.startswith(RUNTIME_FIELD_PREFIX):
+            runtime[key[len(RUNTIME_FIELD_PREFIX) :]] = json.loads(value)
+        else:
+            payload[key] = json.loads(value)
+    if runtime:
+        legacy = payload.get("runtime")
+        payload["runtime"] = {**legacy, **runtime} if isinstance(legacy, dict) else runtime
+    return payload
+
+
+def _redis_write_case(client: redis.Redis, case_id: str, data: Dict[str, Any]) -> None:
+    key = f"{CASE_PREFIX}{case_id}"
+    mapping = _encode_case_fields(data)
+    if not isinstance(data.get("runtime"), dict):
+        client.hset(key, mapping=mapping)
+        return
+    # A full runtime dict replaces the previous one: drop flattened fields it no longer carries.
+    stale = [
+        field
+        for field in client.hkeys(key)
+        if field == "runtime" or (field.startswith(RUNTIME_FIELD_PREFIX) and field not in mapping)
+    ]
+    pipe = client.pipeline()
+    if stale:
+        pipe.hdel(key, *stale)
+    pipe.hset(key, mapping=mapping)
+    pipe.execute()
+
+
 def set_manual(case_id: str, markdown: str, meta: Dict[str, Any]) -> None:
     if USE_DB_CASE_STORE:
         _db_set_kv("manual", case_id, str(markdown or ""))
@@ -545,7 +728,7 @@ def _decode_log_entry(raw: LogRaw) -> Dict[str, Any]:
         payload: Dict[str, Any] = dict(raw)
     else:
         try:
-            payload = json.loads(raw)
+            payload = orjson.loads(raw)
         except Exception:
             payload = {"line": str(raw)}
 
@@ -236,7 +236,7 @@ def test_report_response_redacts_secret(tmp_path: Path, monkeypatch: pytest.Monk
 
     case_payload = {"repo_url": repo_url, "commit_sha": commit_sha}
     monkeypatch.setattr(main, "get_case", lambda case_id: case_payload)
-    monkeypatch.setattr(main, "ReportStore", lambda: store)
+    monkeypatch.setattr(main, "_REPORT_STORE", store)
 
     response = client.get("/cases/c_demo/report")
     assert response.status_code == 200
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import manual_generator
+
+
+def test_parse_readme_collects_summary_and_bullets_in_one_pass() -> None:
+    readme = "\n".join(
+        [
+            "[![Build](https://img.shields.io/x.svg)](https://x)",
+            "# Demo",
+            "",
+            "- not a summary",
+            "",
+            "First paragraph",
+            "continues   here.",
+            "",
+            "## Features",
+            "- Fast",
+            "1. Numbered",
+            "- Fast",
+        ]
+    )
+    info = manual_generator._parse_readme(readme)
+    assert info["title"] == "Demo"
+    assert info["summary"] == "First paragraph continues here."
+    assert info["headings"] == ["Features"]
+    assert info["bullets"] == ["not a summary", "Fast", "Numbered"]
+
+
+def test_parse_pyproject_reads_only_dependency_tables(tmp_path) -> None:
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        "\n".join(
+            [
+                "[project]",
+                'name = "demo"',
+                "dependencies = [",
+                '  "Flask>=1",',
+                '  "uvicorn[standard]>=0.2",',
+                "]",
+                "",
+                "[project.optional-dependencies]",
+                'dev = ["pytest"]',
+                "",
+                "[tool.poetry.dependencies]",
+                'python = "^3.11"',
+                'fastapi = "^0.110"',
+                "",
+                "[tool.ruff]",
+                'select = ["E"]',
+            ]
+        ),
+        encoding="utf-8",
+    )
+    assert manual_generator._parse_pyproject(pyproject) == ["Flask", "uvicorn", "pytest", "fastapi"]
+
+
+def test_parse_pyproject_ignores_environment_markers(tmp_path) -> None:
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        "\n".join(
+            [
+                "[project]",
+                'dependencies = ["httpx>=0.27", "tomli; python_version < \'3.11\'"]',
+                "",
+                "[project.optional-dependencies]",
+                "test = [",
+                "  \"pytest-asyncio ; python_version >= '3.8'\",",
+                "]",
+            ]
+        ),
+        encoding="utf-8",
+    )
+    assert manual_generator._parse_pyproject(pyproject) == ["httpx", "tomli", "pytest-asyncio"]
+
+
+def test_generate_manual_reuses_analysis_for_same_commit(monkeypatch, tmp_path) -> None:
+    (tmp_path / "README.md").write_text("# Demo\n\nA demo repo.\n", encoding="utf-8")
+    calls = []
+    analyze = manual_generator._analyze_repo
+
+    def _counting_analyze(*args, **kwargs):
+        calls.append(args)
+        return analyze(*args, **kwargs)
+
+    monkeypatch.setattr(manual_generator, "_analyze_repo", _counting_analyze)
+    monkeypatch.setattr(manual_generator, "_MANUAL_CACHE", manual_generator.OrderedDict())
+
+    first, first_meta = manual_generator.generate_manual(tmp_path, ["API_KEY"], commit_sha="abc123")
+    second, second_meta = manual_generator.generate_manual(tmp_path, ["API_KEY"], commit_sha="abc123")
+    manual_generator.generate_manual(tmp_path, ["API_KEY"], commit_sha="def456")
+    manual_generator.generate_manual(tmp_path, ["API_KEY"])
+
+    assert len(calls) == 3
+    assert first.split("## 8.")[0] == second.split("## 8.")[0]
+    assert first_meta["signals"] == second_meta["signals"]
+    assert first_meta["signals"] is not second_meta["signals"]
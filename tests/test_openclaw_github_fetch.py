@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import openclaw.skills.github_fetch as github_fetch_skill
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(repo: Path, *args: str) -> str:
+    proc = subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return proc.stdout.strip()
+
+
+def _commit(repo: Path, files: dict[str, str], message: str) -> str:
+    for name, content in files.items():
+        path = repo / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", message)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def upstream(tmp_path: Path) -> Path:
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    _commit(repo, {"README.md": "# demo\n", "src/app.py": "print('v1')\n"}, "initial")
+    return repo
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch) -> Path:
+    path = tmp_path / "workspace"
+    monkeypatch.setenv("OPENCLAW_WORKSPACE", str(path))
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_API_TOKEN", raising=False)
+    return path
+
+
+def _fetch(upstream: Path, **payload) -> github_fetch_skill.GithubFetchResult:
+    return github_fetch_skill.github_fetch({"repo_url": upstream.as_uri(), **payload})
+
+
+def test_github_fetch_cold_clone_checks_out_upstream_head(upstream: Path, workspace: Path) -> None:
+    result = _fetch(upstream)
+
+    assert result.ok, result.error_message
+    assert result.output["commit_sha"] == _git(upstream, "rev-parse", "HEAD")
+    assert result.output["readme_rendered"] == "# demo\n"
+    repo_path = Path(result.output["repo_path"])
+    assert (repo_path / "src" / "app.py").read_text(encoding="utf-8") == "print('v1')\n"
+    assert (workspace / github_fetch_skill.MIRRORS_DIRNAME).is_dir()
+
+
+def test_github_fetch_warm_refetch_picks_up_new_upstream_commit(upstream: Path, workspace: Path) -> None:
+    first = _fetch(upstream)
+    assert first.ok, first.error_message
+
+    head = _commit(upstream, {"src/app.py": "print('v2')\n", "CHANGELOG.md": "v2\n"}, "second")
+    second = _fetch(upstream)
+
+    assert second.ok, second.error_message
+    assert second.output["commit_sha"] == head
+    repo_path = Path(second.output["repo_path"])
+    assert (repo_path / "src" / "app.py").read_text(encoding="utf-8") == "print('v2')\n"
+    assert (repo_path / "CHANGELOG.md").exists()
+
+
+def test_github_fetch_reuses_worktree_pinned_to_commit(upstream: Path, workspace: Path, monkeypatch) -> None:
+    sha = _git(upstream, "rev-parse", "HEAD")
+    first = _fetch(upstream, ref=sha)
+    assert first.ok, first.error_message
+    repo_path = Path(first.output["repo_path"])
+    (repo_path / "src" / "app.py").write_text("local edit\n", encoding="utf-8")
+    (repo_path / "scratch.txt").write_text("untracked\n", encoding="utf-8")
+
+    def _no_network(*args, **kwargs):  # noqa: ARG001
+        raise AssertionError("pinned worktree should be reused without fetching")
+
+    monkeypatch.setattr(github_fetch_skill, "_update_mirror", _no_network)
+    second = _fetch(upstream, ref=sha)
+
+    assert second.ok, second.error_message
+    assert second.output["commit_sha"] == sha
+    assert (repo_path / "src" / "app.py").read_text(encoding="utf-8") == "print('v1')\n"
+    assert not (repo_path / "scratch.txt").exists()
+
+
+def test_github_fetch_checks_out_branch_ref(upstream: Path, workspace: Path) -> None:
+    _git(upstream, "checkout", "-q", "-b", "feature")
+    feature_sha = _commit(upstream, {"feature.txt": "on feature\n"}, "feature")
+    _git(upstream, "checkout", "-q", "main")
+
+    result = _fetch(upstream, ref="feature")
+
+    assert result.ok, result.error_message
+    assert result.output["commit_sha"] == feature_sha
+    assert (Path(result.output["repo_path"]) / "feature.txt").exists()
+
+
+def test_github_fetch_reports_clone_failure_for_unknown_ref(upstream: Path, workspace: Path) -> None:
+    result = _fetch(upstream, ref="does-not-exist")
+
+    assert not result.ok
+    assert result.error_code == "GIT_CLONE_FAILED"
+    assert result.error_message
+
+
+def test_github_fetch_file_index_skips_git_and_antihub_entries(upstream: Path, workspace: Path) -> None:
+    assert _fetch(upstream).ok
+    result = _fetch(upstream)
+
+    assert result.ok, result.error_message
+    paths = sorted(entry["path"] for entry in result.output["file_index"])
+    assert paths == ["README.md", "src/app.py"]
+    assert result.output["file_index_count"] == 2
@@ -49,3 +49,69 @@ def test_enrich_candidates_with_documents_sets_doc_fields(monkeypatch) -> None:
     assert candidates[1].get("doc_markdown")
     assert candidates[0].get("doc_fetch_source") == "native_readme"
     assert events
+
+
+def test_clean_html_to_text_strips_markup_and_unclosed_script() -> None:
+    raw = (
+        "<style>p>q{}</style><h1>Hi &amp; bye</h1><SCRIPT type='t'>if(a<b){}</SCRIPT>"
+        "<p>body<br/>text</p><script>never closed <b>bold</b>"
+    )
+    assert deep_fetch._clean_html_to_text(raw) == "Hi & bye body text"
+
+
+def test_github_api_get_text_revalidates_with_etag(monkeypatch) -> None:
+    requests: list[dict] = []
+
+    def _fake_http_get(url: str, timeout: int = 10, headers: dict | None = None, max_bytes: int = 0):  # noqa: ARG001
+        requests.append(dict(headers or {}))
+        if "If-None-Match" in (headers or {}):
+            return 304, None, "", False
+        return 200, '"v1"', '{"content": ""}', False
+
+    monkeypatch.setattr(deep_fetch, "_http_get", _fake_http_get)
+    monkeypatch.setattr(deep_fetch, "_GITHUB_API_CACHE", {})
+    url = "https://api.github.com/repos/demo/forum/readme"
+
+    assert deep_fetch._github_api_get_text(url, 3, {"Accept": "application/json"}) == '{"content": ""}'
+    assert deep_fetch._github_api_get_text(url, 3, {"Accept": "application/json"}) == '{"content": ""}'
+    assert len(requests) == 1
+
+    monkeypatch.setattr(deep_fetch, "GITHUB_API_CACHE_TTL_SECONDS", 0.0)
+    assert deep_fetch._github_api_get_text(url, 3, {"Accept": "application/json"}) == '{"content": ""}'
+    assert requests[-1].get("If-None-Match") == '"v1"'
+
+
+def test_github_api_get_text_skips_caching_truncated_bodies(monkeypatch) -> None:
+    calls: list[str] = []
+
+    def _fake_http_get(url: str, timeout: int = 10, headers: dict | None = None, max_bytes: int = 0):  # noqa: ARG001
+        calls.append(url)
+        return 200, '"big"', '{"content": "cut', True
+
+    monkeypatch.setattr(deep_fetch, "_http_get", _fake_http_get)
+    monkeypatch.setattr(deep_fetch, "_GITHUB_API_CACHE", {})
+    url = "https://api.github.com/repos/demo/huge/readme"
+
+    assert deep_fetch._github_api_get_text(url, 3, {}) == '{"content": "cut'
+    assert deep_fetch._github_api_get_text(url, 3, {}) == '{"content": "cut'
+    assert len(calls) == 2
+    assert deep_fetch._GITHUB_API_CACHE == {}
+
+
+def test_fetch_first_candidate_keeps_candidate_priority(monkeypatch) -> None:
+    import time
+
+    def _fake_http_get_text(url: str, timeout: int = 10, headers: dict | None = None) -> str:  # noqa: ARG001
+        if url.endswith("/missing.md"):
+            raise RuntimeError("404")
+        if url.endswith("/slow.md"):
+            time.sleep(0.05)
+            return "# Slow README"
+        return "<p>fast page</p>"
+
+    monkeypatch.setattr(deep_fetch, "_http_get_text", _fake_http_get_text)
+    found = deep_fetch._fetch_first_candidate(
+        ["https://h/missing.md", "https://h/slow.md", "https://h/page"],
+        timeout=3,
+    )
+    assert found == ("https://h/slow.md", "# Slow README", "native_readme")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pytest
+
+import recommend.gitcode as gitcode_api
+
+
+class _FakeResponse:
+    reason_phrase = "OK"
+
+    def __init__(self, status_code: int, content: bytes) -> None:
+        self.status_code = status_code
+        self.content = content
+
+
+class _FakeClient:
+    def __init__(self, response: _FakeResponse) -> None:
+        self.response = response
+
+    def get(self, url, headers=None, timeout=None):  # noqa: ANN001, ARG002
+        return self.response
+
+
+def test_request_json_returns_payload_and_records_latency(monkeypatch) -> None:
+    timings: list[str] = []
+    monkeypatch.setattr(gitcode_api, "client_for_url", lambda _url: _FakeClient(_FakeResponse(200, b'[{"name": "demo"}]')))
+    monkeypatch.setattr(gitcode_api, "record_timing_metric", lambda name, duration_ms: timings.append(name))
+
+    assert gitcode_api._request_json("https://gitcode.test/api/v4/projects", None) == [{"name": "demo"}]
+    assert timings == ["recommend.provider.gitcode.latency_ms"]
+
+
+def test_request_json_flags_html_body(monkeypatch) -> None:
+    timings: list[str] = []
+    html = b"<!DOCTYPE html><html><body>blocked</body></html>"
+    monkeypatch.setattr(gitcode_api, "client_for_url", lambda _url: _FakeClient(_FakeResponse(200, html)))
+    monkeypatch.setattr(gitcode_api, "record_timing_metric", lambda name, duration_ms: timings.append(name))
+
+    with pytest.raises(gitcode_api.GitCodeAPIError) as exc:
+        gitcode_api._request_json("https://gitcode.test/api/v4/projects", None)
+    assert exc.value.code == "GITCODE_NON_JSON_RESPONSE"
+    assert timings == ["recommend.provider.gitcode.latency_ms"]
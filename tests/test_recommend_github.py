@@ -2,7 +2,20 @@ from __future__ import annotations
 
 from urllib.parse import parse_qs, quote, urlparse
 
+import pytest
+
 import recommend.github as github_api
+from recommend.ratelimit import ProviderRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def _isolated_provider_state(monkeypatch) -> None:
+    monkeypatch.setattr(github_api, "_SEARCH_CACHE", github_api.TTLCache(max_entries=8, ttl_seconds=60))
+    monkeypatch.setattr(github_api, "_REPO_CACHE", github_api.TTLCache(max_entries=8, ttl_seconds=60))
+    for authenticated in (True, False):
+        monkeypatch.setitem(
+            github_api._SEARCH_LIMITERS, authenticated, ProviderRateLimiter(rate_per_second=100, burst=100)
+        )
 
 
 def test_trim_search_query_within_budget_and_keeps_suffix() -> None:
@@ -37,3 +50,30 @@ def test_search_repositories_sends_trimmed_query(monkeypatch) -> None:
     q = str((parsed.get("q") or [""])[0])
     assert q
     assert len(quote(q)) <= 220
+
+
+def test_search_repositories_serves_repeat_query_from_cache(monkeypatch) -> None:
+    calls: list[str] = []
+
+    def _fake_request_json(url: str, token: str | None, timeout: int = 12):  # noqa: ARG001
+        calls.append(url)
+        return {"items": [{"full_name": "octo/cache-demo"}]}
+
+    monkeypatch.setattr(github_api, "_request_json", _fake_request_json)
+
+    first, _ = github_api.search_repositories("cache demo", per_page=5)
+    first[0]["full_name"] = "mutated"
+    second, _ = github_api.search_repositories("cache demo", per_page=5)
+    assert len(calls) == 1
+    assert second == [{"full_name": "octo/cache-demo"}]
+    github_api.search_repositories("cache demo", per_page=6)
+    assert len(calls) == 2
+
+
+def test_search_repositories_projects_items_to_consumed_fields(monkeypatch) -> None:
+    raw = {"full_name": "octo/demo", "stargazers_count": 5, "owner": {"login": "octo"}, "permissions": {"pull": True}}
+    monkeypatch.setattr(github_api, "_request_json", lambda url, token, timeout=12: {"total_count": 1, "items": [raw]})
+
+    items, meta = github_api.search_repositories("projection demo", per_page=3)
+    assert items == [{"full_name": "octo/demo", "stargazers_count": 5}]
+    assert meta == {"total_count": 1}
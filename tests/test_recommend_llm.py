@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+
 import recommend.llm as llm
 
 
@@ -58,3 +60,121 @@ def test_extract_search_queries_parses_array_after_think_block(monkeypatch) -> N
     queries = llm.extract_search_queries("医院医生端图片上传 PRD")
     assert any("FileSystemWatcher" in item for item in queries)
     assert any("增量文件同步" in item for item in queries)
+
+
+class _FakeLLMResponse:
+    status_code = 200
+    reason_phrase = "OK"
+    content = b'{"choices": [{"message": {"content": "ok"}}], "usage": {"total_tokens": 3}}'
+
+
+class _FakeLLMClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def post(self, url, content=None, headers=None, timeout=None):  # noqa: ANN001, ARG002
+        self.calls += 1
+        return _FakeLLMResponse()
+
+
+def test_post_reuses_cached_completion_for_whitespace_variants(monkeypatch) -> None:
+    client = _FakeLLMClient()
+    monkeypatch.setattr(llm, "_provider_state", lambda: ("openai", "sk-test", "https://llm.test", "m", "openai"))
+    monkeypatch.setattr(llm, "client_for_url", lambda _url: client)
+    monkeypatch.setattr(llm, "_RESPONSE_CACHE", llm.TTLCache(max_entries=8, ttl_seconds=60))
+    monkeypatch.setattr(llm, "_PROMPT_CACHE", llm.TTLCache(max_entries=8, ttl_seconds=60))
+
+    first = llm._post({"messages": [{"role": "user", "content": "find  a\ncrawler"}]}, metric_scope="test.llm")
+    second = llm._post({"messages": [{"role": "user", "content": "find a crawler "}]}, metric_scope="test.llm")
+    assert client.calls == 1
+    assert second == first
+    llm._post({"messages": [{"role": "user", "content": "find a crawler"}]}, metric_scope="test.other")
+    assert client.calls == 2
+
+
+def test_post_serves_identical_body_from_exact_cache(monkeypatch) -> None:
+    client = _FakeLLMClient()
+    hits: list[str] = []
+    monkeypatch.setattr(llm, "_provider_state", lambda: ("openai", "sk-test", "https://llm.test", "m", "openai"))
+    monkeypatch.setattr(llm, "client_for_url", lambda _url: client)
+    monkeypatch.setattr(llm, "record_counter_metric", lambda name, value: hits.append(name))
+    monkeypatch.setattr(llm, "_RESPONSE_CACHE", llm.TTLCache(max_entries=8, ttl_seconds=60))
+    monkeypatch.setattr(llm, "_PROMPT_CACHE", llm.TTLCache(max_entries=8, ttl_seconds=60))
+
+    payload = {"messages": [{"role": "user", "content": "same prd"}]}
+    llm._post(payload, metric_scope="test.llm")
+    llm._post(payload, metric_scope="test.llm")
+    assert client.calls == 1
+    assert hits[-1] == "test.llm.cache_hit"
+
+
+def test_find_json_array_fragment_skips_prose_brackets_and_apostrophes() -> None:
+    text = 'I\'d pick these (see [above]): ["FileSystemWatcher", "rsync"] done'
+    assert llm._find_json_array_fragment(text) == '["FileSystemWatcher", "rsync"]'
+    assert llm._find_json_array_fragment("no array here") is None
+
+
+def test_rank_candidates_sends_condensed_candidates(monkeypatch) -> None:
+    captured: dict[str, str] = {}
+
+    def _fake_post(payload, timeout=25, metric_scope="recommend.llm"):  # noqa: ANN001, ARG001
+        captured["prompt"] = payload["messages"][1]["content"]
+        return {"choices": [{"message": {"content": '{"results": []}'}}]}
+
+    monkeypatch.setattr(llm, "llm_available", lambda: True)
+    monkeypatch.setattr(llm, "_post", _fake_post)
+    candidate = {
+        "id": "github:octo/demo",
+        "name": "octo/demo",
+        "description": "x" * 1000,
+        "topics": [f"t{i}" for i in range(20)],
+        "language": "Python",
+        "stars": 7,
+        "readme": "very long readme",
+    }
+    assert llm.rank_candidates("need a crawler", [candidate], top_k=5) == {"results": []}
+    prompt = captured["prompt"]
+    assert "x" * 241 not in prompt
+    assert "t6" not in prompt
+    assert "readme" not in prompt
+    assert '"stars":7' in prompt
+
+
+class _FakeStreamResponse:
+    status_code = 200
+    reason_phrase = "OK"
+    headers = {"content-type": "text/event-stream; charset=utf-8"}
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines = lines
+        self.consumed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        return None
+
+    def iter_lines(self):
+        for line in self.lines:
+            self.consumed += 1
+            yield line
+
+
+def test_post_stream_stops_once_json_array_closes(monkeypatch) -> None:
+    chunks = ['["File', 'SystemWatcher", "rsync"]', " Explanation that should never be read."]
+    lines = [f'data: {{"choices": [{{"delta": {{"content": {json.dumps(chunk)}}}}}]}}' for chunk in chunks]
+    response = _FakeStreamResponse(lines + ["data: [DONE]"])
+
+    class _StreamClient:
+        def stream(self, method, url, content=None, headers=None, timeout=None):  # noqa: ANN001, ARG002
+            return response
+
+    monkeypatch.setattr(llm, "_provider_state", lambda: ("openai", "sk-test", "https://llm.test", "m", "openai"))
+    monkeypatch.setattr(llm, "client_for_url", lambda _url: _StreamClient())
+    monkeypatch.setattr(llm, "_RESPONSE_CACHE", llm.TTLCache(max_entries=8, ttl_seconds=60))
+    monkeypatch.setattr(llm, "_PROMPT_CACHE", llm.TTLCache(max_entries=8, ttl_seconds=60))
+
+    result = llm._post({"messages": [{"role": "user", "content": "q"}], "stream": True}, metric_scope="test.llm")
+    assert llm._extract_content(result) == '["FileSystemWatcher", "rsync"]'
+    assert response.consumed == 2
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+import recommend.github as github_api
+import recommend.ratelimit as ratelimit
+from recommend.ratelimit import ProviderRateLimiter
+
+
+def test_rate_limiter_rejects_when_burst_is_spent() -> None:
+    limiter = ProviderRateLimiter(rate_per_second=0.01, burst=2, max_concurrent=5)
+    assert limiter.acquire(0)
+    assert limiter.acquire(0)
+    assert not limiter.acquire(0)
+    limiter.release()
+    limiter.release()
+
+
+def test_rate_limiter_caps_concurrent_slots() -> None:
+    limiter = ProviderRateLimiter(rate_per_second=100, burst=10, max_concurrent=1)
+    assert limiter.acquire(0)
+    assert not limiter.acquire(0)
+    limiter.release()
+    assert limiter.acquire(0)
+    limiter.release()
+
+
+def test_github_search_fails_fast_when_budget_exhausted(monkeypatch) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(github_api, "_token", lambda: None)
+    monkeypatch.setattr(github_api, "_request_json", lambda url, token, timeout=12: calls.append(url) or {"items": []})
+    monkeypatch.setattr(github_api, "_SEARCH_CACHE", github_api.TTLCache(max_entries=8, ttl_seconds=60))
+    monkeypatch.setitem(github_api._SEARCH_LIMITERS, False, ProviderRateLimiter(rate_per_second=0.01, burst=1))
+
+    assert github_api.search_repositories("crawler budget", timeout=0) == ([], {})
+    with pytest.raises(github_api.GitHubAPIError) as exc:
+        github_api.search_repositories("scraper budget", timeout=0)
+    assert exc.value.code == "GITHUB_RATE_LIMIT"
+    assert len(calls) == 1
+
+
+def test_rate_limiter_returns_token_when_slot_wait_times_out() -> None:
+    limiter = ProviderRateLimiter(rate_per_second=0.01, burst=2, max_concurrent=1)
+    assert limiter.acquire(0)
+    assert not limiter.acquire(0)
+    limiter.release()
+    assert limiter.acquire(0)
+    limiter.release()
+
+
+@pytest.mark.parametrize("authenticated", [True, False])
+def test_github_search_limiter_stays_within_one_minute_quota(monkeypatch, authenticated: bool) -> None:
+    clock = {"now": 1000.0}
+    fake_time = SimpleNamespace(
+        monotonic=lambda: clock["now"],
+        sleep=lambda seconds: clock.__setitem__("now", clock["now"] + seconds),
+    )
+    monkeypatch.setattr(ratelimit, "time", fake_time)
+    configured = github_api._SEARCH_LIMITERS[authenticated]
+    limiter = ProviderRateLimiter(rate_per_second=configured.rate_per_second, burst=configured.burst)
+
+    started = clock["now"]
+    granted = 0
+    while True:
+        remaining = 60.0 - (clock["now"] - started)
+        if remaining < 0 or not limiter.acquire(remaining):
+            break
+        limiter.release()
+        granted += 1
+
+    assert granted <= github_api._SEARCH_QUOTA_PER_MINUTE[authenticated]
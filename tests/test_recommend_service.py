@@ -1,8 +1,11 @@
 from recommend.models import RecommendationProfile
 from recommend.service import (
     _build_search_queries,
+    _candidate_term_set,
     _collect_match_terms,
     _fallback_rank,
+    _query_context,
+    _score_fallback_candidate,
     _simple_similarity,
     recommend_repositories,
 )
@@ -52,6 +55,32 @@ def test_fallback_rank_not_dominated_by_star_count_only() -> None:
     assert ranked[0]["id"] == "good/repo"
 
 
+def test_fallback_rank_skips_long_tail_without_changing_top_k(monkeypatch) -> None:
+    query = "微信公众号情报搜奇爬取汇总"
+    candidates = [
+        {"id": "good/repo", "summary": "wechat crawler for official-account intelligence collection", "stars": 120},
+    ] + [
+        {"id": f"noise/{index}", "summary": f"music player toolkit {index}", "stars": index}
+        for index in range(30)
+    ]
+    full = sorted(
+        (_score_fallback_candidate(_query_context(query), item) for item in candidates),
+        key=lambda row: row.score,
+        reverse=True,
+    )
+    tokenized: list[str] = []
+
+    def tracking(candidate: str) -> set[str]:
+        tokenized.append(candidate)
+        return _candidate_term_set(candidate)
+
+    monkeypatch.setattr("recommend.service._candidate_term_set", tracking)
+    ranked = _fallback_rank(candidates, query=query, top_k=3)
+
+    assert [row["id"] for row in ranked] == [row.item["id"] for row in full[:3]]
+    assert len(tokenized) < len(candidates)
+
+
 def test_build_search_queries_expands_cjk_terms() -> None:
     query = "微信公众号情报搜奇爬取汇总"
     profile = RecommendationProfile(
@@ -529,3 +558,65 @@ def test_recommend_repositories_stops_low_precision_fallback_when_query_rewrite_
     assert result.recommendations == []
     assert called["search"] is False
     assert any("OPENAI_API_KEY" in item for item in (result.warnings or []))
+
+
+def test_recommend_repositories_overlaps_query_rewrite_with_profile(monkeypatch) -> None:
+    import threading
+
+    rewrite_started = threading.Event()
+    overlapped: list[bool] = []
+
+    def fake_profile(_requirement_text: str, _query: str):
+        overlapped.append(rewrite_started.wait(timeout=2))
+        return None
+
+    def fake_extract(_text: str):
+        rewrite_started.set()
+        return ["FileSystemWatcher"]
+
+    monkeypatch.setattr("recommend.service.build_requirement_profile", fake_profile)
+    monkeypatch.setattr("recommend.service.extract_search_queries", fake_extract)
+    monkeypatch.setattr("recommend.service.search_repositories", lambda *_args, **_kwargs: ([], {}))
+    monkeypatch.setattr("recommend.service.search_gitee_repositories", lambda *_args, **_kwargs: ([], {}))
+    monkeypatch.setattr("recommend.service.search_gitcode_repositories", lambda *_args, **_kwargs: ([], {}))
+    monkeypatch.setattr("recommend.service.load_templates", lambda: [])
+    monkeypatch.setattr("recommend.service.llm_available", lambda: False)
+
+    recommend_repositories(query="", requirement_text="需要监控文件夹并增量同步" * 12, mode="deep", limit=10)
+    assert overlapped == [True]
+
+
+def test_recommend_repositories_shortlists_candidates_before_llm_rerank(monkeypatch) -> None:
+    seen: list[int] = []
+
+    def fake_search_repositories(_query: str, per_page: int = 20, page: int = 1, timeout: int = 8):  # noqa: ARG001
+        return (
+            [
+                {
+                    "full_name": f"acme/forum-{idx}",
+                    "html_url": f"https://github.com/acme/forum-{idx}",
+                    "description": "community forum" if idx % 2 else "music player",
+                    "topics": ["forum"],
+                    "stargazers_count": idx,
+                }
+                for idx in range(80)
+            ],
+            {},
+        )
+
+    def fake_rank(_summary: str, candidates, _top_k: int):
+        seen.append(len(candidates))
+        return None
+
+    monkeypatch.setattr("recommend.service.search_repositories", fake_search_repositories)
+    monkeypatch.setattr("recommend.service.search_gitee_repositories", lambda *_args, **_kwargs: ([], {}))
+    monkeypatch.setattr("recommend.service.search_gitcode_repositories", lambda *_args, **_kwargs: ([], {}))
+    monkeypatch.setattr("recommend.service.load_templates", lambda: [])
+    monkeypatch.setattr("recommend.service.llm_available", lambda: True)
+    monkeypatch.setattr("recommend.service.build_requirement_profile", lambda *_args: None)
+    monkeypatch.setattr("recommend.service.rank_candidates", fake_rank)
+    monkeypatch.setattr("recommend.service.summarize_findings", lambda *_args, **_kwargs: None)
+
+    result = recommend_repositories(query="社区论坛", requirement_text="社区论坛", mode="quick", limit=10)
+    assert seen == [50]
+    assert result.recommendations
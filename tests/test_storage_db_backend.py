@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import importlib
+from fnmatch import fnmatch
 from pathlib import Path
 
 
@@ -71,3 +72,87 @@ def test_db_log_retention(monkeypatch, tmp_path: Path) -> None:
 
     logs = storage.get_logs("c_keep")
     assert [entry.get("line") for entry in logs] == ["l2", "l3"]
+
+
+def test_db_update_case_runtime_merges_fields(monkeypatch, tmp_path: Path) -> None:
+    storage = _reload_storage_with_db_backend(monkeypatch, tmp_path)
+
+    storage.set_case("c_rt", {"status": "RUNNING", "runtime": {"container_id": "abc", "host_port": 8080}})
+    storage.update_case_runtime("c_rt", {"exited_at": 1.0, "exit_code": 0}, {"status": "STOPPED"})
+
+    payload = storage.get_case("c_rt")
+    assert payload is not None
+    assert payload.get("status") == "STOPPED"
+    assert payload.get("runtime") == {"container_id": "abc", "host_port": 8080, "exited_at": 1.0, "exit_code": 0}
+
+
+def test_redis_case_fields_flatten_runtime() -> None:
+    import storage
+
+    encoded = storage._encode_case_fields({"status": "RUNNING", "runtime": {"host_port": 8080, "exit_code": None}})
+    assert "runtime" not in encoded
+    assert encoded["runtime.host_port"] == "8080"
+    assert encoded["runtime.exit_code"] == "null"
+
+    decoded = storage._decode_case_fields(
+        {**encoded, "runtime": '{"container_id": "abc", "host_port": 1}', "runtime.exited_at": "2.0"}
+    )
+    assert decoded["status"] == "RUNNING"
+    assert decoded["runtime"] == {"container_id": "abc", "host_port": 8080, "exit_code": None, "exited_at": 2.0}
+
+
+def test_logs_jsonl_cache_round_trip(monkeypatch, tmp_path: Path) -> None:
+    storage = _reload_storage_with_db_backend(monkeypatch, tmp_path)
+
+    assert storage.get_cached_logs_jsonl("c_dl", 0, 100) is None
+    storage.cache_logs_jsonl("c_dl", 0, 100, '{"line": "a"}\n')
+    assert storage.get_cached_logs_jsonl("c_dl", 0, 100) == '{"line": "a"}\n'
+    assert storage.get_cached_logs_jsonl("c_dl", 1, 100) is None
+
+
+class _ScanRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, object] = {}
+
+    def hset(self, key: str, mapping: dict[str, str]) -> None:
+        self.values.setdefault(key, {}).update(mapping)
+
+    def set(self, key: str, value: str, ex: int | None = None) -> None:
+        self.values[key] = value
+
+    def get(self, key: str) -> str | None:
+        value = self.values.get(key)
+        return value if isinstance(value, str) else None
+
+    def scan(self, cursor: int = 0, match: str = "*", count: int = 10) -> tuple[int, list[str]]:
+        return 0, [key for key in self.values if fnmatch(key, match)]
+
+
+def test_redis_logs_jsonl_cache_stays_out_of_case_keyspace(monkeypatch) -> None:
+    import storage
+
+    client = _ScanRedis()
+    monkeypatch.setattr(storage, "USE_DB_CASE_STORE", False)
+    monkeypatch.setattr(storage, "USE_MEMORY_STORE", False)
+    monkeypatch.setattr(storage, "LOG_JSONL_CACHE_TTL_SECONDS", 30)
+    monkeypatch.setattr(storage, "get_redis_client", lambda: client)
+
+    storage.set_case("c_dl", {"status": "RUNNING"})
+    assert storage.list_case_ids() == ["c_dl"]
+
+    storage.cache_logs_jsonl("c_dl", 0, 200, '{"line": "a"}\n')
+    assert storage.get_cached_logs_jsonl("c_dl", 0, 200) == '{"line": "a"}\n'
+    assert storage.list_case_ids() == ["c_dl"]
+
+
+def test_db_get_case_fields_selects_requested_fields(monkeypatch, tmp_path: Path) -> None:
+    storage = _reload_storage_with_db_backend(monkeypatch, tmp_path)
+
+    storage.set_case(
+        "c_fields",
+        {"status": "RUNNING", "tenant_id": "t1", "runtime": {"host_port": 8080, "ports": [8080]}},
+    )
+
+    payload = storage.get_case_fields("c_fields", ["status", "owner_username", "runtime.host_port"])
+    assert payload == {"status": "RUNNING", "runtime": {"host_port": 8080}}
+    assert storage.get_case_fields("c_missing", ["status"]) is None
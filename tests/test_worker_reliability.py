@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import json
 
+import pytest
+
 import worker
 
 
@@ -52,3 +54,20 @@ def test_task_failure_before_max_retry_does_not_dead_letter(monkeypatch) -> None
         kwargs={"force": True},
     )
     assert memory.lrange("test:dead_letters", 0, -1) == []
+
+
+def test_scheduled_port_release_keeps_port_cooling(monkeypatch) -> None:
+    memory = worker._MemoryRedis()
+    monkeypatch.setattr(worker, "redis_client", memory)
+    monkeypatch.setattr(worker, "PORT_POOL_START", 30000)
+    monkeypatch.setattr(worker, "PORT_POOL_END", 30001)
+
+    assert worker.reserve_port("case-1") == 30000
+    worker.schedule_port_release(30000, "case-1", delay_seconds=5)
+
+    assert worker.reserve_port("case-2") == 30001
+    with pytest.raises(worker.BuildError) as exc:
+        worker.reserve_specific_port("case-3", 30000)
+    assert exc.value.code == "PORT_IN_USE"
+    worker.reserve_specific_port("case-1", 30000)
+    assert memory.get(f"{worker.PORT_LOCK_PREFIX}30000") == "case-1"
@@ -1,4 +1,5 @@
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -16,10 +17,15 @@ def visuals_path(repo_url: str, commit_sha: str, template_version: str | None =
     return report_dir(repo_url) / f"{commit_sha}.{safe_version}.visuals.json"
 
 
-def visuals_dir(repo_url: str, commit_sha: str, template_version: str | None = None) -> Path:
+@lru_cache(maxsize=1024)
+def _visuals_slug(commit_sha: str, template_version: str) -> str:
     safe_commit = (commit_sha or "unknown").replace("/", "_").replace("\\", "_")
-    safe_version = _safe_version(template_version or VISUAL_TEMPLATE_VERSION)
-    return report_dir(repo_url) / f"{safe_commit}-{safe_version}"
+    return f"{safe_commit}-{_safe_version(template_version)}"
+
+
+def visuals_dir(repo_url: str, commit_sha: str, template_version: str | None = None) -> Path:
+    # report_dir() resolves REPORT_ROOT against the current directory, so only the slug is cached.
+    return report_dir(repo_url) / _visuals_slug(commit_sha, template_version or VISUAL_TEMPLATE_VERSION)
 
 
 def visual_cache_key(repo_url: str, commit_sha: str, template_version: str | None = None) -> str:
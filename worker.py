@@ -43,6 +43,7 @@ from config import (
     PORT_MODE,
     PORT_POOL_END,
     PORT_POOL_START,
+    PORT_RELEASE_COOLDOWN_SECONDS,
     PUBLIC_HOST,
     REDIS_DISABLED,
     REDIS_URL,
@@ -82,6 +83,7 @@ from storage import (
     set_manual,
     set_manual_status,
     update_case,
+    update_case_runtime,
 )
 from strategy_engine import (
     generate_dockerfile,
@@ -163,6 +165,7 @@ class _MemoryRedis:
 redis_client: Any = redis.Redis.from_url(REDIS_URL, decode_responses=True) if _USE_REDIS else _MemoryRedis()
 
 PORT_LOCK_PREFIX = "port_lock:"
+PORT_COOLING_PREFIX = "cooling:"
 
 
 def _enqueue_dead_letter(
@@ -848,7 +851,8 @@ def reserve_port(case_id: str, exclude: Optional[set[int]] = None) -> int:
 def reserve_specific_port(case_id: str, port: int) -> None:
     lock_key = f"{PORT_LOCK_PREFIX}{port}"
     existing = redis_client.get(lock_key)
-    if existing and existing != case_id:
+    # A case may reclaim its own cooling port (e.g. restart right after stop).
+    if existing and existing not in {case_id, f"{PORT_COOLING_PREFIX}{case_id}"}:
         raise BuildError("Port already reserved", "PORT_IN_USE")
     redis_client.set(lock_key, case_id, ex=86400)
 
@@ -859,6 +863,20 @@ def release_port(port: Optional[int]) -> None:
     redis_client.delete(f"{PORT_LOCK_PREFIX}{port}")
 
 
+def schedule_port_release(
+    port: Optional[int],
+    case_id: str,
+    delay_seconds: int = PORT_RELEASE_COOLDOWN_SECONDS,
+) -> None:
+    """Release a port after a short cooldown so other cases cannot grab it before Docker unbinds it."""
+    if port is None:
+        return
+    if delay_seconds <= 0:
+        release_port(port)
+        return
+    redis_client.set(f"{PORT_LOCK_PREFIX}{port}", f"{PORT_COOLING_PREFIX}{case_id}", ex=delay_seconds)
+
+
 def classify_error(exc: Exception) -> tuple[str, str]:
     message = str(exc)
     if isinstance(exc, BuildError):
@@ -898,6 +916,13 @@ def classify_error(exc: Exception) -> tuple[str, str]:
     return "UNEXPECTED_ERROR", message
 
 
+def _head_commit_sha(repo_dir: Path) -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "-C", str(repo_dir), "rev-parse", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
 def classify_manual_error(exc: Exception) -> tuple[str, str]:
     message = str(exc)
     if isinstance(exc, SoftTimeLimitExceeded):
@@ -927,37 +952,29 @@ def stream_container_logs(case_id: str, container_id: str) -> None:
         runtime = existing.get("runtime") or {}
         host_port = runtime.get("host_port") or existing.get("host_port")
         if exit_code is None or exit_code == 0:
-            update_case(
+            update_case_runtime(
                 case_id,
+                {"exited_at": finished_at, "exit_code": exit_code},
                 {
                     "status": "FINISHED",
                     "stage": "run",
-                    "runtime": {
-                        **runtime,
-                        "exited_at": finished_at,
-                        "exit_code": exit_code,
-                    },
                 },
             )
             publish_log(case_id, "system", f"Container exited with code {exit_code}")
         else:
-            update_case(
+            update_case_runtime(
                 case_id,
+                {"exited_at": finished_at, "exit_code": exit_code},
                 {
                     "status": "FAILED",
                     "stage": "run",
                     "error_code": "CONTAINER_EXIT_NONZERO",
                     "error_message": f"Container exited with code {exit_code}",
-                    "runtime": {
-                        **runtime,
-                        "exited_at": finished_at,
-                        "exit_code": exit_code,
-                    },
                 },
             )
             publish_log(case_id, "system", f"Container exited with code {exit_code}", level="ERROR")
         if PORT_MODE != "dynamic":
-            release_port(host_port)
+            schedule_port_release(host_port, case_id)
 
 
 def launch_log_stream(case_id: str, container_id: str) -> None:
@@ -1117,15 +1134,7 @@ def build_and_run(
             clone_warnings.append("LFS_POINTERS_DETECTED")
         elif enable_lfs:
             publish_log(case_id, "system", "[clone-post] LFS support enabled (none detected)")
-        try:
-            commit_sha = (
-                subprocess.check_output(
-                    ["git", "-C", str(target_dir), "rev-parse", "HEAD"], text=True
-                )
-                .strip()
-            )
-        except Exception:
-            commit_sha = None
+        commit_sha = _head_commit_sha(target_dir)
         if commit_sha:
             update_case(case_id, {"commit_sha": commit_sha})
             publish_log(case_id, "system", f"Checked out commit {commit_sha}")
@@ -1878,6 +1887,7 @@ def generate_manual_task(case_id: str) -> dict:
             tree_depth=MANUAL_TREE_DEPTH,
             readme_max_chars=MANUAL_MAX_README_CHARS,
             previous_manual=previous_manual,
+            commit_sha=_head_commit_sha(target_dir),
         )
         set_manual(case_id, manual_md, meta)
         set_manual_status(case_id, "SUCCESS", generated_at=meta.get("generated_at"))